@@ -0,0 +1,180 @@
+# agents/budget_gate_agent.py
+
+import math
+from collections import OrderedDict
+from utils.prompting import (BATCH_SYSTEM_PROMPT, SYSTEM_PROMPT, build_lead_prompt, build_template_prompt,
+                             cluster_key, estimate_tokens)
+from utils.rate_limiter import get_rate_limiter
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BudgetGateAgent:
+    """
+    Agent that caps what the outreach steps may spend.
+    Sits between ScoringAgent and OutreachContentAgent: drops leads under a
+    score floor, estimates each remaining lead's LLM tokens, send and wall time,
+    and keeps the subset with the highest total score that fits the per-run
+    budget. The expected spend is reported before any content is generated.
+
+    Costs follow OutreachContentAgent's generation_mode, which the CostModel
+    config must mirror: per_lead pays one LLM call per lead, template pays one
+    call per cluster chunk (shared evenly by its leads) and batch shares one
+    call, and its system prompt, across batch_size leads.
+    Input: ranked_leads from ScoringAgent
+    Output: ranked_leads (selected, in rank order) and budget_report
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initialize BudgetGateAgent.
+        Accepts cost model settings: tokens_per_email (expected completion tokens),
+        llm_provider / send_provider (rate limit policies used to estimate time),
+        seconds_per_llm_call / seconds_per_send (explicit overrides),
+        persona / tone (to size prompts like OutreachContentAgent does) and the
+        outreach step's generation_mode ("per_lead", "template" or "batch"),
+        template_reuse_cap, batch_size and batch_max_output_tokens.
+        """
+        self.tokens_per_email = int(kwargs.get("tokens_per_email", 220))
+        self.llm_provider = kwargs.get("llm_provider", "openrouter")
+        self.send_provider = kwargs.get("send_provider", "brevo")
+        self.seconds_per_llm_call = kwargs.get("seconds_per_llm_call")
+        self.seconds_per_send = kwargs.get("seconds_per_send")
+        self.persona = kwargs.get("persona", "SDR")
+        self.tone = kwargs.get("tone", "friendly")
+        self.generation_mode = kwargs.get("generation_mode", "per_lead")
+        if self.generation_mode not in ("per_lead", "template", "batch"):
+            raise ValueError(f"Unknown generation_mode '{self.generation_mode}'. "
+                             f"Available: ['per_lead', 'template', 'batch']")
+        self.template_reuse_cap = max(1, int(kwargs.get("template_reuse_cap", 25)))
+        self.batch_size = max(1, int(kwargs.get("batch_size", 10)))
+        self.batch_max_output_tokens = int(kwargs.get("batch_max_output_tokens", 4000))
+
+    def _seconds_per(self, override, provider: str) -> float:
+        """Wall time per request: explicit override, else the provider's rate limit."""
+        if override is not None:
+            return float(override)
+        rate = get_rate_limiter().policy(provider).bucket.rate
+        return 1.0 / rate if rate > 0 else 0.0
+
+    def lead_cost(self, lead: dict, seconds_per_lead: float, system_tokens: int) -> dict:
+        """Expected LLM tokens, sends and seconds of generating and sending one lead's email."""
+        prompt = build_lead_prompt(lead, self.persona, self.tone)
+        tokens = system_tokens + estimate_tokens(prompt) + self.tokens_per_email
+        return {"tokens": tokens, "sends": 1, "seconds": seconds_per_lead}
+
+    def lead_costs(self, leads: list, seconds_per_call: float, seconds_per_send: float) -> list:
+        """Expected cost of each lead under generation_mode, in the order given."""
+        if self.generation_mode == "per_lead":
+            system_tokens = estimate_tokens(SYSTEM_PROMPT)
+            return [self.lead_cost(lead, seconds_per_call + seconds_per_send, system_tokens) for lead in leads]
+
+        if self.generation_mode == "batch":
+            # Like OutreachContentAgent._tune_batch_size, the output budget can cap the batch
+            size = max(1, min(self.batch_size, self.batch_max_output_tokens // max(self.tokens_per_email, 1)))
+            system_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT) / size
+            return [{"tokens": system_tokens + estimate_tokens(build_lead_prompt(lead, self.persona, self.tone))
+                     + self.tokens_per_email,
+                     "sends": 1, "seconds": seconds_per_call / size + seconds_per_send} for lead in leads]
+
+        # template: clusters as OutreachContentAgent._cluster_leads builds them, one call per chunk
+        clusters = OrderedDict()
+        for index, lead in enumerate(leads):
+            clusters.setdefault(cluster_key(lead), []).append(index)
+        system_tokens = estimate_tokens(SYSTEM_PROMPT)
+        costs = [None] * len(leads)
+        for members in clusters.values():
+            for i in range(0, len(members), self.template_reuse_cap):
+                chunk = members[i:i + self.template_reuse_cap]
+                prompt = build_template_prompt(leads[chunk[0]], self.persona, self.tone)
+                tokens = system_tokens + estimate_tokens(prompt) + self.tokens_per_email
+                for index in chunk:
+                    costs[index] = {"tokens": tokens / len(chunk), "sends": 1,
+                                    "seconds": seconds_per_call / len(chunk) + seconds_per_send}
+        return costs
+
+    @staticmethod
+    def _weight(cost: dict, limits: dict) -> float:
+        """Share of the tightest limit a lead uses (0 when nothing is limited)."""
+        shares = [cost[key] / limits[key] for key in ("tokens", "sends", "seconds") if limits.get(key)]
+        return max(shares) if shares else 0.0
+
+    def run(self, ranked_leads: list = None, budget: dict = None) -> dict:
+        """
+        Select the leads worth spending on.
+
+        Args:
+            ranked_leads: Scored leads from ScoringAgent
+            budget: Per-run limits, all optional:
+                {
+                    "min_score": 0.5,          # score floor
+                    "max_llm_tokens": 200000,  # prompt + completion tokens
+                    "max_sends": 500,          # emails sent
+                    "max_seconds": 3600,       # generation + send wall time
+                    "strategy": "greedy"       # "greedy" (score per unit of cost) or "rank" (score order)
+                }
+
+        Returns:
+            dict: { "ranked_leads": [ ... ], "budget_report": { ... } }
+        """
+        budget = budget or {}
+        leads = list(ranked_leads or [])
+        limits = {"tokens": budget.get("max_llm_tokens"), "sends": budget.get("max_sends"),
+                  "seconds": budget.get("max_seconds")}
+        min_score = budget.get("min_score")
+        strategy = budget.get("strategy", "greedy")
+        if strategy not in ("greedy", "rank"):
+            raise ValueError(f"Unknown budget strategy '{strategy}'. Available: ['greedy', 'rank']")
+
+        seconds_per_call = self._seconds_per(self.seconds_per_llm_call, self.llm_provider)
+        seconds_per_send = self._seconds_per(self.seconds_per_send, self.send_provider)
+
+        eligible = [(rank, lead) for rank, lead in enumerate(leads)
+                    if min_score is None or lead.get("total_score", 0) >= min_score]
+        costs = dict(zip([rank for rank, _ in eligible],
+                         self.lead_costs([lead for _, lead in eligible], seconds_per_call, seconds_per_send)))
+
+        if strategy == "greedy":
+            # Knapsack heuristic: best score per unit of the tightest limit first
+            order = sorted(eligible, key=lambda item: -item[1].get("total_score", 0) /
+                           max(self._weight(costs[item[0]], limits), 1e-12))
+        else:
+            order = eligible
+
+        spent = {"tokens": 0, "sends": 0, "seconds": 0.0}
+        selected = []
+        binding = set()
+        for rank, lead in order:
+            cost = costs[rank]
+            over = [key for key in spent if limits.get(key) is not None and spent[key] + cost[key] > limits[key]]
+            if over:
+                binding.update(over)
+                continue
+            for key in spent:
+                spent[key] += cost[key]
+            selected.append(rank)
+
+        chosen = [leads[rank] for rank in sorted(selected)]
+        total = {key: sum(cost[key] for cost in costs.values()) for key in spent}
+        report = {
+            "strategy": strategy,
+            "generation_mode": self.generation_mode,
+            "limits": {"min_score": min_score, "max_llm_tokens": limits["tokens"], "max_sends": limits["sends"],
+                       "max_seconds": limits["seconds"]},
+            "leads_in": len(leads),
+            "below_score_floor": len(leads) - len(eligible),
+            "dropped_by_budget": len(eligible) - len(chosen),
+            "selected": len(chosen),
+            "binding_limits": sorted(binding),
+            "expected_llm_tokens": math.ceil(spent["tokens"]),
+            "expected_sends": spent["sends"],
+            "expected_seconds": round(spent["seconds"], 1),
+            "unbudgeted_llm_tokens": math.ceil(total["tokens"]),
+            "unbudgeted_seconds": round(total["seconds"], 1),
+            "selected_score_sum": round(sum(lead.get("total_score", 0) for lead in chosen), 3)
+        }
+        logger.info("Selected %d/%d leads; expected spend (%s): %d LLM tokens, %d sends, ~%ds (limits: %s)",
+                    len(chosen), len(leads), self.generation_mode, report["expected_llm_tokens"], spent["sends"],
+                    math.ceil(spent["seconds"]), report["limits"], extra={"budget_report": report})
+        return {"ranked_leads": chosen, "budget_report": report}
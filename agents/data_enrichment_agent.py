@@ -1,4 +1,15 @@
-import requests
+from utils.http_client import get_transport
+from utils.role_classifier import get_role_classifier
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Technology stack mapping (example placeholders); override with the "tech_stacks" tool config
+DEFAULT_TECH_STACKS = {
+    "ExampleCorp": ["Salesforce", "HubSpot", "Outreach", "LinkedIn Sales Navigator"],
+    "TestCo": ["Pipedrive", "Microsoft Dynamics", "Slack", "Zapier"],
+    "default": ["Salesforce", "HubSpot"]
+}
 
 class DataEnrichmentAgent:
     """
@@ -7,12 +18,17 @@ class DataEnrichmentAgent:
     Output: enriched leads with company info, role, and technologies.
     """
 
+    # Bulk mode (src/bulk_runner.py): list consumed by run() and list it returns
+    batch_input = "leads"
+    batch_output = "enriched_leads"
+
     def __init__(self, **kwargs):
         """
         Initialize DataEnrichmentAgent.
-        Accepts hunter_api_key if provided.
+        Accepts hunter_api_key if provided, and tech_stacks ({company: [...], "default": [...]}).
         """
         self.hunter_api_key = kwargs.get("api_key")
+        self.tech_stacks = kwargs.get("tech_stacks") or DEFAULT_TECH_STACKS
 
     def fetch_role_from_hunter(self, email: str) -> str:
         """
@@ -21,15 +37,15 @@ class DataEnrichmentAgent:
         """
         try:
             url = f"https://api.hunter.io/v2/email-finder?email={email}&api_key={self.hunter_api_key}"
-            response = requests.get(url)
+            response = get_transport().get(url)
             if response.status_code == 200:
                 data = response.json()
                 return data.get("data", {}).get("position")
         except Exception as e:
-            print(f"Hunter.io lookup failed for {email}: {e}")
+            logger.warning("Hunter.io lookup failed for %s: %s", email, e)
         return None
 
-    def run(self, leads: list = None) -> dict:
+    def run(self, leads: list = None, role_classifier: dict = None) -> dict:
         """
         Enrich lead data with role, technologies, and engagement scores.
 
@@ -44,6 +60,7 @@ class DataEnrichmentAgent:
                         "linkedin": "https://linkedin.com/in/janedoe"
                     }
                 ]
+            role_classifier: Keyword tables for utils.role_classifier (config.role_classifier)
 
         Returns:
             dict: { "enriched_leads": [ ... ] }
@@ -65,20 +82,10 @@ class DataEnrichmentAgent:
                 }
             ]
 
-        # Technology stack mapping (example placeholders)
-        tech_stacks = {
-            "ExampleCorp": ["Salesforce", "HubSpot", "Outreach", "LinkedIn Sales Navigator"],
-            "TestCo": ["Pipedrive", "Microsoft Dynamics", "Slack", "Zapier"],
-            "default": ["Salesforce", "HubSpot"]
-        }
-
-        enriched_leads = []
-
+        classifier = get_role_classifier(role_classifier)
+        roles = []
         for lead in leads:
-            company = lead.get("company", "Unknown")
-            name = lead.get("contact_name", "John Doe")
             email = lead.get("email", "")
-            linkedin = lead.get("linkedin", "")
 
             # Try to fetch real role from Hunter.io
             role = None
@@ -87,34 +94,27 @@ class DataEnrichmentAgent:
 
             # Fallback heuristic if Hunter.io doesn’t return
             if not role:
-                lower_email = email.lower()
-                if "vp" in lower_email or "vp" in name.lower():
-                    role = "VP of Sales"
-                elif "director" in lower_email or "director" in name.lower():
-                    role = "Director of Sales"
-                elif "manager" in lower_email or "manager" in name.lower():
-                    role = "Sales Manager"
-                else:
-                    role = "Sales Executive"
-
-            # Determine seniority
-            if any(x in role.lower() for x in ["vp", "chief", "head"]):
-                seniority = "executive"
-            elif "director" in role.lower():
-                seniority = "senior"
-            else:
-                seniority = "mid"
-
-            technologies = tech_stacks.get(company, tech_stacks["default"])
+                role = classifier.infer_role(f"{email} {lead.get('contact_name', 'John Doe')}")
+            roles.append(role)
+
+        # Determine seniority (one classification per distinct title)
+        seniorities = [seniority for seniority, _ in classifier.classify_many(roles)]
+
+        enriched_leads = []
+        for lead, role, seniority in zip(leads, roles, seniorities):
+            company = lead.get("company", "Unknown")
+            technologies = self.tech_stacks.get(company, self.tech_stacks["default"])
 
             enriched_leads.append({
                 "company": company,
-                "contact_name": name,
-                "email": email,
-                "linkedin": linkedin,
+                "contact_name": lead.get("contact_name", "John Doe"),
+                "email": lead.get("email", ""),
+                "linkedin": lead.get("linkedin", ""),
                 "role": role,
                 "technologies": technologies,
                 "seniority_level": seniority,
+                "employee_count": lead.get("employee_count"),
+                "revenue": lead.get("revenue"),
                 "engagement_score": 0.75  # initial base score; updated later
             })
 
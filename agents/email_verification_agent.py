@@ -0,0 +1,202 @@
+# agents/email_verification_agent.py
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from apis.hunter_api import email_verifier
+from utils.cache_store import PersistentCache
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Inconclusive verdicts: catch-all domains, Hunter "unknown" and failed lookups ("error")
+UNKNOWN_STATUSES = ("accept_all", "unknown", "error")
+
+
+class EmailVerificationAgent:
+    """
+    Agent to verify recipient addresses with Hunter.io before sending.
+    Input: messages from OutreachContentAgent
+    Output: messages whose address verified as deliverable, the rejected ones,
+    the inconclusive ones (unknown) and a verification summary
+
+    Inconclusive messages (catch-all domain, Hunter "unknown", failed lookup)
+    are held back in "unknown" unless send_unknown is set; they are never
+    reported as rejected. Without an API key, missing_key_policy decides:
+    "hold" (default) sends none, so unverified and guessed addresses never
+    reach the executor; "pass_through" is an explicit opt-in to send them all.
+
+    Lookups run concurrently and are cached persistently per address. Verdicts
+    that hold for a whole domain (catch-all, no mail server, disposable) are
+    cached per domain, and further addresses on that domain are decided without
+    a lookup. Each unknown domain is probed with one address first, so a
+    catch-all or dead domain costs one API call instead of one per contact.
+    """
+
+    # The builder may construct this agent without HUNTER_API_KEY; missing_key_policy applies
+    optional_config = ("api_key",)
+
+    def __init__(self, api_key=None, **kwargs):
+        """
+        Initialize EmailVerificationAgent.
+        Accepts api_key (Hunter.io), plus optional max_workers (concurrent lookups),
+        allowed_statuses (Hunter statuses that may be sent to), send_unknown (also send
+        inconclusive verdicts), missing_key_policy ("hold" or "pass_through"), cache_path,
+        cache_ttl (address verdicts), catch_all_ttl (catch-all domain verdicts),
+        domain_ttl (dead / disposable domain verdicts) and unknown_ttl
+        (inconclusive results, retried sooner).
+        """
+        self.api_key = api_key
+        self.max_workers = max(1, int(kwargs.get("max_workers", 8)))
+        self.allowed_statuses = set(kwargs.get("allowed_statuses", ["valid", "webmail"]))
+        self.send_unknown = bool(kwargs.get("send_unknown", False))
+        self.missing_key_policy = kwargs.get("missing_key_policy", "hold")
+        if self.missing_key_policy not in ("hold", "pass_through"):
+            raise ValueError(f"Unknown missing_key_policy '{self.missing_key_policy}'. "
+                             f"Available: ['hold', 'pass_through']")
+        self.cache_ttl = kwargs.get("cache_ttl", 30 * 24 * 3600)
+        self.catch_all_ttl = kwargs.get("catch_all_ttl", 24 * 3600)
+        self.domain_ttl = kwargs.get("domain_ttl", 7 * 24 * 3600)
+        self.unknown_ttl = kwargs.get("unknown_ttl", 3600)
+        self.cache = PersistentCache(kwargs.get("cache_path", "cache/email_verification.sqlite3"),
+                                     ttl_seconds=self.cache_ttl,
+                                     max_entries=kwargs.get("cache_max_entries", 1000000))
+
+    @staticmethod
+    def _domain(email: str) -> str:
+        return email.rsplit("@", 1)[1].lower()
+
+    def _lookup(self, email: str) -> dict:
+        """Verify one address with Hunter.io; network / API errors yield status "error" (not cached)."""
+        try:
+            response = email_verifier(email, api_key=self.api_key)
+            data = response.get("data") or {}
+            if not data.get("status"):
+                raise ValueError(response.get("errors") or "no status in response")
+        except Exception as e:
+            logger.warning("Lookup failed for %s: %s", email, e)
+            return {"status": "error", "error": str(e)}
+        return {
+            "status": data["status"],
+            "score": data.get("score"),
+            "accept_all": bool(data.get("accept_all")),
+            "mx_records": data.get("mx_records", True),
+            "disposable": bool(data.get("disposable"))
+        }
+
+    def _remember(self, email: str, verdict: dict):
+        """Cache an address verdict, and a domain verdict when the result applies to the whole domain."""
+        if verdict["status"] == "error":
+            return
+        ttl = self.unknown_ttl if verdict["status"] == "unknown" else None
+        self.cache.set(PersistentCache.make_key("address", email), verdict, ttl_seconds=ttl)
+
+        domain = self._domain(email)
+        if verdict["status"] == "accept_all" or verdict.get("accept_all"):
+            # Catch-all configuration changes; re-probe the domain after catch_all_ttl
+            self.cache.set(PersistentCache.make_key("domain", domain), {"status": "accept_all"},
+                           ttl_seconds=self.catch_all_ttl)
+        elif verdict.get("mx_records") is False or verdict["status"] == "disposable":
+            status = "disposable" if verdict["status"] == "disposable" else "invalid"
+            self.cache.set(PersistentCache.make_key("domain", domain), {"status": status},
+                           ttl_seconds=self.domain_ttl)
+
+    def _cached(self, email: str):
+        """Cached verdict for an address, else for its domain (None if neither is known)."""
+        verdict = self.cache.get(PersistentCache.make_key("address", email))
+        if verdict is not None:
+            return dict(verdict, source="cache")
+        verdict = self.cache.get(PersistentCache.make_key("domain", self._domain(email)))
+        if verdict is not None:
+            return dict(verdict, source="domain")
+        return None
+
+    def _verify_all(self, emails: list, pool: ThreadPoolExecutor) -> dict:
+        """Verdicts for distinct addresses: cache and domain hits first, then probes, then the rest."""
+        verdicts = {}
+        pending = {}
+        for email in emails:
+            if not EMAIL_PATTERN.match(email):
+                verdicts[email] = {"status": "invalid", "source": "syntax"}
+                continue
+            cached = self._cached(email)
+            if cached is not None:
+                verdicts[email] = cached
+            else:
+                pending.setdefault(self._domain(email), []).append(email)
+
+        # One probe per unknown domain; a domain-level verdict settles its other addresses
+        probes = [addresses[0] for addresses in pending.values()]
+        for email, verdict in zip(probes, pool.map(self._lookup, probes)):
+            self._remember(email, verdict)
+            verdicts[email] = dict(verdict, source="api")
+
+        rest = []
+        for domain, addresses in pending.items():
+            for email in addresses[1:]:
+                domain_verdict = self.cache.get(PersistentCache.make_key("domain", domain))
+                if domain_verdict is not None:
+                    verdicts[email] = dict(domain_verdict, source="domain")
+                else:
+                    rest.append(email)
+        for email, verdict in zip(rest, pool.map(self._lookup, rest)):
+            self._remember(email, verdict)
+            verdicts[email] = dict(verdict, source="api")
+        return verdicts
+
+    def run(self, messages: list = None) -> dict:
+        """
+        Verify the recipient of every message.
+
+        Args:
+            messages: List of message dicts from OutreachContentAgent (uses "email")
+
+        Returns:
+            dict: {
+                "messages": [ ... deliverable messages ... ],
+                "rejected": [ { ... message, "verification": {...} } ],
+                "unknown": [ { ... message, "verification": {...} } ],  # held back, inconclusive
+                "summary": { "checked", "verified", "rejected", "unknown", "api_lookups", "cache_hits",
+                             "domain_hits" }
+            }
+        """
+        messages = list(messages or [])
+        if not self.api_key:
+            summary = {"checked": 0, "verified": 0, "rejected": 0, "unknown": 0, "unverified": len(messages)}
+            if self.missing_key_policy == "hold":
+                logger.warning("No Hunter.io API key - holding back %d unverified messages", len(messages))
+                held = [dict(message, verification={"status": "unverified"}) for message in messages]
+                return {"messages": [], "rejected": [], "unknown": held, "summary": summary}
+            logger.warning("No Hunter.io API key - passing %d messages through unverified", len(messages))
+            return {"messages": messages, "rejected": [], "unknown": [], "summary": summary}
+
+        emails = sorted({(message.get("email") or "").strip().lower() for message in messages})
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            verdicts = self._verify_all(emails, pool)
+
+        verified, rejected, unknown = [], [], []
+        inconclusive = 0
+        for message in messages:
+            verdict = verdicts[(message.get("email") or "").strip().lower()]
+            if verdict["status"] in self.allowed_statuses:
+                verified.append(message)
+            elif verdict["status"] in UNKNOWN_STATUSES:
+                inconclusive += 1
+                (verified if self.send_unknown else unknown).append(dict(message, verification=verdict))
+            else:
+                rejected.append(dict(message, verification=verdict))
+
+        sources = [verdict.get("source") for verdict in verdicts.values()]
+        summary = {
+            "checked": len(emails),
+            "verified": len(verified),
+            "rejected": len(rejected),
+            "unknown": inconclusive,
+            "api_lookups": sources.count("api"),
+            "cache_hits": sources.count("cache"),
+            "domain_hits": sources.count("domain")
+        }
+        logger.info("Verified %d addresses: %d messages kept, %d rejected, %d held as unknown", summary["checked"],
+                    len(verified), len(rejected), len(unknown), extra={"summary": summary})
+        return {"messages": verified, "rejected": rejected, "unknown": unknown, "summary": summary}
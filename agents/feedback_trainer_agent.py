@@ -1,51 +1,62 @@
 import os
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.engagement_analytics import EngagementAnalytics
+from utils.rate_limiter import get_rate_limiter
+from src.logger import get_logger
+
+logger = get_logger(__name__)
 
 class FeedbackTrainerAgent:
     """
     Agent to analyze responses and log feedback to Google Sheets.
-    Input: responses from ResponseTrackerAgent
+    Input: responses from ResponseTrackerAgent, optionally ranked leads for segmentation
     Output: recommendations (array of suggested improvements)
     """
 
-    def __init__(self, sheet_id=None):
+    def __init__(self, sheet_id=None, **kwargs):
         """
         Initialize FeedbackTrainerAgent.
-        Accepts sheet_id if provided.
+        Accepts sheet_id if provided, plus optional segment analytics settings
+        (confidence, min_segment_size, max_segment_recommendations).
         """
         self.sheet_id = sheet_id or os.getenv("SHEET_ID")
         self.creds_path = "credentials/service_account.json"
         self.sheet = None
+        self.analytics = EngagementAnalytics(
+            confidence=kwargs.get("confidence", 0.95),
+            min_segment_size=kwargs.get("min_segment_size", 20),
+            max_recommendations=kwargs.get("max_segment_recommendations", 10)
+        )
         self._init_sheets()
 
     def _init_sheets(self):
         """Initialize Google Sheets connection."""
         try:
-            print(f"[DEBUG] SHEET_ID: {self.sheet_id}")
-            print(f"[DEBUG] Creds path: {self.creds_path}")
-            print(f"[DEBUG] Creds file exists: {os.path.exists(self.creds_path)}")
+            logger.debug("Sheet %s, credentials %s (exists: %s)", self.sheet_id, self.creds_path,
+                         os.path.exists(self.creds_path))
             
             scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
             creds = ServiceAccountCredentials.from_json_keyfile_name(self.creds_path, scope)
             client = gspread.authorize(creds)
-            self.sheet = client.open_by_key(self.sheet_id).sheet1
-            print(f"[FeedbackTrainer] Connected to Google Sheet: {self.sheet_id}")
+            self.sheet = get_rate_limiter().call("sheets", client.open_by_key, self.sheet_id).sheet1
+            logger.info("Connected to Google Sheet %s", self.sheet_id)
         except Exception as e:
-            print(f"[FeedbackTrainer] Warning: Could not connect to Google Sheets: {e}")
+            logger.warning("Could not connect to Google Sheets: %s", e)
             self.sheet = None
 
     def _log_to_sheets(self, data):
         """Log workflow results to Google Sheets."""
         if not self.sheet:
-            print("[FeedbackTrainer] No sheet connection available — skipping write.")
+            logger.info("No sheet connection available — skipping write")
             return
 
+        limiter = get_rate_limiter()
         try:
             # Prepare header row if sheet is empty
-            if len(self.sheet.get_all_values()) == 0:
+            if len(limiter.call("sheets", self.sheet.get_all_values)) == 0:
                 headers = ["Timestamp", "Campaign ID", "Total Sent", "Open Rate", "Click Rate", "Reply Rate", "Recommendations"]
-                self.sheet.insert_row(headers, 1)
+                limiter.call("sheets", self.sheet.insert_row, headers, 1)
 
             # Format recommendations as comma-separated string
             recommendations = ", ".join(data.get("recommendations", []))
@@ -60,22 +71,41 @@ class FeedbackTrainerAgent:
                 f"{data.get('reply_rate', 0):.1f}%",
                 recommendations
             ]
-            self.sheet.append_row(row)
-            print(f"[FeedbackTrainer] Logged results to Google Sheet")
+            limiter.call("sheets", self.sheet.append_row, row)
+            logger.info("Logged results to Google Sheet", extra={"campaign_id": data.get("campaign_id")})
+        except Exception as e:
+            logger.error("Error writing to sheet: %s", e)
+
+    def _store_repliers(self, responses: list, leads: list, lookalike: dict):
+        """Add leads that replied to the ChromaStore collection ScoringAgent's lookalike prior queries."""
+        try:
+            repliers = self.analytics.replied_leads(responses, leads)
+            if repliers:
+                from utils.chroma_store import get_chroma_store
+                store = get_chroma_store(lookalike.get("persist_dir", "./chroma_data"))
+                store.store_repliers(repliers, lookalike.get("collection", "repliers"))
         except Exception as e:
-            print(f"[FeedbackTrainer] Error writing to sheet: {e}")
+            logger.warning("Could not store repliers: %s", e)
 
-    def run(self, responses: list = None) -> dict:
+    def run(self, responses: list = None, leads: list = None, lookalike: dict = None) -> dict:
         """
         Analyze email responses and generate recommendations.
         
         Args:
             responses: List of response dicts from ResponseTrackerAgent
+            leads: Optional ranked / enriched leads. When given, responses are joined
+                on email (or contact name) and broken down per seniority, role,
+                technology, company size and score bucket.
+            lookalike: config.lookalike; when enabled, leads that replied are
+                stored as past repliers for ScoringAgent's lookalike prior.
 
         Returns:
             dict with "recommendations" and "analytics" keys
         """
         
+        if responses and leads and lookalike and lookalike.get("enabled"):
+            self._store_repliers(responses, leads, lookalike)
+
         if responses is None or len(responses) == 0:
             responses = [
                 {
@@ -94,15 +124,17 @@ class FeedbackTrainerAgent:
                 }
             ]
 
-        # Analyze response metrics
-        total_responses = len(responses)
-        opened_count = sum(1 for r in responses if r.get("opened", False))
-        clicked_count = sum(1 for r in responses if r.get("clicked", False))
-        replied_count = sum(1 for r in responses if r.get("replied", False))
+        # Analyze response metrics (overall + per segment in one vectorized pass)
+        report = self.analytics.analyze(responses, leads)
+        overall = report["overall"]
+        total_responses = overall["total_sent"]
+        opened_count = overall["opened_count"]
+        clicked_count = overall["clicked_count"]
+        replied_count = overall["replied_count"]
 
-        open_rate = (opened_count / total_responses * 100) if total_responses > 0 else 0
-        click_rate = (clicked_count / total_responses * 100) if total_responses > 0 else 0
-        reply_rate = (replied_count / total_responses * 100) if total_responses > 0 else 0
+        open_rate = overall["open_rate"]
+        click_rate = overall["click_rate"]
+        reply_rate = overall["reply_rate"]
 
         recommendations = []
 
@@ -132,6 +164,9 @@ class FeedbackTrainerAgent:
                 "Great reply rate! Consider increasing ICP targeting scope to find more similar prospects."
             )
 
+        # Segment-specific recommendations
+        recommendations.extend(report["recommendations"])
+
         if not recommendations:
             recommendations.append(
                 "Campaign metrics look good. Continue with current strategy and A/B test subject variations."
@@ -160,6 +195,7 @@ class FeedbackTrainerAgent:
                 "reply_rate": round(reply_rate, 2),
                 "opened_count": opened_count,
                 "clicked_count": clicked_count,
-                "replied_count": replied_count
+                "replied_count": replied_count,
+                "segments": report["segments"]
             }
-        }
\ No newline at end of file
+        }
@@ -1,32 +1,77 @@
 import os
+import json
+import re
+import time
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.cache_store import PersistentCache
+from utils.http_client import get_transport
+from utils.prompting import (BATCH_SYSTEM_PROMPT, COMPANY_PLACEHOLDER, NAME_PLACEHOLDER, SYSTEM_PROMPT,
+                             build_lead_prompt, build_template_prompt, cluster_key, estimate_tokens, lead_fields)
+from src.logger import get_logger
+
+logger = get_logger(__name__)
 
 class OutreachContentAgent:
     """
     Agent to generate personalized outreach messages using OpenRouter DeepSeek API.
     Input: ranked_leads from ScoringAgent
     Output: messages (lead + email_body)
+
+    Generation modes:
+        per_lead: one LLM call per lead (default)
+        template: leads are clustered by role + technologies, one parameterized
+                  template is generated per cluster and name/company are filled locally
+        batch: several leads are packed into one chat completion returning JSON,
+               with the batch size tuned to the model's token limits
     """
 
-    def __init__(self, api_key):
+    # Bulk mode (src/bulk_runner.py): list consumed by run() and list it returns
+    batch_input = "ranked_leads"
+    batch_output = "messages"
+
+    def __init__(self, api_key=None, **kwargs):
         """
         Initialize OutreachContentAgent.
-        Accepts api_key if provided.
+        Accepts api_key if provided, plus optional generation_mode,
+        template_reuse_cap (max leads served by one generated template) and
+        response cache settings (use_cache, cache_path, cache_ttl, cache_max_entries)
+        and batch settings (batch_size, batch_max_output_tokens, context_window,
+        tokens_per_email, batch_retries), plus stream (SSE token streaming) and
+        max_workers (concurrent per-lead generations).
         """
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         self.endpoint ="https://openrouter.ai/api/v1/chat/completions"
         self.model = "deepseek/deepseek-chat-v3.1:free"
+        self.generation_mode = kwargs.get("generation_mode", "per_lead")
+        self.template_reuse_cap = max(1, int(kwargs.get("template_reuse_cap", 25)))
+        self.max_tokens = 500
+        self.temperature = 0.7
 
-    def _generate_email(self, prompt: str) -> str:
-        """
-        Call OpenRouter DeepSeek API to generate email body.
-        
-        Args:
-            prompt: Email generation prompt
-            
-        Returns:
-            Generated email body or error message
-        """
+        # Batched generation limits
+        self.batch_size = max(1, int(kwargs.get("batch_size", 10)))
+        self.batch_max_output_tokens = int(kwargs.get("batch_max_output_tokens", 4000))
+        self.context_window = int(kwargs.get("context_window", 32000))
+        self.tokens_per_email = int(kwargs.get("tokens_per_email", 220))
+        self.batch_retries = int(kwargs.get("batch_retries", 1))
+
+        # Streaming: SSE completions, per-request latency stats
+        self.stream = bool(kwargs.get("stream", False))
+        self.max_workers = max(1, int(kwargs.get("max_workers", 1)))
+        self.stream_stats = []
+
+        # Prompt-level response cache so reruns don't regenerate identical emails
+        self.cache = None
+        if kwargs.get("use_cache", True):
+            self.cache = PersistentCache(
+                kwargs.get("cache_path", "cache/llm_responses.sqlite3"),
+                ttl_seconds=kwargs.get("cache_ttl", 7 * 24 * 3600),
+                max_entries=kwargs.get("cache_max_entries", 10000)
+            )
+
+    def _build_request(self, prompt: str, system_prompt: str, max_tokens: int, stream: bool = False) -> tuple:
+        """Build (headers, payload) for an OpenRouter chat completion."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -39,35 +84,330 @@ class OutreachContentAgent:
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are an SDR writing concise, personalized outreach emails. Keep emails under 150 words. Be friendly, professional, and specific."
+                    "content": system_prompt
                 },
                 {
                     "role": "user",
                     "content": prompt
                 }
             ],
-            "max_tokens": 500,
-            "temperature": 0.7
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": self.temperature
         }
+        if stream:
+            payload["stream"] = True
+        return headers, payload
 
-        try:
-            response = requests.post(self.endpoint, json=payload, headers=headers, timeout=20)
-            print(f"[DEBUG] Status code: {response.status_code}")
-            print(f"[DEBUG] Response text: {response.text}")
-            print(f"[DEBUG] Response headers: {response.headers}")
-            
+    def _call_llm(self, prompt: str, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = None,
+                  timeout: float = None) -> str:
+        """
+        Call OpenRouter DeepSeek API and return the completion text.
+        Uses SSE streaming when enabled.
+        Raises requests / parsing exceptions on failure.
+        """
+        if self.stream:
+            return self._call_llm_stream(prompt, system_prompt, max_tokens, timeout)
+
+        headers, payload = self._build_request(prompt, system_prompt, max_tokens)
+        response = get_transport().post(self.endpoint, json=payload, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        return data["choices"][0]["message"]["content"].strip()
+
+    def _call_llm_stream(self, prompt: str, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = None,
+                         timeout: float = None) -> str:
+        """
+        Stream a completion over SSE, recording time-to-first-token and tokens/sec
+        in self.stream_stats. Token counts come from the final usage event; when
+        the provider sends none they are estimated from the text (estimate_tokens)
+        and flagged "tokens_estimated". Returns the full completion text.
+        """
+        headers, payload = self._build_request(prompt, system_prompt, max_tokens, stream=True)
+        started = time.perf_counter()
+        first_token_at = None
+        chunks = []
+        usage_tokens = None
+
+        with get_transport().post(self.endpoint, json=payload, headers=headers, timeout=timeout,
+                                  stream=True) as response:
             response.raise_for_status()
-            data = response.json()
-            email_body = data["choices"][0]["message"]["content"].strip()
-            return email_body
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                # Skip keep-alive blanks and SSE comments (e.g. ": OPENROUTER PROCESSING")
+                if not line or line.startswith(":") or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if "error" in event:
+                    raise ValueError(f"Stream error: {event['error']}")
+                if event.get("usage"):
+                    usage_tokens = event["usage"].get("completion_tokens")
+                for choice in event.get("choices", []):
+                    content = choice.get("delta", {}).get("content")
+                    if content:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        chunks.append(content)
+
+        finished = time.perf_counter()
+        text = "".join(chunks).strip()
+        tokens = usage_tokens or estimate_tokens(text)
+        generation_time = finished - (first_token_at or finished)
+        self.stream_stats.append({
+            "time_to_first_token": round(first_token_at - started, 3) if first_token_at else None,
+            "total_time": round(finished - started, 3),
+            "tokens": tokens,
+            "tokens_estimated": usage_tokens is None,
+            "tokens_per_sec": round(tokens / generation_time, 1) if generation_time > 0 else None
+        })
+
+        if not text:
+            raise ValueError("Empty streamed completion")
+        return text
+
+    def _cache_key(self, prompt: str, variant: int = 0, system_prompt: str = SYSTEM_PROMPT) -> str:
+        """
+        Cache key over (model, system prompt, whitespace-normalized prompt, temperature).
+        A non-zero variant gives the same prompt its own entry (see _generate_from_templates).
+        """
+        normalized = " ".join(prompt.split())
+        parts = (self.model, system_prompt, normalized, self.temperature)
+        return PersistentCache.make_key(*parts, variant) if variant else PersistentCache.make_key(*parts)
+
+    def _generate_email(self, prompt: str, fresh: bool = False, variant: int = 0) -> str:
+        """
+        Generate an email body, serving repeated prompts from the response cache.
+        
+        Args:
+            prompt: Email generation prompt
+            fresh: Bypass the cache lookup to get a new variant (result is still cached)
+            variant: Cache slot for repeated generations of the same prompt
+            
+        Returns:
+            Generated email body or error message
+        """
+        key = self._cache_key(prompt, variant) if self.cache is not None else None
+        if key is not None and not fresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            email_body = self._call_llm(prompt)
         except requests.exceptions.Timeout:
             return "[Error generating email: Request timeout]"
         except requests.exceptions.RequestException as e:
             return f"[Error generating email: {str(e)}]"
-        except (KeyError, ValueError) as e:
+        except (KeyError, IndexError, ValueError, AttributeError) as e:
             return f"[Error parsing response: {str(e)}]"
 
-    def run(self, ranked_leads: list = None, persona: str = "SDR", tone: str = "friendly") -> dict:
+        # Only real emails are cached; error markers must never be replayed as results
+        if key is not None and email_body and not self._is_error(email_body):
+            self.cache.set(key, email_body)
+        return email_body
+
+    @staticmethod
+    def checkpointable(output: dict) -> bool:
+        """Only checkpoint generations without error markers, so a resume retries the failures."""
+        return not any(OutreachContentAgent._is_error(m.get("email_body", "")) for m in output.get("messages", []))
+
+    @staticmethod
+    def _is_error(email_body: str) -> bool:
+        """True if _generate_email returned an error marker instead of an email."""
+        return email_body.startswith("[Error")
+
+    @staticmethod
+    def _build_message(lead: dict, email_body: str) -> dict:
+        """Wrap a generated email body into the message schema."""
+        contact_name, company_name, _, _ = lead_fields(lead)
+        # Address guessed from name + company only when the lead has none (verified before sending)
+        email = lead.get("email") or f"{contact_name.lower().replace(' ', '.')}@{company_name.lower().replace(' ', '')}.com"
+        return {
+            "lead": contact_name,
+            "company": company_name,
+            "email": email,
+            "subject": f"Quick idea for {company_name}",
+            "email_body": email_body,
+            "score": lead.get("score", 0)
+        }
+
+    def _generate_per_lead(self, lead: dict, persona: str, tone: str, fresh: bool = False) -> dict:
+        """Generate one email with a dedicated LLM call."""
+        prompt = build_lead_prompt(lead, persona, tone)
+        return self._build_message(lead, self._generate_email(prompt, fresh=fresh))
+
+    def _cluster_leads(self, ranked_leads: list) -> list:
+        """
+        Group leads by their prompt-relevant attributes (role + technologies),
+        preserving rank order, and split clusters at template_reuse_cap.
+        Returns [(chunk index within its cluster, leads)].
+        """
+        clusters = OrderedDict()
+        for lead in ranked_leads:
+            clusters.setdefault(cluster_key(lead), []).append(lead)
+
+        chunks = []
+        for members in clusters.values():
+            for i in range(0, len(members), self.template_reuse_cap):
+                chunks.append((i // self.template_reuse_cap, members[i:i + self.template_reuse_cap]))
+        return chunks
+
+    def _generate_template(self, lead: dict, persona: str, tone: str, fresh: bool = False, variant: int = 0) -> str:
+        """
+        Generate one parameterized email for a cluster.
+        Every chunk of a cluster builds the same prompt, so each chunk (variant)
+        gets its own cache entry; otherwise the cache would hand all of them the
+        same template and defeat template_reuse_cap.
+        Returns the template, or None if the LLM failed or dropped the placeholders.
+        """
+        template = self._generate_email(build_template_prompt(lead, persona, tone), fresh=fresh, variant=variant)
+        if self._is_error(template) or NAME_PLACEHOLDER not in template:
+            return None
+        return template
+
+    def _generate_from_templates(self, ranked_leads: list, persona: str, tone: str, fresh: bool = False) -> list:
+        """Generate one template per cluster chunk and fill name/company locally."""
+        messages_by_lead = {}
+        for variant, chunk in self._cluster_leads(ranked_leads):
+            template = self._generate_template(chunk[0], persona, tone, fresh, variant)
+            for lead in chunk:
+                if template is None:
+                    # Fall back to a dedicated call so the lead still gets an email
+                    messages_by_lead[id(lead)] = self._generate_per_lead(lead, persona, tone, fresh)
+                    continue
+                contact_name, company_name, _, _ = lead_fields(lead)
+                email_body = template.replace(NAME_PLACEHOLDER, contact_name).replace(COMPANY_PLACEHOLDER, company_name)
+                messages_by_lead[id(lead)] = self._build_message(lead, email_body)
+
+        # Keep the ranked order of the input
+        return [messages_by_lead[id(lead)] for lead in ranked_leads]
+
+    def _tune_batch_size(self, prompts: list) -> int:
+        """
+        Pick how many leads fit in one request: bounded by batch_size, by the
+        output budget (tokens_per_email each) and by the context window.
+        """
+        if not prompts:
+            return 1
+        avg_prompt = sum(estimate_tokens(p) for p in prompts) / len(prompts) + 10
+        system_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT)
+        by_output = self.batch_max_output_tokens // self.tokens_per_email
+        by_context = (self.context_window - system_tokens - self.batch_max_output_tokens) // avg_prompt
+        return int(max(1, min(self.batch_size, by_output, by_context)))
+
+    @staticmethod
+    def _parse_batch(text: str, expected_ids: set) -> dict:
+        """
+        Parse a batch completion into {lead_id: email_body}.
+        Entries with unknown ids or empty bodies are dropped; a reply that is not
+        valid JSON yields an empty dict.
+        """
+        cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+        start, end = cleaned.find("{"), cleaned.rfind("}")
+        if start == -1 or end == -1:
+            return {}
+        try:
+            data = json.loads(cleaned[start:end + 1])
+        except ValueError:
+            return {}
+
+        items = data.get("emails", []) if isinstance(data, dict) else []
+        bodies = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            lead_id = str(item.get("id", ""))
+            body = item.get("body")
+            if lead_id in expected_ids and isinstance(body, str) and body.strip():
+                bodies[lead_id] = body.strip()
+        return bodies
+
+    def _request_batch(self, prompts: dict) -> dict:
+        """Send one batch request for {lead_id: prompt}; returns the parsed bodies."""
+        user_prompt = "Write one email per lead below.\n\n" + "\n\n".join(
+            f"id: {lead_id}\n{prompt}" for lead_id, prompt in prompts.items()
+        )
+        max_tokens = min(self.batch_max_output_tokens, self.tokens_per_email * len(prompts) + 100)
+        try:
+            text = self._call_llm(user_prompt, system_prompt=BATCH_SYSTEM_PROMPT, max_tokens=max_tokens,
+                                  timeout=get_transport().read_timeout + 5 * len(prompts))
+        except (requests.exceptions.RequestException, KeyError, IndexError, ValueError, AttributeError) as e:
+            logger.warning("Batch request failed for %d leads: %s", len(prompts), e)
+            return {}
+        return self._parse_batch(text, set(prompts))
+
+    def _generate_batched(self, ranked_leads: list, persona: str, tone: str, fresh: bool = False) -> list:
+        """
+        Generate emails N leads per request. Leads whose entry is missing or
+        malformed are re-requested on their own batch; leads still failing after
+        batch_retries fall back to single-lead calls.
+        """
+        prompts = {}
+        for idx, lead in enumerate(ranked_leads):
+            prompts[f"L{idx}"] = build_lead_prompt(lead, persona, tone)
+
+        bodies = {}
+        pending = OrderedDict()
+        for lead_id, prompt in prompts.items():
+            # Batch bodies come from BATCH_SYSTEM_PROMPT, so they are cached under their own key
+            cached = (self.cache.get(self._cache_key(prompt, system_prompt=BATCH_SYSTEM_PROMPT))
+                      if self.cache is not None and not fresh else None)
+            if cached is not None:
+                bodies[lead_id] = cached
+            else:
+                pending[lead_id] = prompt
+
+        size = self._tune_batch_size(list(pending.values()))
+        for _ in range(1 + self.batch_retries):
+            if not pending:
+                break
+            ids = list(pending)
+            for i in range(0, len(ids), size):
+                batch = {lead_id: pending[lead_id] for lead_id in ids[i:i + size]}
+                for lead_id, body in self._request_batch(batch).items():
+                    bodies[lead_id] = body
+                    if self.cache is not None:
+                        self.cache.set(self._cache_key(pending[lead_id], system_prompt=BATCH_SYSTEM_PROMPT), body)
+                    del pending[lead_id]
+
+        for lead_id, prompt in pending.items():
+            bodies[lead_id] = self._generate_email(prompt, fresh=fresh)
+
+        return [self._build_message(lead, bodies[f"L{idx}"]) for idx, lead in enumerate(ranked_leads)]
+
+    def iter_messages(self, ranked_leads: list, persona: str = "SDR", tone: str = "friendly",
+                      fresh: bool = False):
+        """
+        Yield per-lead messages as each email finishes, generating up to
+        max_workers emails concurrently. Messages arrive in completion order and
+        carry their "rank" (input position). run() collects and re-sorts them, so
+        the workflow runners still hand the next step a complete list; in bulk
+        mode, chunks reach verification and sending as each chunk finishes.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._generate_per_lead, lead, persona, tone, fresh): rank
+                for rank, lead in enumerate(ranked_leads)
+            }
+            for future in as_completed(futures):
+                message = future.result()
+                message["rank"] = futures[future]
+                yield message
+
+    def _stream_summary(self) -> dict:
+        """Aggregate time-to-first-token and throughput over recorded streamed requests."""
+        ttfts = sorted(s["time_to_first_token"] for s in self.stream_stats if s["time_to_first_token"] is not None)
+        rates = [s["tokens_per_sec"] for s in self.stream_stats if s["tokens_per_sec"]]
+        return {
+            "requests": len(self.stream_stats),
+            "median_time_to_first_token": ttfts[len(ttfts) // 2] if ttfts else None,
+            "max_time_to_first_token": ttfts[-1] if ttfts else None,
+            "avg_tokens_per_sec": round(sum(rates) / len(rates), 1) if rates else None
+        }
+
+    def run(self, ranked_leads: list = None, persona: str = "SDR", tone: str = "friendly",
+            generation_mode: str = None, fresh: bool = False) -> dict:
         """
         Generate personalized outreach messages for leads using DeepSeek.
         
@@ -75,12 +415,15 @@ class OutreachContentAgent:
             ranked_leads: List of leads with scores from ScoringAgent
             persona: Role persona for signature (e.g., "SDR", "Sales Manager")
             tone: Email tone (e.g., "friendly", "formal", "casual")
+            generation_mode: "per_lead", "template" or "batch"; overrides the configured mode
+            fresh: Skip cached responses and generate new variants
 
         Returns:
             dict with "messages" key containing list of personalized email dicts
         """
         
-        if ranked_leads is None or len(ranked_leads) == 0:
+        # An empty list means the budget gate selected nothing; only a missing input gets demo leads
+        if ranked_leads is None:
             ranked_leads = [
                 {
                     "company": "ExampleCorp",
@@ -98,34 +441,25 @@ class OutreachContentAgent:
                 }
             ]
 
-        messages = []
+        mode = generation_mode or self.generation_mode
+        self.stream_stats = []
 
-        for lead in ranked_leads:
-            contact_name = lead.get("contact", lead.get("contact_name", "there"))
-            company_name = lead.get("company", "your company")
-            role = lead.get("role", "decision maker")
-            technologies = ", ".join(lead.get("technologies", []))
-
-            # Build personalized prompt
-            prompt = (
-                f"Write a short {tone} outreach email to {contact_name} at {company_name}. "
-                f"They are a {role} and their company uses: {technologies}. "
-                f"Mention one specific way we can help their team. "
-                f"Sign off professionally as {persona}. "
-                f"Keep it under 120 words. No subject line needed."
-            )
-
-            email_body = self._generate_email(prompt)
-
-            message = {
-                "lead": contact_name,
-                "company": company_name,
-                "email": f"{contact_name.lower().replace(' ', '.')}@{company_name.lower().replace(' ', '')}.com",
-                "subject": f"Quick idea for {company_name}",
-                "email_body": email_body,
-                "score": lead.get("score", 0)
-            }
+        if mode in ("template", "batch"):
+            # These modes walk the leads more than once; materialize lazy inputs
+            ranked_leads = list(ranked_leads)
 
-            messages.append(message)
+        if mode == "template":
+            messages = self._generate_from_templates(ranked_leads, persona, tone, fresh)
+        elif mode == "batch":
+            messages = self._generate_batched(ranked_leads, persona, tone, fresh)
+        elif self.stream or self.max_workers > 1:
+            messages = sorted(self.iter_messages(ranked_leads, persona, tone, fresh), key=lambda m: m["rank"])
+            for message in messages:
+                del message["rank"]
+        else:
+            messages = [self._generate_per_lead(lead, persona, tone, fresh) for lead in ranked_leads]
 
-        return {"messages": messages}
\ No newline at end of file
+        result = {"messages": messages}
+        if self.stream:
+            result["stream_stats"] = self._stream_summary()
+        return result
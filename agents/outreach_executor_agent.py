@@ -1,17 +1,48 @@
 import os
-import requests
+from utils.cache_store import PersistentCache
+from utils.http_client import get_transport
 from datetime import datetime
 
 class OutreachExecutorAgent:
-    def __init__(self, api_key, from_email=None):
+    def __init__(self, api_key, from_email=None, ledger_path="cache/sent_ledger.sqlite3",
+                 ledger_ttl_seconds=30 * 24 * 3600):
         self.api_key = api_key
         self.from_email = from_email or os.getenv("FROM_EMAIL", "noreply@autoreach.io")
         self.from_name = "AutoReach"
         self.endpoint = "https://api.brevo.com/v3/smtp/email"
+        # Ledger of delivered messages so resuming a send batch never delivers the same email twice.
+        # Entries are scoped to the batch (or an explicit campaign_id) and expire, so a later
+        # campaign can contact the same lead again.
+        self.sent_ledger = PersistentCache(ledger_path, ttl_seconds=ledger_ttl_seconds, max_entries=1000000)
 
-    def run(self, messages):
+    @staticmethod
+    def checkpointable(output: dict) -> bool:
+        """Only checkpoint a send step where every message went out."""
+        return all(s.get("status") in ("sent", "skipped_duplicate") for s in output.get("sent_status", []))
+
+    @staticmethod
+    def _batch_key(messages) -> str:
+        """Identity of a send batch: a resumed run resends exactly the same messages."""
+        return PersistentCache.make_key(*(
+            (msg.get("email"), msg.get("subject"), msg.get("email_body")) for msg in messages
+        ))
+
+    def run(self, messages, campaign_id=None):
+        """
+        Send every message through Brevo.
+
+        Args:
+            messages: Messages with lead, email, subject and email_body
+            campaign_id: Campaign to tag and dedupe under (default: one per send batch,
+                reused when the same batch is resumed)
+        """
         sent_status = []
-        campaign_id = f"autoreach_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        scope = campaign_id or self._batch_key(messages)
+        if campaign_id is None:
+            campaign_id = self.sent_ledger.get(scope)
+            if campaign_id is None:
+                campaign_id = f"autoreach_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                self.sent_ledger.set(scope, campaign_id)
         
         headers = {
             "accept": "application/json",
@@ -23,7 +54,21 @@ class OutreachExecutorAgent:
             error = None
             status = "sent"
             message_id = None
-            
+
+            ledger_key = PersistentCache.make_key(scope, msg.get("email"), msg.get("subject"), msg.get("email_body"))
+            delivered = self.sent_ledger.get(ledger_key)
+            if delivered is not None:
+                sent_status.append({
+                    "lead": msg.get("lead"),
+                    "email": msg.get("email"),
+                    "subject": msg.get("subject"),
+                    "campaign_id": delivered["campaign_id"],
+                    "status": "skipped_duplicate",
+                    "message_id": delivered["message_id"] or f"msg_{idx}",
+                    "error": None
+                })
+                continue
+
             payload = {
                 "sender": {
                     "name": self.from_name,
@@ -41,10 +86,11 @@ class OutreachExecutorAgent:
             }
 
             try:
-                response = requests.post(self.endpoint, json=payload, headers=headers, timeout=10)
+                response = get_transport().post(self.endpoint, json=payload, headers=headers)
                 response.raise_for_status()
                 data = response.json()
                 message_id = data.get("messageId")
+                self.sent_ledger.set(ledger_key, {"campaign_id": campaign_id, "message_id": message_id})
             except Exception as e:
                 status = "failed"
                 error = str(e)
@@ -1,44 +1,75 @@
 # agents/prospect_search_agent.py
 
 import os
+import json
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.cache_store import PersistentCache
+from utils.http_client import get_transport
+from utils.metrics import get_metrics
+from src.logger import get_logger
+
+logger = get_logger(__name__)
 
 class ProspectSearchAgent:
     """
     Agent to fetch company + prospect data matching ICP using Apollo API.
     Tools: Apollo API (contacts/search endpoint)
     Output: {"leads": [ ... ]}
+
+    Several ICPs and signals can be searched in one run: every ICP x signal
+    combination becomes one Apollo query, the queries run concurrently and
+    their contacts are merged as they arrive, deduplicated by apollo_id or
+    email and tagged with the ICPs and signals they matched.
+
+    Search pages are cached persistently by a hash of their payload. A page
+    older than cache_ttl is refreshed with a plain re-fetch (Apollo's search
+    POST has no conditional requests / 304); in warm-start mode it is served
+    from the cache at once and refreshed in the background instead.
     """
 
+    # Background refreshes are shared by all instances
+    _refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="apollo-refresh")
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+
     def __init__(self, **kwargs):
         """
         Initialize ProspectSearchAgent.
-        Extracts apollo_api_key from kwargs.
+        Extracts apollo_api_key from kwargs, plus optional max_workers
+        (concurrent Apollo queries in a fan-out search), max_pages (pages
+        fetched per query) and search cache settings: use_cache, cache_path,
+        cache_ttl (seconds a page is fresh), stale_ttl (seconds a stale page
+        is kept for refreshes and outages), cache_max_entries and warm_start.
         """
         self.apollo_api_key = kwargs.get("api_key") or os.getenv("APOLLO_API_KEY")
         self.search_endpoint = "https://api.apollo.io/v1/contacts/search"
+        self.max_workers = max(1, int(kwargs.get("max_workers", 4)))
+        self.max_pages = max(1, int(kwargs.get("max_pages", 1)))
 
-    def _search_apollo(self, icp: dict, signals: list) -> list:
-        """
-        Search Apollo for contacts matching ICP criteria.
-        
-        Args:
-            icp: Ideal customer profile filters
-            signals: Buying signals to filter by
-            
-        Returns:
-            List of formatted leads from Apollo
-        """
-        headers = {
-            "Content-Type": "application/json",
-            "X-Api-Key": self.apollo_api_key
-        }
+        # Search response cache so re-running an ICP doesn't repeat Apollo queries
+        self.cache = None
+        self.cache_ttl = kwargs.get("cache_ttl", 6 * 3600)
+        self.stale_ttl = max(self.cache_ttl, kwargs.get("stale_ttl", 7 * 24 * 3600))
+        self.warm_start = bool(kwargs.get("warm_start", False))
+        if kwargs.get("use_cache", True):
+            # Entries outlive cache_ttl so stale pages can be served warm or when Apollo fails
+            self.cache = PersistentCache(
+                kwargs.get("cache_path", "cache/apollo_search.sqlite3"),
+                ttl_seconds=self.stale_ttl,
+                max_entries=kwargs.get("cache_max_entries", 10000)
+            )
 
-        # Build search payload for Apollo
+    @staticmethod
+    def _build_payload(icp: dict, filters: dict) -> dict:
+        """Apollo search payload for an ICP plus the filters of a signal."""
         payload = {
             "q_organization_industry": icp.get("industry", "SaaS"),
             "organization_locations": [icp.get("location", "United States")],
-            "person_titles": ["Sales Manager", "Sales Executive", "VP of Sales", "Director of Sales", "Head of Growth"],
+            "person_titles": icp.get("person_titles") or ["Sales Manager", "Sales Executive", "VP of Sales",
+                                                          "Director of Sales", "Head of Growth"],
             "per_page": 10,
             "page": 1
         }
@@ -49,49 +80,195 @@ class ProspectSearchAgent:
         if emp_min and emp_max:
             payload["q_organization_employee_count_range"] = f"{emp_min}-{emp_max}"
 
+        payload.update(filters or {})
+        return payload
+
+    @staticmethod
+    def _format_contacts(contacts: list) -> list:
+        """Apollo contacts -> lead dicts."""
+        leads = []
+        for contact in contacts:
+            lead = {
+                "company": contact.get("organization", {}).get("name", "Unknown"),
+                "contact_name": f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip(),
+                "email": contact.get("email", ""),
+                "linkedin": contact.get("linkedin_url", ""),
+                "signal": "apollo_search",
+                "industry": contact.get("organization", {}).get("industry", ""),
+                "location": contact.get("organization", {}).get("locations", [{}])[0].get("city", "") if contact.get("organization", {}).get("locations") else "",
+                "employee_count": contact.get("organization", {}).get("employee_count"),
+                "revenue": contact.get("organization", {}).get("annual_revenue"),
+                "apollo_id": contact.get("id")
+            }
+            leads.append(lead)
+        return leads
+
+    def _fetch_page(self, payload: dict, key: str = None, refresh: bool = False) -> dict:
+        """
+        Request one page from Apollo and cache it under key (refresh: it replaces a stale entry).
+
+        Returns:
+            dict: {"leads", "fetched_at"}
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "X-Api-Key": self.apollo_api_key
+        }
+        response = get_transport().post(self.search_endpoint, json=payload, headers=headers)
+        response.raise_for_status()
+        entry = {
+            "leads": self._format_contacts(response.json().get("contacts", [])),
+            "fetched_at": time.time()
+        }
+        if key is not None:
+            self.cache.set(key, entry)
+            if refresh:
+                get_metrics().inc("cache_refreshes_total", cache=self.cache.name)
+        return entry
+
+    def _refresh_in_background(self, key: str, payload: dict):
+        """Re-fetch a stale page on the shared refresh pool (once per key at a time)."""
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch_page(payload, key, refresh=True)
+            except requests.exceptions.RequestException as e:
+                logger.warning("Background refresh failed: %s", e)
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_pool.submit(refresh)
+
+    def _search_page(self, payload: dict) -> list:
+        """
+        Leads for one page: a fresh cached page is returned as is; a stale one is
+        re-fetched (or, in warm-start mode, returned at once and refreshed in
+        the background). Without a cache every call goes to Apollo.
+        """
+        if self.cache is None:
+            return self._fetch_page(payload)["leads"]
+
+        key = PersistentCache.make_key("apollo_search", self.search_endpoint, payload)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if time.time() - cached["fetched_at"] < self.cache_ttl:
+                return cached["leads"]
+            if self.warm_start:
+                self._refresh_in_background(key, payload)
+                return cached["leads"]
         try:
-            response = requests.post(self.search_endpoint, json=payload, headers=headers, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            
-            leads = []
-            contacts = data.get("contacts", [])
-            
-            for contact in contacts:
-                lead = {
-                    "company": contact.get("organization", {}).get("name", "Unknown"),
-                    "contact_name": f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip(),
-                    "email": contact.get("email", ""),
-                    "linkedin": contact.get("linkedin_url", ""),
-                    "signal": "apollo_search",
-                    "industry": contact.get("organization", {}).get("industry", ""),
-                    "location": contact.get("organization", {}).get("locations", [{}])[0].get("city", "") if contact.get("organization", {}).get("locations") else "",
-                    "employee_count": contact.get("organization", {}).get("employee_count"),
-                    "revenue": contact.get("organization", {}).get("annual_revenue"),
-                    "apollo_id": contact.get("id")
-                }
-                leads.append(lead)
-            
-            return leads
+            return self._fetch_page(payload, key, refresh=cached is not None)["leads"]
+        except requests.exceptions.RequestException as e:
+            if cached is None:
+                raise
+            logger.warning("Apollo search failed: %s - serving cached page %s", e, payload.get("page"))
+            return cached["leads"]
+
+    def _search_apollo(self, payload: dict) -> list:
+        """
+        Search Apollo for contacts matching a search payload, page by page.
+        
+        Args:
+            payload: Apollo contacts/search payload (see _build_payload)
             
+        Returns:
+            List of formatted leads from Apollo (up to max_pages pages)
+        """
+        leads = []
+        first_page = payload.get("page", 1)
+        try:
+            for page in range(first_page, first_page + self.max_pages):
+                page_leads = self._search_page(dict(payload, page=page))
+                leads.extend(page_leads)
+                if len(page_leads) < payload.get("per_page", 10):
+                    break
         except requests.exceptions.RequestException as e:
-            print(f"[Apollo Search Error]: {e}")
-            return []
+            logger.error("Apollo search failed: %s", e)
+        return leads
 
-    def run(self, icp: dict = None, signals: list = None) -> dict:
+    @staticmethod
+    def _plan_queries(icps: list, signals: list, signal_filters: dict) -> list:
+        """
+        One query per distinct payload: [(payload, [(icp_name, signal), ...])].
+        Combinations that produce the same payload (signals without filters)
+        share a query.
+        """
+        queries = {}
+        for index, icp in enumerate(icps):
+            name = icp.get("name") or f"icp_{index + 1}"
+            for signal in (icp.get("signals") or signals or [None]):
+                payload = ProspectSearchAgent._build_payload(icp, signal_filters.get(signal))
+                key = json.dumps(payload, sort_keys=True, default=str)
+                queries.setdefault(key, (payload, []))[1].append((name, signal))
+        return list(queries.values())
+
+    @staticmethod
+    def _lead_key(lead: dict):
+        if lead.get("apollo_id"):
+            return ("id", lead["apollo_id"])
+        if lead.get("email"):
+            return ("email", lead["email"].strip().lower())
+        return None
+
+    def _fan_out(self, icps: list, signals: list, signal_filters: dict) -> list:
+        """Run the ICP x signal queries concurrently; merge and tag contacts as each query returns."""
+        queries = self._plan_queries(icps, signals, signal_filters)
+        merged = {}
+        unkeyed = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as pool:
+            futures = {pool.submit(self._search_apollo, payload): matches for payload, matches in queries}
+            for future in as_completed(futures):
+                matches = futures[future]
+                for lead in future.result():
+                    key = self._lead_key(lead)
+                    if key is None:
+                        unkeyed.append(lead)
+                        merged_lead = lead
+                    else:
+                        merged_lead = merged.setdefault(key, lead)
+                    for icp_name, signal in matches:
+                        tags = merged_lead.setdefault("matched_icps", [])
+                        if icp_name not in tags:
+                            tags.append(icp_name)
+                        if signal is not None:
+                            tags = merged_lead.setdefault("matched_signals", [])
+                            if signal not in tags:
+                                tags.append(signal)
+        leads = list(merged.values()) + unkeyed
+        for lead in leads:
+            lead.setdefault("matched_signals", [])
+            if lead["matched_signals"]:
+                lead["signal"] = lead["matched_signals"][0]
+        logger.info("%d Apollo queries for %d ICPs -> %d unique leads", len(queries), len(icps), len(leads))
+        return leads
+
+    def run(self, icp: dict = None, signals: list = None, icps: list = None,
+            signal_filters: dict = None) -> dict:
         """
         Search for prospects matching ICP using Apollo API.
         
         Args:
             icp: Ideal customer profile filters
-            signals: Buying signals to match
+            signals: Buying signals to match (default: none, i.e. one unfiltered
+                search per ICP)
+            icps: Several ICPs to search in one run (fan-out); each may carry a
+                "name" and its own "signals". Takes precedence over icp.
+            signal_filters: Apollo filters per signal, required for every requested
+                signal, e.g. {"recent_funding": {<Apollo search filter>: [...]}}
             
         Returns:
-            dict: {"leads": [ {...}, {...} ]}
+            dict: {"leads": [ {..., "matched_icps": [...], "matched_signals": [...]}, ... ]}
         """
         
         # Default ICP
-        if icp is None:
+        if icps:
+            icp = None
+        elif icp is None:
             icp = {
                 "industry": "SaaS",
                 "location": "United States",
@@ -100,20 +277,30 @@ class ProspectSearchAgent:
             }
 
         if signals is None:
-            signals = ["recent_funding", "hiring_for_sales"]
+            signals = []
+
+        if signal_filters is None:
+            signal_filters = {}
+
+        requested = list(signals) + [signal for entry in (icps or []) for signal in (entry.get("signals") or [])]
+        missing = sorted({signal for signal in requested if not signal_filters.get(signal)})
+        if missing:
+            raise ValueError(f"No Apollo filters for signals {missing}. Set them in signal_filters "
+                             f"(workflow.json config.signal_filters) or remove the signals.")
 
         # Try Apollo API if key exists
         if self.apollo_api_key:
-            print(f"[ProspectSearch] Searching Apollo API with ICP: {icp}")
-            leads = self._search_apollo(icp, signals)
+            icps = icps or [icp]
+            logger.info("Searching Apollo API with %d ICPs x signals %s", len(icps), signals)
+            leads = self._fan_out(icps, signals, signal_filters)
             
             if leads:
-                print(f"[ProspectSearch] Found {len(leads)} leads from Apollo")
+                logger.info("Found %d leads from Apollo", len(leads))
                 return {"leads": leads}
             else:
-                print("[ProspectSearch] No leads found from Apollo, using fallback data")
+                logger.warning("No leads found from Apollo, using fallback data")
         else:
-            print("[ProspectSearch] No Apollo API key provided, using fallback data")
+            logger.warning("No Apollo API key provided, using fallback data")
 
         # Fallback dummy data
         fallback_leads = [
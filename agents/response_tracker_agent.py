@@ -1,5 +1,8 @@
-import requests
+from utils.http_client import get_transport
 import datetime
+from src.logger import get_logger
+
+logger = get_logger(__name__)
 
 class ResponseTrackerAgent:
     """
@@ -27,11 +30,11 @@ class ResponseTrackerAgent:
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=20)
+            response = get_transport().get(url, headers=headers)
             response.raise_for_status()
             return response.json().get("emails", [])
         except Exception as e:
-            print(f"[ResponseTrackerAgent] Error fetching campaign emails: {e}")
+            logger.error("Error fetching campaign emails for %s: %s", campaign_id, e)
             return []
 
     def _parse_response_event(self, email_event: dict) -> dict:
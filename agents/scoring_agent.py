@@ -1,10 +1,28 @@
+from src.logger import get_logger
+from utils.role_classifier import get_role_classifier
+
+logger = get_logger(__name__)
+
+
 class ScoringAgent:
     """
     Agent to score and rank leads based on ICP and engagement criteria.
     Input: enriched_leads from DataEnrichmentAgent
     Output: ranked leads with scores
+
+    With a "lookalike" weight and config.lookalike enabled, each lead also
+    scores its similarity to past repliers (ChromaStore.lookalike_scores), found
+    with one batched nearest-neighbour query per batch of leads.
+
+    total_score is the weighted mean of the criteria that were scored: weights
+    are divided by the sum of the active ones, so it stays in [0, 1] whether or
+    not the lookalike criterion is available.
     """
 
+    # Bulk mode (src/bulk_runner.py): list consumed by run() and list it returns
+    batch_input = "enriched_leads"
+    batch_output = "ranked_leads"
+
     def __init__(self, **kwargs):
         """
         Initialize ScoringAgent.
@@ -14,7 +32,8 @@ class ScoringAgent:
                 "employee_count": 0.25,
                 "revenue": 0.35,
                 "role_match": 0.25,
-                "engagement_score": 0.15
+                "engagement_score": 0.15,
+                "lookalike": 0.2
             }
         """
         self.scoring_criteria = kwargs.get("scoring_criteria", {
@@ -24,6 +43,15 @@ class ScoringAgent:
             "engagement_score": 0.15
         })
 
+    @staticmethod
+    def rank_key(lead: dict) -> tuple:
+        """
+        Sort key for ranking: highest total_score first, ties broken by email,
+        contact and company so merged shard results come out in a stable order.
+        """
+        return (-lead.get("total_score", 0), lead.get("email") or "",
+                lead.get("contact_name") or "", lead.get("company") or "")
+
     def normalize(self, value, min_val, max_val):
         """
         Normalize a numeric value to a 0–1 scale between min_val and max_val.
@@ -32,7 +60,20 @@ class ScoringAgent:
             return 0
         return max(0, min(1, (value - min_val) / (max_val - min_val)))
 
-    def run(self, enriched_leads: list = None, scoring_criteria: dict = None) -> dict:
+    @staticmethod
+    def lookalike_scores(leads: list, lookalike: dict) -> list:
+        """Similarity of each lead to past repliers (None if the store is unavailable)."""
+        try:
+            from utils.chroma_store import get_chroma_store
+            store = get_chroma_store(lookalike.get("persist_dir", "./chroma_data"))
+            return store.lookalike_scores(leads, lookalike.get("collection", "repliers"),
+                                          n_results=lookalike.get("n_results", 5))
+        except Exception as e:
+            logger.warning("Lookalike scoring unavailable, skipping it: %s", e)
+            return None
+
+    def run(self, enriched_leads: list = None, scoring_criteria: dict = None, role_classifier: dict = None,
+            lookalike: dict = None) -> dict:
         """
         Score and rank leads based on criteria like employee_count, revenue,
         role alignment, and engagement.
@@ -40,6 +81,9 @@ class ScoringAgent:
         Args:
             enriched_leads: list of enriched lead dicts from DataEnrichmentAgent
             scoring_criteria: optional dict to override weighting
+            role_classifier: keyword tables for utils.role_classifier (config.role_classifier)
+            lookalike: past-replier similarity settings (config.lookalike):
+                {"enabled": true, "persist_dir": "./chroma_data", "collection": "repliers", "n_results": 5}
 
         Returns:
             dict: { "ranked_leads": [ { ... lead info + score ... } ] }
@@ -69,41 +113,62 @@ class ScoringAgent:
                 }
             ]
 
+        # Role match from the classifier shared with DataEnrichmentAgent
+        role_matches = get_role_classifier(role_classifier).classify_many(
+            [lead.get("role") or "" for lead in enriched_leads])
+
+        # Similarity to past repliers, for the whole batch at once
+        similarities = None
+        if lookalike and lookalike.get("enabled") and criteria.get("lookalike"):
+            similarities = self.lookalike_scores(enriched_leads, lookalike)
+
+        # Weights of the criteria actually scored, normalized to sum to 1
+        weights = {key: criteria.get(key, 0) for key in ("employee_count", "revenue", "role_match", "engagement_score")}
+        if similarities is not None:
+            weights["lookalike"] = criteria["lookalike"]
+        total_weight = sum(weights.values())
+        weights = {key: weight / total_weight if total_weight else 0.0 for key, weight in weights.items()}
+
         ranked_leads = []
 
-        for lead in enriched_leads:
+        for i, (lead, (_, role_match)) in enumerate(zip(enriched_leads, role_matches)):
             lead_score = 0.0
 
             # 1️⃣ Employee Count
             emp_score = self.normalize(lead.get("employee_count", 0), 50, 1000)
-            lead_score += emp_score * criteria.get("employee_count", 0)
+            lead_score += emp_score * weights["employee_count"]
 
             # 2️⃣ Revenue
             rev_score = self.normalize(lead.get("revenue", 0), 20000000, 200000000)
-            lead_score += rev_score * criteria.get("revenue", 0)
+            lead_score += rev_score * weights["revenue"]
 
             # 3️⃣ Role Match
-            role = lead.get("role", "").lower()
-            target_roles = ["sales manager", "sales executive", "director of sales", "vp of sales"]
-            role_score = 1.0 if any(r in role for r in target_roles) else 0.5
-            lead_score += role_score * criteria.get("role_match", 0)
+            role_score = 1.0 if role_match else 0.5
+            lead_score += role_score * weights["role_match"]
 
             # 4️⃣ Engagement
-            engagement = lead.get("engagement_score", 0.5)
-            lead_score += engagement * criteria.get("engagement_score", 0)
+            engagement = self.normalize(lead.get("engagement_score", 0.5), 0, 1)
+            lead_score += engagement * weights["engagement_score"]
+
+            # 5️⃣ Lookalike (similarity to past repliers)
+            if similarities is not None:
+                similarity = self.normalize(similarities[i], 0, 1)
+                lead_score += similarity * weights["lookalike"]
 
-            # Final score + debugging trace
+            # Final score + debugging trace (each entry is its share of total_score)
             lead["score_breakdown"] = {
-                "employee_count": round(emp_score * criteria.get("employee_count", 0), 3),
-                "revenue": round(rev_score * criteria.get("revenue", 0), 3),
-                "role_match": round(role_score * criteria.get("role_match", 0), 3),
-                "engagement": round(engagement * criteria.get("engagement_score", 0), 3)
+                "employee_count": round(emp_score * weights["employee_count"], 3),
+                "revenue": round(rev_score * weights["revenue"], 3),
+                "role_match": round(role_score * weights["role_match"], 3),
+                "engagement": round(engagement * weights["engagement_score"], 3)
             }
+            if similarities is not None:
+                lead["score_breakdown"]["lookalike"] = round(similarity * weights["lookalike"], 3)
             lead["total_score"] = round(lead_score, 3)
 
             ranked_leads.append(lead)
 
         # Sort by descending total score
-        ranked_leads.sort(key=lambda x: x["total_score"], reverse=True)
+        ranked_leads.sort(key=self.rank_key)
 
         return {"ranked_leads": ranked_leads}
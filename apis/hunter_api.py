@@ -1,18 +1,19 @@
 # apis/hunter_integration.py
 import os
-import requests
+from urllib.parse import quote
+from utils.http_client import get_transport
 
 HUNTER_API_KEY = os.getenv("HUNTER_API_KEY")
 BASE_URL = "https://api.hunter.io/v2"
 
-def email_verifier(email: str) -> dict:
-    """Verify email using Hunter.io"""
-    url = f"{BASE_URL}/email-verifier?email={email}&api_key={HUNTER_API_KEY}"
-    resp = requests.get(url)
+def email_verifier(email: str, api_key: str = None) -> dict:
+    """Verify email using Hunter.io (api_key defaults to HUNTER_API_KEY)"""
+    url = f"{BASE_URL}/email-verifier?email={quote(email)}&api_key={api_key or HUNTER_API_KEY}"
+    resp = get_transport().get(url)
     return resp.json()
 
 def domain_search(domain: str, limit: int = 10) -> dict:
     """Get leads from a domain"""
     url = f"{BASE_URL}/domain-search?domain={domain}&limit={limit}&api_key={HUNTER_API_KEY}"
-    resp = requests.get(url)
+    resp = get_transport().get(url)
     return resp.json()
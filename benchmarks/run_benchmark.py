@@ -0,0 +1,201 @@
+# benchmarks/run_benchmark.py
+"""
+Offline benchmark: runs the full workflow against local provider stand-ins at
+several lead scales and records throughput, per-step time, endpoint p95 latency
+and peak memory. The searched leads are then streamed through the per-lead steps
+in chunks (config "chunk_size"), which gives a per-step latency distribution
+(one sample per chunk) and its p95. Results are saved under benchmarks/results/
+for comparison.
+
+    python benchmarks/run_benchmark.py                     # scales from config.json
+    python benchmarks/run_benchmark.py --scales 100,10000
+    python benchmarks/run_benchmark.py --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.append(REPO_ROOT)
+
+# Dummy keys so every agent takes its API path (the stubs accept anything)
+BENCH_ENV = {
+    "APOLLO_API_KEY": "bench", "HUNTER_API_KEY": "bench", "DEEPSEEK_API_KEY": "bench",
+    "BREVO_API_KEY": "bench", "SHEET_ID": "bench"
+}
+
+
+def build_workflow(config: dict, base_urls: dict) -> dict:
+    """Copy of workflow.json pointed at the stubs, with benchmark rate limits and agent overrides."""
+    with open(os.path.join(REPO_ROOT, "workflow.json"), "r") as f:
+        workflow = json.load(f)
+    workflow.setdefault("config", {}).setdefault("http", {})["base_urls"] = base_urls
+    for step in workflow.get("steps", []):
+        overrides = config.get("agent_overrides", {}).get(step["id"], {})
+        for tool in step.get("tools", []):
+            limits = tool.get("rate_limit")
+            if limits and limits.get("provider") in config.get("rate_limits", {}):
+                limits.update(config["rate_limits"][limits["provider"]])
+            tool.setdefault("config", {}).update(overrides)
+            overrides = {}
+    return workflow
+
+
+def run_chunks(workdir: str, leads, chunk_size: int, steps: list) -> dict:
+    """
+    Stream leads through the per-lead steps in chunks of chunk_size (bulk mode),
+    so every step gets one latency sample per chunk instead of one per run.
+    """
+    from langgraph_builder import LangGraphBuilder
+    from src.bulk_runner import BulkRunner
+    from utils.metrics import get_metrics
+
+    get_metrics().reset()
+    runner = BulkRunner(LangGraphBuilder(), os.path.join(workdir, "chunks"), batch_size=chunk_size, steps=steps)
+    summary = runner.run(iter(leads))
+    return {
+        "chunk_size": chunk_size,
+        "chunks": summary["chunks"],
+        "steps": {step_id: {key: stats[key] for key in ("runs", "p50_seconds", "p95_seconds", "p99_seconds")}
+                  for step_id, stats in get_metrics().report()["steps"].items()}
+    }
+
+
+def run_child(workdir: str, chunk_size: int = 0, chunk_steps: list = None) -> dict:
+    """Executed in a fresh process (cwd = workdir): run the workflow (then the chunked pass) and report."""
+    from src.main import run_workflow
+    from utils.metrics import get_metrics
+
+    started = time.perf_counter()
+    results = run_workflow(checkpoint_dir=os.path.join(workdir, "checkpoints"), run_dir=os.path.join(workdir, "run"))
+    elapsed = time.perf_counter() - started
+    report = get_metrics().report()
+    leads = (results.get("prospect_search") or {}).get("output", {}).get("leads") or []
+    chunked = run_chunks(workdir, leads, chunk_size, chunk_steps) if chunk_size and leads else None
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "steps_completed": list(results.keys()),
+        "steps": report["steps"],
+        "endpoints": {name: {k: v for k, v in stats.items() if k != "buckets"}
+                      for name, stats in report["endpoints"].items()},
+        "providers": report["providers"],
+        "caches": report["caches"],
+        "chunked": chunked
+    }
+
+
+def run_scale(scale: int, config: dict, results_dir: str) -> dict:
+    from benchmarks.stub_servers import StubServers
+
+    workdir = os.path.join(results_dir, f"scale-{scale}")
+    os.makedirs(workdir, exist_ok=True)
+    stubs = StubServers(config.get("stubs", {}), contacts=scale)
+    try:
+        with open(os.path.join(workdir, "workflow.json"), "w") as f:
+            json.dump(build_workflow(config, stubs.base_urls()), f, indent=2)
+        print(f"[Benchmark] Running {scale} leads ...")
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", workdir,
+             "--chunk-size", str(config.get("chunk_size", 0)),
+             "--chunk-steps", ",".join(config.get("chunk_steps", ["enrichment", "scoring"]))],
+            cwd=workdir, env={**os.environ, **BENCH_ENV},
+            stdout=open(os.path.join(workdir, "stdout.log"), "w"), stderr=subprocess.STDOUT
+        )
+        if child.returncode != 0:
+            raise RuntimeError(f"Benchmark run for {scale} leads failed; see {workdir}/stdout.log")
+    finally:
+        stubs.shutdown()
+
+    with open(os.path.join(workdir, "result.json"), "r") as f:
+        result = json.load(f)
+    result["scale"] = scale
+    result["leads_per_second"] = round(scale / result["elapsed_seconds"], 2) if result["elapsed_seconds"] else None
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(results: list):
+    print(f"\n{'scale':>8} {'seconds':>9} {'leads/s':>9} {'peak MB':>8}  step seconds / endpoint p95")
+    for result in results:
+        steps = ", ".join(f"{step}={stats['wall_seconds']}" for step, stats in result["steps"].items())
+        p95 = ", ".join(f"{name}={stats['p95_seconds']}" for name, stats in result["endpoints"].items())
+        print(f"{result['scale']:>8} {result['elapsed_seconds']:>9} {result['leads_per_second']:>9} "
+              f"{result['peak_rss_mb']:>8}  {steps}")
+        print(f"{'':>38}  p95: {p95}")
+        if result.get("chunked"):
+            chunked = result["chunked"]
+            step_p95 = ", ".join(f"{step}={stats['p95_seconds']}" for step, stats in chunked["steps"].items())
+            print(f"{'':>38}  step p95 per {chunked['chunk_size']}-lead chunk ({chunked['chunks']} chunks): {step_p95}")
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> bool:
+    """Print deltas against a saved run. Returns False if any scale regressed beyond threshold."""
+    with open(baseline_path, "r") as f:
+        baseline = {r["scale"]: r for r in json.load(f)["results"]}
+    ok = True
+    print(f"\nComparison with {baseline_path} (regression threshold {threshold:.0%}):")
+    for result in results:
+        previous = baseline.get(result["scale"])
+        if previous is None:
+            print(f"  {result['scale']:>8}: no baseline")
+            continue
+        throughput = result["leads_per_second"] / previous["leads_per_second"] - 1
+        memory = result["peak_rss_mb"] / previous["peak_rss_mb"] - 1
+        regressed = throughput < -threshold or memory > threshold
+        ok = ok and not regressed
+        print(f"  {result['scale']:>8}: throughput {throughput:+.1%}, peak memory {memory:+.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline AutoReach benchmark against local API stubs")
+    parser.add_argument("--config", default=os.path.join(BENCH_DIR, "config.json"),
+                        help="benchmark config (default: benchmarks/config.json)")
+    parser.add_argument("--scales", type=lambda v: [int(x) for x in v.split(",")],
+                        help="comma-separated lead counts (default: from config)")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results"),
+                        help="results directory (default: benchmarks/results)")
+    parser.add_argument("--compare", metavar="RESULT_JSON", help="compare with a previous results file")
+    parser.add_argument("--child", metavar="WORKDIR", help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-size", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-steps", type=lambda v: [s for s in v.split(",") if s], help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        result = run_child(args.child, args.chunk_size, args.chunk_steps)
+        with open(os.path.join(args.child, "result.json"), "w") as f:
+            json.dump(result, f, indent=2)
+        sys.exit(0)
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{git_revision()}"
+    results_dir = os.path.join(args.output, run_id)
+    results = [run_scale(scale, config, results_dir) for scale in args.scales or config["scales"]]
+
+    summary_path = os.path.join(args.output, f"{run_id}.json")
+    with open(summary_path, "w") as f:
+        json.dump({"run_id": run_id, "revision": git_revision(), "config": config, "results": results}, f, indent=2)
+    print_summary(results)
+    print(f"\nResults saved to {summary_path}")
+
+    if args.compare and not compare(results, args.compare, config.get("regression_threshold", 0.1)):
+        sys.exit(1)
@@ -0,0 +1,232 @@
+# benchmarks/stub_servers.py
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROLES = ["Sales Manager", "Sales Executive", "VP of Sales", "Director of Sales", "Head of Growth",
+         "Account Executive", "Chief Revenue Officer"]
+INDUSTRIES = ["SaaS", "Fintech", "Healthcare", "E-commerce"]
+CITIES = ["San Francisco", "Austin", "New York", "Boston", "Denver"]
+
+EMAIL_BODY = ("Hi {name},\n\nI noticed {company} is growing its sales team. We help teams like yours "
+              "book more meetings with less manual prospecting. Open to a quick chat next week?\n\nBest,\nAlex")
+
+
+def make_contacts(count: int, seed: int = 42) -> list:
+    """Deterministic Apollo-style contacts for the stub search endpoint."""
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(count):
+        company = f"Company{i // 3:06d}"
+        domain = f"company{i // 3:06d}.com"
+        contacts.append({
+            "id": f"contact_{i:07d}",
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"person{i}@{domain}",
+            "linkedin_url": f"https://linkedin.com/in/person{i}",
+            "title": rng.choice(ROLES),
+            "organization": {
+                "name": company,
+                "industry": rng.choice(INDUSTRIES),
+                "locations": [{"city": rng.choice(CITIES)}],
+                "employee_count": rng.randint(50, 2000),
+                "annual_revenue": rng.randint(10_000_000, 300_000_000)
+            }
+        })
+    return contacts
+
+
+class StubState:
+    """State shared by every stub: the contact list and the messages 'sent' through Brevo."""
+
+    def __init__(self, contacts: list):
+        self.contacts = contacts
+        self.contacts_body = json.dumps({"contacts": contacts}).encode("utf-8")
+        self.sent = []
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Base handler: applies the provider's latency / error / 429 profile, then
+    delegates to route(). Subclasses set provider and implement route().
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    provider = "stub"
+    profile = {}
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body, content_type: str = "application/json", headers: dict = None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else {}
+
+    def _handle(self, method: str):
+        body = self._read_json() if method == "POST" else {}
+        latency = self.profile.get("latency_ms", 0) + random.uniform(0, self.profile.get("jitter_ms", 0))
+        time.sleep(latency / 1000.0)
+
+        roll = random.random()
+        if roll < self.profile.get("rate_limit_rate", 0):
+            self._send(429, {"error": "rate limited"}, headers={"Retry-After": str(self.profile.get("retry_after", 0))})
+            return
+        if roll < self.profile.get("rate_limit_rate", 0) + self.profile.get("error_rate", 0):
+            self._send(503, {"error": "stub failure"})
+            return
+        self.route(method, body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def route(self, method: str, body: dict):
+        self._send(404, {"error": "not found"})
+
+
+class ApolloStub(StubHandler):
+    provider = "apollo"
+
+    def route(self, method, body):
+        if method == "POST" and self.path.startswith("/v1/contacts/search"):
+            self._send(200, self.state.contacts_body)
+        elif method == "GET" and re.match(r"^/v1/campaigns/[^/]+/emails", self.path):
+            # Engagement for everything Brevo accepted: ~40% opened, ~10% clicked, ~4% replied
+            rng = random.Random(7)
+            with self.state.lock:
+                sent = list(self.state.sent)
+            emails = []
+            for message in sent:
+                opened = rng.random() < 0.4
+                emails.append({
+                    "contact_name": message["name"],
+                    "recipient_email": message["email"],
+                    "opened": opened,
+                    "clicked": opened and rng.random() < 0.25,
+                    "replied": opened and rng.random() < 0.1
+                })
+            self._send(200, {"emails": emails})
+        else:
+            super().route(method, body)
+
+
+class HunterStub(StubHandler):
+    provider = "hunter"
+
+    def route(self, method, body):
+        if self.path.startswith("/v2/email-finder"):
+            self._send(200, {"data": {"position": random.choice(ROLES)}})
+        elif self.path.startswith("/v2/email-verifier"):
+            self._send(200, {"data": {"status": "valid", "result": "deliverable", "score": 92,
+                                      "accept_all": False}})
+        else:
+            super().route(method, body)
+
+
+class OpenRouterStub(StubHandler):
+    provider = "openrouter"
+
+    def route(self, method, body):
+        if not self.path.startswith("/api/v1/chat/completions"):
+            return super().route(method, body)
+        messages = body.get("messages", [])
+        user = messages[-1]["content"] if messages else ""
+        system = messages[0]["content"] if messages else ""
+
+        if '"emails"' in system:
+            ids = re.findall(r"^id: (\S+)$", user, flags=re.MULTILINE)
+            content = json.dumps({"emails": [{"id": lead_id, "body": EMAIL_BODY.format(name="there", company="your team")}
+                                             for lead_id in ids]})
+        else:
+            content = EMAIL_BODY.format(name="there", company="your team")
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in re.findall(r"\S+\s*", content) + [None]:
+                payload = {"choices": [{"delta": {"content": token}}]} if token else None
+                line = f"data: {json.dumps(payload)}\n\n" if payload else "data: [DONE]\n\n"
+                data = line.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self._send(200, {"choices": [{"message": {"content": content}}],
+                         "usage": {"completion_tokens": len(content) // 4}})
+
+
+class BrevoStub(StubHandler):
+    provider = "brevo"
+
+    def route(self, method, body):
+        if method == "POST" and self.path.startswith("/v3/smtp/email"):
+            recipient = (body.get("to") or [{}])[0]
+            with self.state.lock:
+                self.state.sent.append({"email": recipient.get("email"), "name": recipient.get("name")})
+            self._send(201, {"messageId": f"<{uuid.uuid4()}@stub.brevo>"})
+        else:
+            super().route(method, body)
+
+
+# Real host -> stub handler
+STUBS = {
+    "api.apollo.io": ApolloStub,
+    "api.hunter.io": HunterStub,
+    "openrouter.ai": OpenRouterStub,
+    "api.brevo.com": BrevoStub
+}
+
+
+class StubServers:
+    """
+    Starts one local HTTP server per provider on free ports.
+    base_urls() is the {host: base_url} mapping for config.http.base_urls.
+    """
+
+    def __init__(self, profiles: dict, contacts: int, host: str = "127.0.0.1"):
+        """
+        Args:
+            profiles: {provider: {"latency_ms", "jitter_ms", "error_rate", "rate_limit_rate", "retry_after"}}
+            contacts: Number of contacts the Apollo search stub returns
+            host: Interface to bind
+        """
+        self.host = host
+        self.state = StubState(make_contacts(contacts))
+        self.servers = {}
+        for real_host, handler in STUBS.items():
+            bound = type(handler.__name__, (handler,), {"profile": profiles.get(handler.provider, {}),
+                                                        "state": self.state})
+            server = ThreadingHTTPServer((host, 0), bound)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers[real_host] = server
+
+    def base_urls(self) -> dict:
+        return {real_host: f"http://{self.host}:{server.server_port}" for real_host, server in self.servers.items()}
+
+    def shutdown(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
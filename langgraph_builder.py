@@ -2,68 +2,133 @@
 import json
 import os
 import re
+import threading
+import weakref
 from importlib import import_module
 
+from src.logger import configure_logging, get_logger
+from utils.execution_plan import ExecutionPlan
+from utils.http_client import configure_transport, get_transport
+from utils.rate_limiter import get_rate_limiter
+
+logger = get_logger(__name__)
+
+# Compiled plans shared by every builder in the process: abspath -> (mtime, plan)
+_plans = {}
+# config.http last applied to the shared transport (by any builder)
+_applied_http = None
+
 
 class LangGraphBuilder:
     """
     Reads workflow.json and initializes the LangGraph workflow.
-    Dynamically imports agent classes from the 'agents' folder
-    and passes tool configs (with environment variable support) to agent constructors.
+    The workflow is compiled once into an ExecutionPlan (validated references,
+    pre-resolved input accessors), cached per file and recompiled only when the
+    file's mtime changes. Agent classes are imported from the 'agents' folder
+    lazily, only for the steps that are actually used, and get tool configs
+    (with environment variable support) as constructor kwargs. Agents are
+    cached per plan, so a run that holds a plan keeps that plan's agents
+    across a reload.
     Raises clear errors if required keys are missing.
     """
 
     def __init__(self, workflow_file: str = "workflow.json"):
         self.workflow_file = workflow_file
         self.workflow_data = {}
-        self.agents = {}
+        self.plan = None
+        # plan -> {step_id: agent / constructor kwargs}; dropped with the plan
+        self._agents = weakref.WeakKeyDictionary()
+        self._agent_configs = weakref.WeakKeyDictionary()
+        self._mtime = None
+        self._lock = threading.RLock()
 
         self._load_workflow()
-        self._init_agents()
 
     # ----------------------
     # Workflow loading
     # ----------------------
     def _load_workflow(self):
-        """Load workflow.json into a dictionary"""
+        """
+        Load workflow.json and compile it (or reuse the plan compiled for this mtime).
+        Runs in flight keep their plan and agents; the shared transport and rate
+        limits are only touched when their settings changed.
+        """
+        global _applied_http
         if not os.path.exists(self.workflow_file):
             raise FileNotFoundError(f"{self.workflow_file} not found")
-        with open(self.workflow_file, "r") as f:
-            self.workflow_data = json.load(f)
-        print(f"Loaded workflow: {self.workflow_data.get('workflow_name', 'Unnamed')}")
+        path = os.path.abspath(self.workflow_file)
+        mtime = os.stat(path).st_mtime_ns
+        cached = _plans.get(path)
+        if cached and cached[0] == mtime:
+            self.plan = cached[1]
+        else:
+            with open(self.workflow_file, "r") as f:
+                self.plan = ExecutionPlan(json.load(f))
+            _plans[path] = (mtime, self.plan)
+            # Logging first, so everything after uses the workflow's levels / files
+            configure_logging(**self.plan.config.get("logging", {}))
+            logger.info("Loaded workflow: %s", self.plan.workflow.get("workflow_name", "Unnamed"))
+        self.workflow_data = self.plan.workflow
+        self._mtime = mtime
+
+        # Shared pooled HTTP transport used by every agent and apis module
+        http_config = self.workflow_data.get("config", {}).get("http", {})
+        if http_config != _applied_http:
+            configure_transport(**http_config)
+            _applied_http = http_config
+        self._configure_rate_limits()
+
+    def get_plan(self) -> ExecutionPlan:
+        """Return the compiled plan, recompiling first if workflow.json changed on disk"""
+        with self._lock:
+            if os.stat(self.workflow_file).st_mtime_ns != self._mtime:
+                self._load_workflow()
+            return self.plan
+
+    def _configure_rate_limits(self):
+        """Register per-provider rate limits declared on step tools ("rate_limit"); unchanged ones keep their state"""
+        limiter = get_rate_limiter()
+        for step in self.workflow_data.get("steps", []):
+            for tool in step.get("tools", []):
+                limits = dict(tool.get("rate_limit") or {})
+                provider = limits.pop("provider", None)
+                if limits and not provider:
+                    raise ValueError(f"rate_limit on tool '{tool.get('name')}' is missing 'provider'")
+                if provider:
+                    limiter.configure(provider, **limits)
 
     # ----------------------
     # Agent initialization
     # ----------------------
-    def _init_agents(self):
-        """Dynamically import and initialize agent classes"""
-        for step in self.workflow_data.get("steps", []):
-            agent_name = step.get("agent")
-            step_id = step.get("id")
-            if not agent_name or not step_id:
-                raise ValueError(f"Step missing 'agent' or 'id': {step}")
+    def _init_agent(self, step: dict, plan: ExecutionPlan):
+        """Import and initialize the agent class of one step of plan (None if that fails)"""
+        agent_name = step["agent"]
+        step_id = step["id"]
+        try:
+            # Convert CamelCase class name to snake_case filename
+            module_name = self._camel_to_snake(agent_name)
+            module = import_module(f"agents.{module_name}")
+            AgentClass = getattr(module, agent_name)
 
-            try:
-                # Convert CamelCase class name to snake_case filename
-                module_name = self._camel_to_snake(agent_name)
-                module = import_module(f"agents.{module_name}")
-                AgentClass = getattr(module, agent_name)
+            # Extract tool configs as kwargs for the agent constructor
+            init_kwargs = self._extract_agent_config(step)
 
-                # Extract tool configs as kwargs for the agent constructor
-                init_kwargs = self._extract_agent_config(step)
+            # Check for missing API keys / required configs (agents may declare some optional)
+            optional = set(getattr(AgentClass, "optional_config", ()))
+            missing_keys = [k for k, v in init_kwargs.items() if v is None and k not in optional]
+            if missing_keys:
+                raise ValueError(
+                    f"Missing environment values for agent '{agent_name}' in step '{step_id}': {missing_keys}"
+                )
 
-                # Check for missing API keys / required configs
-                missing_keys = [k for k, v in init_kwargs.items() if v is None]
-                if missing_keys:
-                    raise ValueError(
-                        f"Missing environment values for agent '{agent_name}' in step '{step_id}': {missing_keys}"
-                    )
+            self._agent_configs.setdefault(plan, {})[step_id] = init_kwargs
+            logger.info("Initialized agent: %s (step '%s')", agent_name, step_id)
+            logger.debug("Config of step '%s': %s", step_id, sorted(init_kwargs))
+            return AgentClass(**init_kwargs)
 
-                self.agents[step_id] = AgentClass(**init_kwargs)
-                print(f"Initialized agent: {agent_name} with config: {init_kwargs}")
-
-            except Exception as e:
-                print(f"Error initializing agent '{agent_name}' (step '{step_id}'): {e}")
+        except Exception as e:
+            logger.error("Error initializing agent '%s' (step '%s'): %s", agent_name, step_id, e)
+            return None
 
     # ----------------------
     # Helpers
@@ -101,9 +166,99 @@ class LangGraphBuilder:
         """Return the loaded workflow JSON data"""
         return self.workflow_data
 
-    def get_agents(self) -> dict:
-        """Return the initialized agent instances"""
-        return self.agents
+    def get_agent(self, step_id: str, plan: ExecutionPlan = None):
+        """
+        Return the agent of a step of plan (default: the current plan), importing
+        and initializing it on first use (None if that failed)
+        """
+        plan = plan or self.plan
+        with self._lock:
+            agents = self._agents.setdefault(plan, {})
+            if step_id not in agents:
+                agents[step_id] = self._init_agent(plan.get_step(step_id).step, plan)
+            return agents[step_id]
+
+    def create_agent(self, step_id: str, plan: ExecutionPlan = None):
+        """Return a new agent for a step of plan (default: the current plan) that no one else shares (None if that failed)"""
+        plan = plan or self.plan
+        return self._init_agent(plan.get_step(step_id).step, plan)
+
+    def get_agents(self, step_ids: list = None, plan: ExecutionPlan = None) -> dict:
+        """Return agent instances for the given steps (default: every step), initializing them on first use"""
+        plan = plan or self.plan
+        return {step_id: self.get_agent(step_id, plan) for step_id in (step_ids or plan.step_ids)}
+
+    def get_agent_config(self, step_id: str, plan: ExecutionPlan = None) -> dict:
+        """Return the constructor kwargs used for a step's agent"""
+        return self._agent_configs.get(plan or self.plan, {}).get(step_id, {})
+
+    def get_batch_steps(self, step_ids: list = None) -> list:
+        """
+        Return per-lead steps (agents declaring batch_input / batch_output) in
+        workflow order. Defaults to enrichment and scoring.
+        Raises ValueError for unknown, uninitialized or non-batchable steps.
+        """
+        wanted = step_ids if step_ids is not None else ["enrichment", "scoring"]
+        unknown = set(wanted) - set(self.plan.step_ids)
+        if unknown:
+            raise ValueError(f"Unknown step(s): {sorted(unknown)}")
+        selected = []
+        for planned in self.plan.steps:
+            if planned.id not in wanted:
+                continue
+            agent = self.get_agent(planned.id)
+            if agent is None:
+                raise ValueError(f"Agent for step '{planned.id}' is not initialized")
+            if not getattr(agent, "batch_input", None) or not getattr(agent, "batch_output", None):
+                raise ValueError(f"Step '{planned.id}' ({planned.agent_name}) does not support per-lead execution")
+            selected.append(planned.step)
+        return selected
+
+    def get_static_inputs(self, step_id: str) -> dict:
+        """
+        Inputs of a per-lead step other than its lead list: literals and
+        {{config.*}} references (references to other steps are dropped).
+        """
+        batch_input = getattr(self.get_agent(step_id), "batch_input", None)
+        return {key: value for key, value in self.plan.get_step(step_id).static_inputs.items() if key != batch_input}
+
+    def publish_tasks(self, queue, campaign: str, leads, step_ids: list = None, chunk_size: int = 500) -> int:
+        """
+        Publish one task per lead for the first per-lead step to a work queue.
+        Each task carries the remaining steps; workers (src/worker.py) publish the
+        follow-up task for the next step when they acknowledge one.
+
+        Args:
+            queue: QueueBackend (utils.work_queue.open_queue)
+            campaign: Campaign id the tasks belong to
+            leads: Iterable of seed lead dicts (streamed in chunks)
+            step_ids: Per-lead steps to chain (default: enrichment, scoring)
+            chunk_size: Tasks per publish transaction
+
+        Returns:
+            Number of new tasks (leads already published for this campaign are skipped)
+        """
+        chain = [step["id"] for step in self.get_batch_steps(step_ids)]
+        published = 0
+        batch = []
+        for lead in leads:
+            batch.append({"lead": lead, "next_steps": chain[1:]})
+            if len(batch) >= chunk_size:
+                published += queue.publish(campaign, chain[0], batch)
+                batch = []
+        if batch:
+            published += queue.publish(campaign, chain[0], batch)
+        return published
+
+    @staticmethod
+    def get_http_stats() -> dict:
+        """Return per-host connection reuse stats of the shared HTTP transport"""
+        return get_transport().stats()
+
+    @staticmethod
+    def get_rate_limit_stats() -> dict:
+        """Return per-provider request / retry / throttling counters"""
+        return get_rate_limiter().stats()
 
 
 # ----------------------
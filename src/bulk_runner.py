@@ -0,0 +1,218 @@
+# src/bulk_runner.py
+import csv
+import heapq
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from src.logger import get_logger
+from utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+# CSV cells arrive as strings; these lead fields are numeric downstream
+NUMERIC_FIELDS = ("employee_count", "revenue", "engagement_score")
+# Separator for list-valued CSV cells (e.g. technologies)
+LIST_FIELDS = ("technologies",)
+
+
+def _coerce_csv_row(row: dict) -> dict:
+    """Turn a csv.DictReader row into a lead dict with typed fields."""
+    lead = {k: v for k, v in row.items() if k and v not in (None, "")}
+    for field in NUMERIC_FIELDS:
+        if field in lead:
+            try:
+                value = float(lead[field])
+                lead[field] = int(value) if value.is_integer() and field != "engagement_score" else value
+            except ValueError:
+                lead.pop(field)
+    for field in LIST_FIELDS:
+        if isinstance(lead.get(field), str):
+            lead[field] = [item.strip() for item in lead[field].split(";") if item.strip()]
+    return lead
+
+
+def read_records(path: str, input_format: str = None):
+    """
+    Lazily yield dicts from a CSV or JSONL file ("-" reads stdin).
+
+    Args:
+        path: File path or "-" for stdin
+        input_format: "csv" or "jsonl"; inferred from the extension when omitted
+            (stdin defaults to jsonl)
+    """
+    if input_format is None:
+        input_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+
+    f = sys.stdin if path == "-" else open(path, "r", newline="" if input_format == "csv" else None)
+    try:
+        if input_format == "csv":
+            for row in csv.DictReader(f):
+                yield _coerce_csv_row(row)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class BulkRunner:
+    """
+    Headless bulk mode: streams seed leads (or ICP definitions) through the
+    per-lead workflow steps in fixed-size chunks and appends every stage's
+    results to <output_dir>/<step_id>.jsonl.
+    Only a bounded window of chunks is in flight, so memory stays constant no
+    matter how many leads are imported. Steps qualify when their agent declares
+    batch_input / batch_output (the list it consumes and produces).
+    """
+
+    def __init__(self, builder, output_dir: str, workers: int = 4, batch_size: int = 100,
+                 steps: list = None, top_k: int = 100):
+        """
+        Initialize BulkRunner.
+
+        Args:
+            builder: Loaded LangGraphBuilder (agents + workflow)
+            output_dir: Directory for the per-stage JSONL files
+            workers: Chunks processed concurrently
+            batch_size: Leads per chunk passed to each agent.run
+            steps: Step ids to run, in workflow order (default: every batchable step
+                from enrichment through scoring)
+            top_k: Size of the globally ranked shortlist written after scoring
+        """
+        self.builder = builder
+        self.workflow = builder.get_workflow()
+        self.output_dir = output_dir
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.top_k = top_k
+        self.steps = builder.get_batch_steps(steps)
+        # Only the agents this run uses are imported and initialized
+        self.agents = builder.get_agents([step["id"] for step in self.steps])
+
+    # ----------------------
+    # Execution
+    # ----------------------
+    def _run_chunk(self, leads: list, static_inputs: dict) -> dict:
+        """Run one chunk through every selected step; returns {step_id: records}."""
+        results = {}
+        records = leads
+        for step in self.steps:
+            if not records:
+                # Agents substitute demo data for empty input; stop the chain instead
+                break
+            agent = self.agents[step["id"]]
+            with get_metrics().step_timer(step["id"], step["agent"], per_thread=True) as timer:
+                output = agent.run(**{agent.batch_input: records}, **static_inputs[step["id"]])
+                records = list(output.get(agent.batch_output) or [])
+                timer["items"] = len(records)
+            results[step["id"]] = records
+        return results
+
+    def _search_icps(self, icps):
+        """Turn ICP definitions into a lead stream using the prospect_search step."""
+        agent = self.builder.get_agent("prospect_search")
+        if agent is None:
+            raise ValueError("ICP input needs an initialized prospect_search step")
+        path = os.path.join(self.output_dir, "prospect_search.jsonl")
+        with open(path, "w") as f:
+            for record in icps:
+                icp = record.get("icp", record)
+                leads = agent.run(icp=icp, signals=record.get("signals")).get("leads", [])
+                for lead in leads:
+                    f.write(json.dumps(lead, default=str) + "\n")
+                    yield lead
+                f.flush()
+
+    def run(self, records, kind: str = "leads", max_leads: int = None) -> dict:
+        """
+        Stream records through the selected steps.
+
+        Args:
+            records: Iterable of lead dicts, or ICP dicts when kind == "icps"
+            kind: "leads" or "icps"
+            max_leads: Stop after this many leads
+
+        Returns:
+            dict: run summary (counts per step, errors, elapsed seconds, output files)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        leads = self._search_icps(records) if kind == "icps" else iter(records)
+        if max_leads is not None:
+            leads = islice(leads, max_leads)
+
+        static_inputs = {step["id"]: self.builder.get_static_inputs(step["id"]) for step in self.steps}
+        files = {step["id"]: open(os.path.join(self.output_dir, f"{step['id']}.jsonl"), "w")
+                 for step in self.steps}
+        errors_path = os.path.join(self.output_dir, "errors.jsonl")
+        counts = {step["id"]: 0 for step in self.steps}
+        summary = {"leads_in": 0, "chunks": 0, "failed_chunks": 0}
+        shortlist = []  # min-heap of (score, sequence, lead) for the global top_k
+        started = time.time()
+
+        def drain(window, errors):
+            index, size, future = window.popleft()
+            try:
+                results = future.result()
+            except Exception as e:
+                summary["failed_chunks"] += 1
+                errors.write(json.dumps({"chunk": index, "leads": size, "error": str(e)}) + "\n")
+                logger.error("Chunk %d failed: %s", index, e)
+                return
+            for step_id, step_records in results.items():
+                handle = files[step_id]
+                for record in step_records:
+                    handle.write(json.dumps(record, default=str) + "\n")
+                counts[step_id] += len(step_records)
+                if step_id == "scoring" and self.top_k:
+                    for position, lead in enumerate(step_records):
+                        entry = (lead.get("total_score", 0), -(index * self.batch_size + position), lead)
+                        if len(shortlist) < self.top_k:
+                            heapq.heappush(shortlist, entry)
+                        elif entry[:2] > shortlist[0][:2]:
+                            heapq.heapreplace(shortlist, entry)
+
+        try:
+            with open(errors_path, "w") as errors, ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # Results are written in submission order, so output files are deterministic
+                window = deque()
+                while True:
+                    chunk = list(islice(leads, self.batch_size))
+                    if not chunk:
+                        break
+                    summary["leads_in"] += len(chunk)
+                    window.append((summary["chunks"], len(chunk), pool.submit(self._run_chunk, chunk, static_inputs)))
+                    summary["chunks"] += 1
+                    if len(window) >= self.workers * 2:
+                        drain(window, errors)
+                        if summary["chunks"] % (self.workers * 20) == 0:
+                            rate = summary["leads_in"] / max(time.time() - started, 1e-9)
+                            logger.info("%d leads read (%.1f leads/sec)", summary["leads_in"], rate)
+                while window:
+                    drain(window, errors)
+        finally:
+            for handle in files.values():
+                handle.close()
+
+        if shortlist:
+            ranked_path = os.path.join(self.output_dir, "ranked_top.jsonl")
+            with open(ranked_path, "w") as f:
+                for _, _, lead in sorted(shortlist, key=lambda e: e[:2], reverse=True):
+                    f.write(json.dumps(lead, default=str) + "\n")
+
+        get_metrics().write(self.output_dir)
+        elapsed = time.time() - started
+        summary.update({
+            "records_out": counts,
+            "elapsed_seconds": round(elapsed, 2),
+            "leads_per_second": round(summary["leads_in"] / elapsed, 1) if elapsed > 0 else None,
+            "output_dir": self.output_dir
+        })
+        return summary
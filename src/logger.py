@@ -1,40 +1,168 @@
 # src/logger.py
+import atexit
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import random
+import threading
+import time
 
-# Ensure logs folder exists
-os.makedirs("logs", exist_ok=True)
+# Every project logger lives under this root; categories are module names below it
+ROOT_LOGGER = "autoreach"
 
-def get_logger(name: str = __name__, log_file: str = "logs/run.log") -> logging.Logger:
+DEFAULT_LOGGING_CONFIG = {
+    "level": "INFO",
+    # Per-category levels, e.g. {"agents.prospect_search_agent": "DEBUG", "utils.http_client": "WARNING"}
+    "levels": {},
+    "file": "logs/run.log",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "console": True,
+    "console_level": "INFO",
+    # Fraction of DEBUG records kept, overall and per category
+    "debug_sample_rate": 1.0,
+    "debug_sample_rates": {}
+}
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extra fields and exception text."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        # logger.info("...", extra={"leads": 10}) -> "leads": 10
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep only a fraction of DEBUG records (per category), so hot-loop debug events stay cheap."""
+
+    def __init__(self, rate: float = 1.0, rates: dict = None):
+        super().__init__()
+        self.rate = rate
+        # Longest prefix first, so the most specific category wins
+        self.rates = sorted(((f"{ROOT_LOGGER}.{name}", value) for name, value in (rates or {}).items()),
+                            key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rate
+        for prefix, value in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                rate = value
+                break
+        return rate >= 1 or random.random() < rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps exc_info text and extra fields for the JSON file."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+_listener = None
+_queue_handler = None
+_config_lock = threading.Lock()
+
+
+def configure_logging(**config) -> logging.Logger:
+    """
+    (Re)configure project logging (e.g. workflow.json config.logging).
+
+    Loggers only put records on an in-memory queue; a QueueListener thread
+    formats them and writes the JSON log file (size-based rotation) and the
+    console, so logging I/O stays off the calling thread.
+    """
+    global _listener, _queue_handler
+    settings = {**DEFAULT_LOGGING_CONFIG, **config}
+    root = logging.getLogger(ROOT_LOGGER)
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            root.removeHandler(_queue_handler)
+
+        handlers = []
+        if settings["file"] and multiprocessing.parent_process() is not None:
+            # Worker processes (sharded runs) rotate their own file: run.<pid>.log
+            base, ext = os.path.splitext(settings["file"])
+            settings["file"] = f"{base}.{os.getpid()}{ext}"
+        if settings["file"]:
+            if os.path.dirname(settings["file"]):
+                os.makedirs(os.path.dirname(settings["file"]), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                settings["file"], maxBytes=settings["max_bytes"], backupCount=settings["backup_count"],
+                encoding="utf-8"
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if settings["console"]:
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(settings["console_level"])
+            console_handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
+            handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = _QueueHandler(log_queue)
+        _queue_handler.addFilter(DebugSampler(settings["debug_sample_rate"], settings["debug_sample_rates"]))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        root.addHandler(_queue_handler)
+        root.setLevel(settings["level"])
+        root.propagate = False
+        for name, level in settings["levels"].items():
+            logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(level)
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str = __name__, log_file: str = None) -> logging.Logger:
     """
-    Returns a configured logger instance.
+    Returns a logger for a category (usually the module's __name__).
 
     Args:
-        name: Logger name
-        log_file: Path to the log file
+        name: Category name, e.g. "agents.prospect_search_agent"
+        log_file: Log file used if logging is not configured yet (default: logs/run.log)
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-
-    # Avoid adding multiple handlers if logger is called multiple times
-    if not logger.handlers:
-        # File handler
-        fh = logging.FileHandler(log_file)
-        fh.setLevel(logging.INFO)
-
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-
-        # Formatter
-        formatter = logging.Formatter(
-            "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-        )
-        fh.setFormatter(formatter)
-        ch.setFormatter(formatter)
-
-        # Add handlers
-        logger.addHandler(fh)
-        logger.addHandler(ch)
-
-    return logger
+    if _listener is None:
+        configure_logging(**({"file": log_file} if log_file else {}))
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
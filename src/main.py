@@ -1,49 +1,272 @@
 # src/main.py
+import argparse
+import json
 import os
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from langgraph_builder import LangGraphBuilder
+from src.bulk_runner import BulkRunner, read_records
+from src.sharded_runner import ShardedRunner
+from utils.checkpoint_store import CheckpointStore
+from utils.metrics import count_items, get_metrics
+from utils.profiling import PROFILE_MODES, StepProfiler
+from utils.work_queue import open_queue
+from utils.step_output_store import StepOutputStore
+
+def run_workflow(resume: bool = False, from_step: str = None, checkpoint_dir: str = "checkpoints",
+                 run_dir: str = None, profile_modes: list = None, profile_steps: list = None):
+    """
+    Run the workflow, checkpointing every successful step.
+    Large list outputs are spilled to chunked JSONL under the run directory and
+    handed to downstream steps as lazy SpilledList iterators.
 
-def run_workflow():
-    # Initialize LangGraph workflow and agents
+    Args:
+        resume: Reuse the checkpoint of any step whose inputs and config are unchanged
+        from_step: Reuse checkpoints before this step and force this step and all
+            later ones to run again
+        checkpoint_dir: Directory of the content-addressed checkpoint store
+        run_dir: Directory for this run's artifacts (default: runs/<timestamp>)
+        profile_modes: Profile steps with any of cprofile / tracemalloc / sampling
+            (overrides config.profiling in workflow.json)
+        profile_steps: Step ids to profile (default: config.profiling.steps, else all)
+    """
+    # Load the compiled workflow plan; agents are initialized on first use
     builder = LangGraphBuilder()
-    agents = builder.get_agents()
-    workflow = builder.get_workflow()
+    plan = builder.get_plan()
+    workflow = plan.workflow
+    checkpoints = CheckpointStore(checkpoint_dir)
+    run_dir = run_dir or os.path.join("runs", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    output_settings = workflow.get("config", {}).get("step_outputs", {})
+    output_store = StepOutputStore(os.path.join(run_dir, "outputs"), **output_settings)
+    profiler = StepProfiler.from_config(run_dir, workflow.get("config", {}).get("profiling"),
+                                        profile_modes, profile_steps)
+
+    step_ids = plan.step_ids
+    if from_step and from_step not in step_ids:
+        raise ValueError(f"Unknown step '{from_step}'. Available steps: {step_ids}")
+    forced = set(step_ids[step_ids.index(from_step):]) if from_step else set()
 
     # Dictionary to store outputs of each step
     step_outputs = {}
 
     # Execute each step sequentially
-    for step in workflow.get("steps", []):
-        step_id = step["id"]
-        agent = agents.get(step_id)
-        print(f"\nRunning step: {step_id} ({step['agent']})")
-
-        # Prepare inputs by resolving references to previous step outputs
-        inputs = {}
-        for key, val in step.get("inputs", {}).items():
-            if isinstance(val, str) and val.startswith("{{") and val.endswith("}}"):
-                # Example: "{{prospect_search.output.leads}}"
-                ref = val[2:-2].strip().split(".")
-                ref_step = ref[0]
-                ref_key = ref[-1]
-                inputs[key] = step_outputs.get(ref_step, {}).get(ref_key)
-            else:
-                inputs[key] = val
+    for planned in plan.steps:
+        step_id = planned.id
+        agent = builder.get_agent(step_id, plan)
+        print(f"\nRunning step: {step_id} ({planned.agent_name})")
+
+        # Resolve references to previous step outputs through the plan's accessors
+        inputs = planned.resolve_inputs(step_outputs)
+
+        # Skip the step if an identical execution was checkpointed
+        key = checkpoints.step_key(step_id, planned.agent_name, inputs, builder.get_agent_config(step_id, plan))
+        if (resume or from_step) and step_id not in forced:
+            cached = checkpoints.load(key)
+            if cached is not None:
+                step_outputs[step_id] = {"output": cached}
+                print(f"Step '{step_id}' restored from checkpoint {key[:12]}")
+                continue
 
         # Run the agent
         try:
-            output = agent.run(**inputs)
+            with get_metrics().step_timer(step_id, planned.agent_name) as timer:
+                with profiler.profile(step_id) if profiler else nullcontext():
+                    result = agent.run(**inputs)
+                problems = planned.check_output(result)
+                if problems:
+                    print(f"Warning: step '{step_id}' output does not match its output_schema: {problems}")
+                output = output_store.put(step_id, result)
+                timer["items"] = count_items(output)
             # Store output using step_id as key
             step_outputs[step_id] = {"output": output}
-            print(f"Step '{step_id}' completed. Output keys: {list(output[0].keys()) if isinstance(output, list) and output else output.keys() if isinstance(output, dict) else 'unknown'}")
+            # Agents may veto checkpointing partial results (failed sends, LLM errors)
+            checkpointable = getattr(agent, "checkpointable", None)
+            if checkpointable is None or checkpointable(output):
+                checkpoints.save(key, step_id, output)
+            print(f"Step '{step_id}' completed. Output: {StepOutputStore.summarize(output)}")
         except Exception as e:
             print(f"Error running step {step_id}: {e}")
 
     print("\nWorkflow execution completed.")
+    print(f"HTTP connection stats: {builder.get_http_stats()}")
+    print(f"Rate limit stats: {builder.get_rate_limit_stats()}")
+    get_metrics().write(run_dir)
+    print(f"Metrics report: {os.path.join(run_dir, 'metrics.json')} (Prometheus: metrics.prom)")
     return step_outputs
 
 
+def run_bulk(input_path: str, input_format: str = None, kind: str = "leads", steps: list = None,
+             workers: int = 4, max_leads: int = None, batch_size: int = 100, output_dir: str = None,
+             top_k: int = 100) -> dict:
+    """
+    Headless bulk mode: stream seed leads or ICP definitions from CSV/JSONL (or
+    stdin) through the per-lead steps and write each stage as JSONL.
+
+    Args:
+        input_path: CSV / JSONL file, or "-" for stdin
+        input_format: "csv" or "jsonl" (default: from the file extension)
+        kind: "leads" (seed leads) or "icps" (ICP definitions for prospect_search)
+        steps: Step ids to run (default: enrichment, scoring)
+        workers: Chunks processed concurrently
+        max_leads: Stop after this many leads
+        batch_size: Leads per chunk
+        output_dir: Directory for <step_id>.jsonl files (default: runs/<timestamp>/bulk)
+        top_k: Size of the globally ranked shortlist (ranked_top.jsonl)
+    """
+    builder = LangGraphBuilder()
+    output_dir = output_dir or os.path.join("runs", datetime.now().strftime("%Y%m%d_%H%M%S"), "bulk")
+    runner = BulkRunner(builder, output_dir, workers=workers, batch_size=batch_size, steps=steps, top_k=top_k)
+    summary = runner.run(read_records(input_path, input_format), kind=kind, max_leads=max_leads)
+
+    print("\nBulk run completed.")
+    print(f"Summary: {summary}")
+    print(f"HTTP connection stats: {builder.get_http_stats()}")
+    print(f"Rate limit stats: {builder.get_rate_limit_stats()}")
+    return summary
+
+
+def run_sharded(input_path: str, input_format: str = None, steps: list = None, processes: int = None,
+                shards: int = None, shard_key: str = "domain", workers: int = 4, max_leads: int = None,
+                batch_size: int = 100, output_dir: str = None, store: bool = False,
+                workflow_file: str = "workflow.json") -> dict:
+    """
+    Multi-process bulk mode: shard seed leads by shard_key across a process pool
+    and merge the per-shard results deterministically.
+
+    Args:
+        input_path: CSV / JSONL file of seed leads, or "-" for stdin
+        input_format: "csv" or "jsonl" (default: from the file extension)
+        steps: Step ids to run (default: enrichment, scoring)
+        processes: Worker processes (default: CPU count)
+        shards: Number of shards (default: processes)
+        shard_key: "domain" or a lead field name
+        workers: Concurrent chunks inside each process
+        max_leads: Stop after this many leads
+        batch_size: Leads per chunk
+        output_dir: Output directory (default: runs/<timestamp>/sharded)
+        store: Embed ranked leads in the workers and store them in Chroma
+        workflow_file: workflow.json each worker loads
+    """
+    output_dir = output_dir or os.path.join("runs", datetime.now().strftime("%Y%m%d_%H%M%S"), "sharded")
+    runner = ShardedRunner(workflow_file, output_dir, processes=processes, shards=shards, shard_key=shard_key,
+                           threads=workers, batch_size=batch_size, steps=steps, store=store)
+    summary = runner.run(read_records(input_path, input_format), max_leads=max_leads)
+
+    print("\nSharded run completed.")
+    print(f"Summary: {summary}")
+    return summary
+
+
+def publish_campaign(input_path: str, queue_url: str, campaign: str, input_format: str = None,
+                     steps: list = None, max_leads: int = None) -> int:
+    """
+    Queue mode: publish one task per seed lead for workers started with src/worker.py.
+
+    Args:
+        input_path: CSV / JSONL file of seed leads, or "-" for stdin
+        queue_url: Queue URL (e.g. sqlite:///queue/autoreach.sqlite3)
+        campaign: Campaign id
+        input_format: "csv" or "jsonl" (default: from the file extension)
+        steps: Per-lead steps each lead goes through (default: enrichment, scoring)
+        max_leads: Stop after this many leads
+    """
+    builder = LangGraphBuilder()
+    records = read_records(input_path, input_format)
+    if max_leads is not None:
+        records = islice(records, max_leads)
+    published = builder.publish_tasks(open_queue(queue_url), campaign, records, step_ids=steps)
+    print(f"Published {published} tasks to campaign '{campaign}'")
+    return published
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AutoReach workflow")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip steps whose inputs and agent config match a stored checkpoint")
+    parser.add_argument("--from-step", metavar="STEP_ID",
+                        help="reuse checkpoints before STEP_ID and rerun it and every later step")
+    parser.add_argument("--checkpoint-dir", default="checkpoints",
+                        help="checkpoint store directory (default: checkpoints)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics on http://0.0.0.0:PORT/metrics while running")
+    parser.add_argument("--profile", metavar="MODES",
+                        type=lambda v: [m.strip() for m in v.split(",") if m.strip()],
+                        help=f"profile steps with comma-separated modes: {', '.join(PROFILE_MODES)} "
+                             "(artifacts in <run dir>/profiles)")
+    parser.add_argument("--profile-steps", metavar="STEP_IDS",
+                        type=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+                        help="comma-separated step ids to profile (default: all)")
+
+    bulk = parser.add_argument_group("bulk mode")
+    bulk.add_argument("--bulk", metavar="INPUT",
+                      help="headless bulk mode: read leads/ICPs from a CSV or JSONL file ('-' for stdin)")
+    bulk.add_argument("--input-format", choices=["csv", "jsonl"],
+                      help="input format (default: from the file extension, jsonl for stdin)")
+    bulk.add_argument("--kind", choices=["leads", "icps"], default="leads",
+                      help="records are seed leads or ICP definitions (default: leads)")
+    bulk.add_argument("--steps", type=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+                      help="comma-separated step ids to run (default: enrichment,scoring)")
+    bulk.add_argument("--workers", type=int, default=4, help="chunks processed concurrently (default: 4)")
+    bulk.add_argument("--max-leads", type=int, help="stop after this many leads")
+    bulk.add_argument("--batch-size", type=int, default=100, help="leads per chunk (default: 100)")
+    bulk.add_argument("--output-dir", help="directory for per-step JSONL output (default: runs/<timestamp>/bulk)")
+    bulk.add_argument("--top-k", type=int, default=100, help="size of the ranked shortlist (default: 100)")
+    bulk.add_argument("--processes", type=int,
+                      help="shard seed leads across this many worker processes (multi-process mode)")
+    bulk.add_argument("--shards", type=int, help="number of shards (default: --processes)")
+    bulk.add_argument("--shard-key", default="domain",
+                      help="lead field to shard on; 'domain' uses the email/company domain (default: domain)")
+    bulk.add_argument("--store", action="store_true",
+                      help="embed ranked leads in the workers and store them in Chroma (multi-process mode)")
+
+    queue = parser.add_argument_group("queue mode")
+    queue.add_argument("--publish", metavar="INPUT",
+                       help="publish per-lead tasks from a CSV or JSONL file ('-' for stdin) to the queue")
+    queue.add_argument("--queue", default="sqlite:///queue/autoreach.sqlite3",
+                       help="queue URL (default: sqlite:///queue/autoreach.sqlite3)")
+    queue.add_argument("--campaign", help="campaign id for --publish / --queue-stats / --queue-results")
+    queue.add_argument("--queue-stats", action="store_true", help="print task counts per step and status")
+    queue.add_argument("--queue-results", metavar="STEP_ID",
+                       help="write the results of a step's completed tasks to stdout as JSONL")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    results = run_workflow()
+    args = parse_args()
+    if args.metrics_port:
+        get_metrics().serve(args.metrics_port)
+    if args.publish or args.queue_stats or args.queue_results:
+        if not args.campaign:
+            sys.exit("--campaign is required in queue mode")
+        if args.publish:
+            publish_campaign(args.publish, args.queue, args.campaign, input_format=args.input_format,
+                             steps=args.steps, max_leads=args.max_leads)
+        if args.queue_stats:
+            print(json.dumps(open_queue(args.queue).stats(args.campaign), indent=2))
+        if args.queue_results:
+            for records in open_queue(args.queue).results(args.campaign, args.queue_results):
+                for record in records:
+                    print(json.dumps(record, default=str))
+        sys.exit(0)
+    if args.bulk and args.processes:
+        if args.kind != "leads":
+            sys.exit("--processes takes seed leads; run --kind icps without it")
+        run_sharded(args.bulk, input_format=args.input_format, steps=args.steps, processes=args.processes,
+                    shards=args.shards, shard_key=args.shard_key, workers=args.workers,
+                    max_leads=args.max_leads, batch_size=args.batch_size, output_dir=args.output_dir,
+                    store=args.store)
+        sys.exit(0)
+    if args.bulk:
+        run_bulk(args.bulk, input_format=args.input_format, kind=args.kind, steps=args.steps,
+                 workers=args.workers, max_leads=args.max_leads, batch_size=args.batch_size,
+                 output_dir=args.output_dir, top_k=args.top_k)
+        sys.exit(0)
+    results = run_workflow(resume=args.resume, from_step=args.from_step, checkpoint_dir=args.checkpoint_dir,
+                           profile_modes=args.profile, profile_steps=args.profile_steps)
     print("\nFinal outputs by step:")
     for step, data in results.items():
-        print(f"{step}: {data['output']}")
+        print(f"{step}: {StepOutputStore.summarize(data['output'])}")
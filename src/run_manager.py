@@ -0,0 +1,261 @@
+# src/run_manager.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from src.logger import get_logger
+from utils.metrics import MetricsRegistry, count_items, get_metrics
+from utils.step_output_store import StepOutputStore
+
+logger = get_logger(__name__)
+
+
+class RunCancelled(Exception):
+    """Raised inside a run when its cancel flag is set."""
+
+
+class WorkflowRun:
+    """
+    State of one background workflow run. Written by the executing thread and
+    read by the UI through snapshot(); every field is guarded by one lock.
+    """
+
+    def __init__(self, run_id: str, label: str, step_ids: list, run_dir: str):
+        self.run_id = run_id
+        self.label = label
+        self.run_dir = run_dir
+        self.status = "queued"
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.outputs = {}
+        self.metrics = MetricsRegistry()
+        self.steps = {step_id: {"status": "pending", "items_done": 0, "items_total": None,
+                                "started_at": None, "finished_at": None} for step_id in step_ids}
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # ----------------------
+    # Updates (executing thread)
+    # ----------------------
+    def set_status(self, status: str, error: str = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            if status == "running":
+                self.started_at = time.time()
+            elif status in ("completed", "failed", "cancelled"):
+                self.finished_at = time.time()
+
+    def update_step(self, step_id: str, **fields):
+        with self._lock:
+            step = self.steps[step_id]
+            if fields.get("status") == "running":
+                step["started_at"] = time.time()
+            elif fields.get("status") in ("completed", "failed", "skipped", "cancelled"):
+                step["finished_at"] = time.time()
+            step.update(fields)
+
+    def add_items(self, step_id: str, count: int):
+        with self._lock:
+            self.steps[step_id]["items_done"] += count
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise RunCancelled(f"Run {self.run_id} cancelled")
+
+    # ----------------------
+    # Reads (UI thread)
+    # ----------------------
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    @staticmethod
+    def _progress(step: dict, now: float) -> dict:
+        """Add elapsed seconds, items/s and ETA to a step's counters."""
+        progress = dict(step)
+        if step["started_at"] is None:
+            return progress
+        elapsed = (step["finished_at"] or now) - step["started_at"]
+        progress["elapsed_seconds"] = round(elapsed, 1)
+        if step["items_done"] and elapsed > 0:
+            rate = step["items_done"] / elapsed
+            progress["items_per_second"] = round(rate, 1)
+            if step["items_total"] and step["status"] == "running":
+                progress["eta_seconds"] = round((step["items_total"] - step["items_done"]) / rate, 1)
+        return progress
+
+    def snapshot(self) -> dict:
+        """Consistent copy of the run state with per-step rate and ETA."""
+        now = time.time()
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "label": self.label,
+                "status": self.status,
+                "error": self.error,
+                "cancel_requested": self._cancel.is_set(),
+                "submitted_at": self.submitted_at,
+                "elapsed_seconds": round((self.finished_at or now) - self.started_at, 1) if self.started_at else 0,
+                "steps": {step_id: self._progress(step, now) for step_id, step in self.steps.items()}
+            }
+
+
+class RunManager:
+    """
+    Runs workflows in the background for the dashboard.
+    One instance per server process (held in st.cache_resource) owns the thread
+    pool, the LangGraphBuilder and the ChromaStore, so runs from several
+    sessions execute side by side without blocking the page scripts.
+    Per-lead steps are fed to their agent in chunks, which gives live progress
+    (items done, rate, ETA) and lets a cancel take effect between chunks; other
+    steps report progress once they finish.
+    """
+
+    def __init__(self, builder, chroma_store=None, max_workers: int = 4, chunk_size: int = 100,
+                 runs_dir: str = "runs", keep_runs: int = 50):
+        """
+        Initialize RunManager.
+
+        Args:
+            builder: Loaded LangGraphBuilder (each run gets its own agent instances)
+            chroma_store: ChromaStore receiving prospect_search / enrichment / scoring output
+            max_workers: Runs executing at the same time; later runs queue
+            chunk_size: Leads per agent call in per-lead steps
+            runs_dir: Parent directory of the per-run artifact directories
+            keep_runs: Finished runs kept in memory for the UI
+        """
+        self.builder = builder
+        self.chroma_store = chroma_store
+        self.chunk_size = max(1, int(chunk_size))
+        self.runs_dir = runs_dir
+        self.keep_runs = keep_runs
+        self.runs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="workflow-run")
+        self._chunked_steps = {step["id"] for step in builder.get_batch_steps()}
+
+    # ----------------------
+    # Public API
+    # ----------------------
+    def submit(self, label: str = None) -> str:
+        """Queue a workflow run and return its id."""
+        started = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id = f"{started}_{uuid.uuid4().hex[:6]}"
+        # Picks up workflow.json edits; the run keeps the plan it was submitted with
+        plan = self.builder.get_plan()
+        run = WorkflowRun(run_id, label or run_id, plan.step_ids, os.path.join(self.runs_dir, run_id))
+        with self._lock:
+            self.runs[run_id] = run
+            self._prune()
+        self._pool.submit(self._execute, run, plan)
+        return run_id
+
+    def get(self, run_id: str):
+        with self._lock:
+            return self.runs.get(run_id)
+
+    def cancel(self, run_id: str) -> bool:
+        run = self.get(run_id)
+        if run is None or run.done:
+            return False
+        run.cancel()
+        return True
+
+    def _prune(self):
+        """Drop the oldest finished runs beyond keep_runs (caller holds the lock)."""
+        finished = [run for run in self.runs.values() if run.done]
+        for run in sorted(finished, key=lambda r: r.submitted_at)[:max(0, len(finished) - self.keep_runs)]:
+            del self.runs[run.run_id]
+
+    # ----------------------
+    # Execution (pool threads)
+    # ----------------------
+    def _run_chunked(self, run: WorkflowRun, step_id: str, agent, inputs: dict) -> dict:
+        """Feed a per-lead step its leads chunk by chunk, counting progress and honouring cancel."""
+        leads = inputs.pop(agent.batch_input)
+        total = len(leads)
+        run.update_step(step_id, items_total=total)
+        records = []
+        iterator = iter(leads)
+        for chunk in iter(lambda: list(islice(iterator, self.chunk_size)), []):
+            run.check_cancelled()
+            output = agent.run(**{agent.batch_input: chunk}, **inputs)
+            records.extend(output.get(agent.batch_output) or [])
+            run.add_items(step_id, len(chunk))
+        # Ranking steps sort within a call; restore the global order
+        rank_key = getattr(agent, "rank_key", None)
+        if rank_key is not None:
+            records.sort(key=rank_key)
+        return {agent.batch_output: records}
+
+    def _execute(self, run: WorkflowRun, plan):
+        output_store = StepOutputStore(os.path.join(run.run_dir, "outputs"), **plan.config.get("step_outputs", {}))
+        run.set_status("running")
+        current = None
+        try:
+            for planned in plan.steps:
+                step_id = current = planned.id
+                run.check_cancelled()
+                # Per-run instance, so concurrent runs never share agent state (e.g. stream_stats)
+                agent = self.builder.create_agent(step_id, plan)
+                if agent is None:
+                    run.update_step(step_id, status="skipped", error="agent not initialized")
+                    continue
+
+                run.update_step(step_id, status="running")
+                inputs = planned.resolve_inputs(run.outputs)
+                chunked = step_id in self._chunked_steps and inputs.get(agent.batch_input)
+                try:
+                    # Recorded in the run's own registry and the process-wide one
+                    with run.metrics.step_timer(step_id, planned.agent_name, per_thread=True) as timer, \
+                            get_metrics().step_timer(step_id, planned.agent_name, per_thread=True) as shared:
+                        result = self._run_chunked(run, step_id, agent, inputs) if chunked else agent.run(**inputs)
+                        problems = planned.check_output(result)
+                        if problems:
+                            logger.warning("Run %s: step '%s' output does not match its output_schema: %s",
+                                           run.run_id, step_id, problems)
+                        output = output_store.put(step_id, result)
+                        timer["items"] = shared["items"] = count_items(output)
+                except RunCancelled:
+                    raise
+                except Exception as e:
+                    run.update_step(step_id, status="failed", error=str(e))
+                    logger.error("Run %s: error in step '%s': %s", run.run_id, step_id, e)
+                    continue
+
+                run.outputs[step_id] = {"output": output}
+                if not chunked:
+                    run.update_step(step_id, items_done=count_items(output))
+                run.update_step(step_id, status="completed", summary=StepOutputStore.summarize(output))
+                self._store(step_id, output)
+            run.set_status("completed")
+        except RunCancelled:
+            if current:
+                run.update_step(current, status="cancelled")
+            run.set_status("cancelled")
+        except Exception as e:
+            logger.exception("Run %s failed: %s", run.run_id, e)
+            run.set_status("failed", str(e))
+        finally:
+            run.metrics.write(run.run_dir)
+
+    def _store(self, step_id: str, output):
+        """Persist search and enrichment results (and the scores of enriched leads) in Chroma."""
+        if self.chroma_store is None or not isinstance(output, dict):
+            return
+        if step_id == "prospect_search" and output.get("leads"):
+            self.chroma_store.store_leads(output["leads"])
+        elif step_id == "enrichment" and output.get("enriched_leads"):
+            self.chroma_store.store_enriched_leads(output["enriched_leads"])
+        elif step_id == "scoring" and output.get("ranked_leads"):
+            self.chroma_store.update_scores(output["ranked_leads"])
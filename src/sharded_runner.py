@@ -0,0 +1,236 @@
+# src/sharded_runner.py
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from agents.scoring_agent import ScoringAgent
+from src.bulk_runner import BulkRunner, read_records
+from src.logger import get_logger
+from utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+def shard_value(lead: dict, shard_key: str = "domain") -> str:
+    """
+    Value a lead is sharded on.
+    "domain" uses the email domain, then the website / domain field, then the
+    company name, so every contact of one company lands in the same shard.
+    """
+    if shard_key == "domain":
+        email = lead.get("email") or ""
+        if "@" in email:
+            return email.rsplit("@", 1)[1].strip().lower()
+        for field in ("domain", "website", "company"):
+            if lead.get(field):
+                return str(lead[field]).strip().lower()
+        return ""
+    return str(lead.get(shard_key, "")).strip().lower()
+
+
+def shard_index(value: str, shards: int) -> int:
+    """Stable shard number for a key value (independent of PYTHONHASHSEED)."""
+    return int(hashlib.sha1(value.encode("utf-8")).hexdigest()[:8], 16) % shards
+
+
+def _read_jsonl(path: str):
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _run_shard(task: dict) -> dict:
+    """
+    Worker process entry point: run one shard through the per-lead steps with
+    its own agents, then sort the scored leads and (optionally) embed them.
+    """
+    from langgraph_builder import LangGraphBuilder
+    from utils.rate_limiter import get_rate_limiter
+
+    # Pool processes are reused across shards; report each shard on its own
+    get_metrics().reset()
+    builder = LangGraphBuilder(task["workflow_file"])
+    # Every process gets an equal slice of each provider's rate budget
+    get_rate_limiter().set_share(1.0 / task["processes"])
+
+    runner = BulkRunner(builder, task["output_dir"], workers=task["threads"],
+                        batch_size=task["batch_size"], steps=task["steps"], top_k=0)
+    summary = runner.run(read_records(task["input_path"], "jsonl"))
+    summary["shard"] = task["shard"]
+
+    scored_path = os.path.join(task["output_dir"], "scoring.jsonl")
+    if os.path.exists(scored_path):
+        ranked = sorted(_read_jsonl(scored_path), key=ScoringAgent.rank_key)
+        with open(os.path.join(task["output_dir"], "ranked.jsonl"), "w") as f:
+            for lead in ranked:
+                f.write(json.dumps(lead, default=str) + "\n")
+
+        if task["embed"]:
+            from utils.chroma_store import ChromaStore
+            with open(os.path.join(task["output_dir"], "embeddings.jsonl"), "w") as f:
+                for start in range(0, len(ranked), task["batch_size"]):
+                    ids, documents, metadatas = ChromaStore.enriched_records(ranked[start:start + task["batch_size"]])
+                    for record in zip(ids, documents, metadatas, ChromaStore.embed_documents(documents)):
+                        f.write(json.dumps(dict(zip(("id", "document", "metadata", "embedding"), record))) + "\n")
+
+    # Shipped back to the parent, which merges all shards into one report
+    summary["metrics"] = get_metrics().snapshot()
+    return summary
+
+
+class ShardedRunner:
+    """
+    Multi-process campaign runner.
+    Leads are partitioned into shards by a stable hash of the shard key (company
+    domain by default, so per-domain throttling still holds inside one process),
+    each shard runs the per-lead steps in its own process with its own agents,
+    and shard outputs are merged in a fixed order: step files are concatenated
+    by shard number and the ranking is a k-way merge on ScoringAgent.rank_key.
+    CPU-bound work (scoring, JSON parsing, embedding for Chroma) therefore
+    scales with the number of processes instead of sharing one GIL.
+    """
+
+    def __init__(self, workflow_file: str, output_dir: str, processes: int = None, shards: int = None,
+                 shard_key: str = "domain", threads: int = 4, batch_size: int = 100,
+                 steps: list = None, store: bool = False):
+        """
+        Initialize ShardedRunner.
+
+        Args:
+            workflow_file: workflow.json path (each worker builds its own agents)
+            output_dir: Directory for shard work files and merged output
+            processes: Worker processes (default: CPU count)
+            shards: Number of shards (default: processes)
+            shard_key: "domain" or any lead field to shard on
+            threads: Concurrent chunks inside each worker (I/O-bound steps)
+            batch_size: Leads per chunk
+            steps: Step ids to run (default: enrichment, scoring)
+            store: Embed ranked leads in the workers and store them in Chroma
+        """
+        self.workflow_file = os.path.abspath(workflow_file)
+        self.output_dir = output_dir
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        self.shards = max(1, int(shards or self.processes))
+        self.shard_key = shard_key
+        self.threads = threads
+        self.batch_size = batch_size
+        self.steps = steps
+        self.store = store
+
+    def _shard_dir(self, shard: int) -> str:
+        return os.path.join(self.output_dir, "shards", f"shard-{shard:03d}")
+
+    def _partition(self, records, max_leads: int = None) -> list:
+        """Stream leads into one JSONL input file per shard. Returns lead counts per shard."""
+        counts = [0] * self.shards
+        handles = []
+        try:
+            for shard in range(self.shards):
+                os.makedirs(self._shard_dir(shard), exist_ok=True)
+                handles.append(open(os.path.join(self._shard_dir(shard), "input.jsonl"), "w"))
+            for lead in islice(records, max_leads):
+                shard = shard_index(shard_value(lead, self.shard_key), self.shards)
+                handles[shard].write(json.dumps(lead, default=str) + "\n")
+                counts[shard] += 1
+        finally:
+            for handle in handles:
+                handle.close()
+        return counts
+
+    def _merge(self, step_ids: list):
+        """Concatenate per-shard step files and k-way merge the ranked leads."""
+        for step_id in step_ids + ["errors"]:
+            with open(os.path.join(self.output_dir, f"{step_id}.jsonl"), "wb") as out:
+                for shard in range(self.shards):
+                    path = os.path.join(self._shard_dir(shard), f"{step_id}.jsonl")
+                    if os.path.exists(path):
+                        with open(path, "rb") as f:
+                            shutil.copyfileobj(f, out)
+
+        ranked_paths = [os.path.join(self._shard_dir(shard), "ranked.jsonl") for shard in range(self.shards)]
+        if any(os.path.exists(path) for path in ranked_paths):
+            with open(os.path.join(self.output_dir, "ranked.jsonl"), "w") as out:
+                streams = [_read_jsonl(path) for path in ranked_paths]
+                for lead in heapq.merge(*streams, key=ScoringAgent.rank_key):
+                    out.write(json.dumps(lead, default=str) + "\n")
+
+    def _store(self) -> int:
+        """Write worker-computed embeddings to Chroma in shard order; returns the number of new records."""
+        from utils.chroma_store import ChromaStore
+
+        chroma_store = ChromaStore()
+        stored = 0
+        for shard in range(self.shards):
+            records = _read_jsonl(os.path.join(self._shard_dir(shard), "embeddings.jsonl"))
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                stored += chroma_store.add_enriched_records([r["id"] for r in batch], [r["document"] for r in batch],
+                                                            [r["metadata"] for r in batch],
+                                                            [r["embedding"] for r in batch])
+        return stored
+
+    def run(self, records, max_leads: int = None) -> dict:
+        """
+        Partition, process and merge.
+
+        Args:
+            records: Iterable of seed lead dicts
+            max_leads: Stop after this many leads
+
+        Returns:
+            dict: run summary with per-shard summaries
+        """
+        started = time.time()
+        os.makedirs(self.output_dir, exist_ok=True)
+        counts = self._partition(records, max_leads)
+        logger.info("Partitioned %d leads into %d shards by %s", sum(counts), self.shards, self.shard_key)
+
+        tasks = [{
+            "shard": shard,
+            "workflow_file": self.workflow_file,
+            "input_path": os.path.join(self._shard_dir(shard), "input.jsonl"),
+            "output_dir": self._shard_dir(shard),
+            "steps": self.steps,
+            "threads": self.threads,
+            "batch_size": self.batch_size,
+            "processes": min(self.processes, self.shards),
+            "embed": self.store
+        } for shard in range(self.shards) if counts[shard]]
+
+        # spawn: workers build fresh agents / connection pools instead of inheriting ours
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(tasks) or 1), mp_context=context) as pool:
+            shard_summaries = sorted(pool.map(_run_shard, tasks), key=lambda s: s["shard"])
+
+        metrics = get_metrics()
+        for shard_summary in shard_summaries:
+            metrics.merge(shard_summary.pop("metrics"))
+        step_ids = sorted({step_id for s in shard_summaries for step_id in s["records_out"]})
+        self._merge(step_ids)
+        stored = self._store() if self.store else 0
+        metrics.write(self.output_dir)
+
+        elapsed = time.time() - started
+        return {
+            "leads_in": sum(counts),
+            "shards": self.shards,
+            "processes": self.processes,
+            "records_out": {step_id: sum(s["records_out"].get(step_id, 0) for s in shard_summaries)
+                            for step_id in step_ids},
+            "failed_chunks": sum(s["failed_chunks"] for s in shard_summaries),
+            "stored": stored,
+            "elapsed_seconds": round(elapsed, 2),
+            "leads_per_second": round(sum(counts) / elapsed, 1) if elapsed > 0 else None,
+            "output_dir": self.output_dir
+        }
@@ -0,0 +1,155 @@
+# src/worker.py
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langgraph_builder import LangGraphBuilder
+from src.logger import get_logger
+from utils.metrics import get_metrics
+from utils.work_queue import open_queue
+
+logger = get_logger(__name__)
+
+
+class QueueWorker:
+    """
+    Worker for queue mode: claims per-lead tasks with a lease, runs the step's
+    agent on the lead, and acknowledges the task together with the follow-up
+    task for the next step. A heartbeat thread keeps leases alive while tasks
+    are processed; if the process dies, its leases expire and the tasks are
+    redelivered to another worker.
+    """
+
+    def __init__(self, builder: LangGraphBuilder, queue, campaign: str, worker_id: str = None,
+                 batch: int = 10, lease_seconds: float = 60, poll_interval: float = 2.0):
+        """
+        Initialize QueueWorker.
+
+        Args:
+            builder: Loaded LangGraphBuilder (agents + workflow)
+            queue: QueueBackend to claim from
+            campaign: Campaign id to work on
+            worker_id: Unique worker name (default: <hostname>-<pid>)
+            batch: Tasks claimed per round trip
+            lease_seconds: Lease length; heartbeats renew it every lease_seconds / 3
+            poll_interval: Sleep between empty claims
+        """
+        self.builder = builder
+        self.queue = queue
+        self.campaign = campaign
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch = batch
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.stats = {"done": 0, "failed": 0, "lost_leases": 0}
+
+        self._held = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._static_inputs = {}
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._held_lock:
+                held = list(self._held)
+            if held:
+                self.queue.heartbeat(self.worker_id, held, self.lease_seconds)
+
+    def _process(self, task: dict):
+        step_id = task["step_id"]
+        payload = task["payload"]
+        try:
+            # Agents are initialized the first time a task of their step is claimed
+            agent = self.builder.get_agent(step_id)
+            if agent is None:
+                raise ValueError(f"Agent for step '{step_id}' is not initialized")
+            if step_id not in self._static_inputs:
+                self._static_inputs[step_id] = self.builder.get_static_inputs(step_id)
+            with get_metrics().step_timer(step_id, type(agent).__name__) as timer:
+                output = agent.run(**{agent.batch_input: [payload["lead"]]}, **self._static_inputs[step_id])
+                records = list(output.get(agent.batch_output) or [])
+                timer["items"] = len(records)
+        except Exception as e:
+            logger.error("Worker %s: task %s (%s) failed: %s", self.worker_id, task["id"], step_id, e)
+            # Back off a little longer on every attempt
+            self.queue.nack(self.worker_id, task["id"], str(e), retry_delay=min(300, 5 * task["attempts"]))
+            self.stats["failed"] += 1
+            return
+
+        next_steps = payload.get("next_steps", [])
+        follow_up = [(next_steps[0], {"lead": record, "next_steps": next_steps[1:]})
+                     for record in records] if next_steps else []
+        if self.queue.ack(self.worker_id, task["id"], result=records, follow_up=follow_up):
+            self.stats["done"] += 1
+        else:
+            self.stats["lost_leases"] += 1
+
+    def run(self, max_tasks: int = None, exit_when_idle: bool = False) -> dict:
+        """
+        Claim and process tasks until stopped.
+
+        Args:
+            max_tasks: Stop after this many tasks
+            exit_when_idle: Return when no task is available instead of polling
+
+        Returns:
+            dict: done / failed / lost_leases counters
+        """
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        processed = 0
+        try:
+            while not self._stop.is_set() and (max_tasks is None or processed < max_tasks):
+                limit = self.batch if max_tasks is None else min(self.batch, max_tasks - processed)
+                tasks = self.queue.claim(self.worker_id, self.campaign, limit=limit, lease_seconds=self.lease_seconds)
+                if not tasks:
+                    if exit_when_idle:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                with self._held_lock:
+                    self._held.update(task["id"] for task in tasks)
+                for task in tasks:
+                    self._process(task)
+                    with self._held_lock:
+                        self._held.discard(task["id"])
+                    processed += 1
+        finally:
+            self._stop.set()
+        return self.stats
+
+    def stop(self):
+        self._stop.set()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AutoReach queue worker")
+    parser.add_argument("--queue", default="sqlite:///queue/autoreach.sqlite3",
+                        help="queue URL (default: sqlite:///queue/autoreach.sqlite3)")
+    parser.add_argument("--campaign", required=True, help="campaign id to work on")
+    parser.add_argument("--worker-id", help="unique worker name (default: <hostname>-<pid>)")
+    parser.add_argument("--batch", type=int, default=10, help="tasks claimed per round trip (default: 10)")
+    parser.add_argument("--lease", type=float, default=60, help="lease length in seconds (default: 60)")
+    parser.add_argument("--max-tasks", type=int, help="exit after this many tasks")
+    parser.add_argument("--exit-when-idle", action="store_true", help="exit when the queue has no work")
+    parser.add_argument("--workflow", default="workflow.json", help="workflow file (default: workflow.json)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    parser.add_argument("--metrics-dir", help="write metrics.json / metrics.prom here on exit")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.metrics_port:
+        get_metrics().serve(args.metrics_port)
+    worker = QueueWorker(LangGraphBuilder(args.workflow), open_queue(args.queue), args.campaign,
+                         worker_id=args.worker_id, batch=args.batch, lease_seconds=args.lease)
+    logger.info("Worker %s: working on campaign '%s'", worker.worker_id, args.campaign)
+    stats = worker.run(max_tasks=args.max_tasks, exit_when_idle=args.exit_when_idle)
+    logger.info("Worker %s: stopped: %s", worker.worker_id, stats, extra={"stats": stats})
+    if args.metrics_dir:
+        get_metrics().write(args.metrics_dir)
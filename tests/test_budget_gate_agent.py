@@ -0,0 +1,53 @@
+import pytest
+
+from agents.budget_gate_agent import BudgetGateAgent
+
+TIMING = {"seconds_per_llm_call": 3.0, "seconds_per_send": 0.5}
+
+
+def make_leads(count, role="CTO"):
+    return [{"contact": f"Lead {i}", "company": f"Co {i}", "role": role, "technologies": ["python"],
+             "total_score": 0.9} for i in range(count)]
+
+
+def test_template_mode_prices_one_call_per_cluster_chunk():
+    leads = make_leads(25)
+    per_lead = BudgetGateAgent(**TIMING).run(leads)["budget_report"]
+    template = BudgetGateAgent(generation_mode="template", template_reuse_cap=25, **TIMING).run(leads)["budget_report"]
+
+    assert template["generation_mode"] == "template"
+    assert template["expected_sends"] == per_lead["expected_sends"] == 25
+    # One template call instead of 25 per-lead calls
+    assert template["expected_llm_tokens"] * 10 < per_lead["expected_llm_tokens"]
+    assert template["expected_seconds"] == pytest.approx(3.0 + 25 * 0.5, abs=0.1)
+
+
+def test_template_mode_pays_again_past_the_reuse_cap():
+    leads = make_leads(10)
+    one_chunk = BudgetGateAgent(generation_mode="template", template_reuse_cap=10, **TIMING).run(leads)
+    two_chunks = BudgetGateAgent(generation_mode="template", template_reuse_cap=5, **TIMING).run(leads)
+
+    assert two_chunks["budget_report"]["expected_llm_tokens"] > one_chunk["budget_report"]["expected_llm_tokens"]
+
+
+def test_batch_mode_shares_calls_across_the_batch():
+    leads = make_leads(20)
+    per_lead = BudgetGateAgent(**TIMING).run(leads)["budget_report"]
+    batch = BudgetGateAgent(generation_mode="batch", batch_size=10, **TIMING).run(leads)["budget_report"]
+
+    assert batch["expected_llm_tokens"] < per_lead["expected_llm_tokens"]
+    assert batch["expected_seconds"] == pytest.approx(2 * 3.0 + 20 * 0.5, abs=0.1)
+
+
+def test_cheaper_mode_fits_more_leads_in_the_same_budget():
+    leads = make_leads(25)
+    budget = {"max_llm_tokens": 2000}
+    per_lead = BudgetGateAgent(**TIMING).run(leads, budget)
+    template = BudgetGateAgent(generation_mode="template", **TIMING).run(leads, budget)
+
+    assert len(template["ranked_leads"]) > len(per_lead["ranked_leads"])
+
+
+def test_unknown_generation_mode_is_rejected():
+    with pytest.raises(ValueError, match="generation_mode"):
+        BudgetGateAgent(generation_mode="bulk")
@@ -0,0 +1,16 @@
+from utils.chroma_store import ChromaStore
+
+
+def test_add_enriched_records_counts_only_new_ids(tmp_path):
+    store = ChromaStore(persist_dir=str(tmp_path))
+    metadata = {"company": "ExampleCorp", "contact": "Jane", "role": "CTO", "score": 0.5}
+
+    added = store.add_enriched_records(["a", "b"], ["doc a", "doc b"], [metadata, metadata],
+                                       [[1.0, 0.0], [0.0, 1.0]])
+    assert added == 2
+
+    # "b" is already stored and "c" is repeated within the batch
+    added = store.add_enriched_records(["b", "c", "c"], ["doc b", "doc c", "doc c"], [metadata] * 3,
+                                       [[0.0, 1.0], [1.0, 1.0], [1.0, 1.0]])
+    assert added == 1
+    assert store.lead_index.count() == 3
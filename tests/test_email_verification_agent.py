@@ -0,0 +1,72 @@
+import pytest
+
+import agents.email_verification_agent as verification_module
+from agents.email_verification_agent import EmailVerificationAgent
+
+HUNTER_RESULTS = {
+    "ok@good.com": {"data": {"status": "valid", "mx_records": True}},
+    "bad@good.com": {"data": {"status": "invalid", "mx_records": True}},
+    "any@catchall.com": {"data": {"status": "accept_all", "accept_all": True}},
+}
+
+
+@pytest.fixture(autouse=True)
+def hunter(monkeypatch):
+    def email_verifier(email, api_key=None):
+        if email not in HUNTER_RESULTS:
+            raise ConnectionError("hunter unavailable")
+        return HUNTER_RESULTS[email]
+    monkeypatch.setattr(verification_module, "email_verifier", email_verifier)
+
+
+def make_agent(tmp_path, **kwargs):
+    kwargs.setdefault("api_key", "test")
+    return EmailVerificationAgent(cache_path=str(tmp_path / "verification.sqlite3"), **kwargs)
+
+
+def messages(*emails):
+    return [{"lead": email.split("@")[0], "email": email} for email in emails]
+
+
+def recipients(items):
+    return [item["email"] for item in items]
+
+
+def test_inconclusive_verdicts_are_held_as_unknown(tmp_path):
+    result = make_agent(tmp_path).run(messages("ok@good.com", "bad@good.com", "any@catchall.com", "x@down.com"))
+    assert recipients(result["messages"]) == ["ok@good.com"]
+    assert recipients(result["rejected"]) == ["bad@good.com"]
+    assert recipients(result["unknown"]) == ["any@catchall.com", "x@down.com"]
+    assert [m["verification"]["status"] for m in result["unknown"]] == ["accept_all", "error"]
+    assert result["summary"]["unknown"] == 2
+
+
+def test_send_unknown_lets_inconclusive_verdicts_through(tmp_path):
+    result = make_agent(tmp_path, send_unknown=True).run(messages("ok@good.com", "any@catchall.com", "x@down.com"))
+    assert recipients(result["messages"]) == ["ok@good.com", "any@catchall.com", "x@down.com"]
+    assert result["unknown"] == []
+
+
+@pytest.mark.parametrize("policy, sent, held", [("pass_through", 2, 0), ("hold", 0, 2)])
+def test_missing_key_policy(tmp_path, policy, sent, held):
+    result = make_agent(tmp_path, api_key=None, missing_key_policy=policy).run(messages("a@b.com", "c@d.com"))
+    assert len(result["messages"]) == sent
+    assert len(result["unknown"]) == held
+    assert result["summary"]["unverified"] == 2
+
+
+def test_builder_accepts_missing_hunter_key(monkeypatch, tmp_path):
+    from langgraph_builder import LangGraphBuilder
+
+    monkeypatch.delenv("HUNTER_API_KEY", raising=False)
+    builder = LangGraphBuilder()
+    monkeypatch.chdir(tmp_path)
+    agent = builder.create_agent("email_verification")
+    assert isinstance(agent, EmailVerificationAgent)
+    assert agent.api_key is None
+
+
+def test_missing_key_holds_by_default(tmp_path):
+    result = make_agent(tmp_path, api_key=None).run(messages("guessed@example.com"))
+    assert result["messages"] == []
+    assert result["unknown"][0]["verification"]["status"] == "unverified"
@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from langgraph_builder import LangGraphBuilder
+from utils.http_client import HttpTransport, get_transport
+from utils.rate_limiter import get_rate_limiter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workflow_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "workflow.json"
+    shutil.copyfile(os.path.join(REPO_ROOT, "workflow.json"), path)
+    return path
+
+
+def rewrite(path, edit=None):
+    """Rewrite workflow.json (optionally edited) with a newer mtime, as an operator would."""
+    workflow = json.loads(path.read_text())
+    if edit:
+        edit(workflow)
+    stat = os.stat(path)
+    path.write_text(json.dumps(workflow))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_keeps_running_plan_agents_transport_and_limits(workflow_file, monkeypatch):
+    closed = []
+    monkeypatch.setattr(HttpTransport, "close", lambda self: closed.append(self))
+    builder = LangGraphBuilder(str(workflow_file))
+    plan = builder.get_plan()
+    agent = builder.get_agent("scoring", plan)
+    transport = get_transport()
+    policy = get_rate_limiter().policy("apollo")
+
+    rewrite(workflow_file, lambda w: w.update(description="edited"))
+    new_plan = builder.get_plan()
+    assert new_plan is not plan
+    # A run still holding the old plan keeps its agents
+    assert builder.get_agent("scoring", plan) is agent
+    assert builder.get_agent("scoring", new_plan) is not agent
+    # Unchanged http / rate limit settings are left alone
+    assert get_transport() is transport
+    assert get_rate_limiter().policy("apollo") is policy
+
+    rewrite(workflow_file, lambda w: w["config"]["http"].update(read_timeout=31))
+    builder.get_plan()
+    assert get_transport() is not transport
+    # The old transport may still serve in-flight requests, so it is never closed
+    assert closed == []
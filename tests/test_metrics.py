@@ -0,0 +1,18 @@
+from utils.metrics import MetricsRegistry
+
+
+def test_long_steps_get_numeric_quantiles():
+    metrics = MetricsRegistry()
+    for wall in (95.0, 250.0, 290.0, 310.0):
+        metrics.record_step("outreach_content", wall, 1.0, 100)
+    step = metrics.report()["steps"]["outreach_content"]
+    assert step["p50_seconds"] == 300.0
+    assert step["p95_seconds"] == 600.0
+    assert isinstance(step["p99_seconds"], float)
+    assert "step_duration_seconds_bucket" in metrics.to_prometheus()
+
+
+def test_quantile_beyond_last_bucket_is_none():
+    metrics = MetricsRegistry()
+    metrics.observe("external_call_duration_seconds", 120.0, endpoint="apollo", operation="request")
+    assert metrics.report()["endpoints"]["apollo"]["p95_seconds"] is None
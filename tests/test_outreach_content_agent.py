@@ -0,0 +1,45 @@
+import itertools
+
+from agents.outreach_content_agent import COMPANY_PLACEHOLDER, NAME_PLACEHOLDER, OutreachContentAgent
+
+
+def make_agent(tmp_path, **kwargs):
+    agent = OutreachContentAgent(api_key="test", cache_path=str(tmp_path / "llm.sqlite3"), **kwargs)
+    counter = itertools.count()
+    agent._call_llm = lambda prompt, *args, **kw: f"Hi {NAME_PLACEHOLDER} at {COMPANY_PLACEHOLDER}, #{next(counter)}"
+    return agent
+
+
+def leads(n):
+    return [{"contact": f"Person {i}", "company": f"Co {i}", "role": "Sales Manager", "technologies": ["Salesforce"]}
+            for i in range(n)]
+
+
+def template_ids(messages):
+    return {message["email_body"].rsplit("#", 1)[1] for message in messages}
+
+
+def test_cached_templates_respect_reuse_cap(tmp_path):
+    agent = make_agent(tmp_path, generation_mode="template", template_reuse_cap=10)
+
+    first = agent.run(leads(25))["messages"]
+    # One cluster of 25 leads with a cap of 10 -> three chunks, three distinct templates
+    assert len(template_ids(first)) == 3
+
+    # A rerun is served from the cache, still one template per chunk
+    second = agent.run(leads(25))["messages"]
+    assert template_ids(second) == template_ids(first)
+
+
+def test_batch_bodies_are_not_served_to_single_prompt_mode(tmp_path):
+    agent = make_agent(tmp_path, generation_mode="batch")
+    agent._request_batch = lambda prompts: {lead_id: f"batch body {lead_id}" for lead_id in prompts}
+    batch = agent.run(leads(3))["messages"]
+    assert all(message["email_body"].startswith("batch body") for message in batch)
+
+    # The per-lead mode uses SYSTEM_PROMPT, so it must not reuse the batch-prompt bodies
+    per_lead = agent.run(leads(3), generation_mode="per_lead")["messages"]
+    assert not any(message["email_body"].startswith("batch body") for message in per_lead)
+    # ...while a batch rerun is served from its own cache entries
+    agent._request_batch = lambda prompts: {}
+    assert agent.run(leads(3))["messages"] == batch
@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+
+import agents.outreach_executor_agent as executor_module
+from agents.outreach_executor_agent import OutreachExecutorAgent
+
+
+class FakeBrevo:
+    """Stands in for the shared transport; fails sends to the addresses in `failing`."""
+
+    def __init__(self):
+        self.sent = []
+        self.failing = set()
+        self.ids = itertools.count()
+
+    def post(self, url, json=None, **kwargs):
+        email = json["to"][0]["email"]
+        if email in self.failing:
+            raise ConnectionError("brevo unavailable")
+        self.sent.append(email)
+        return FakeResponse({"messageId": f"<{next(self.ids)}@brevo>"})
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def brevo(monkeypatch):
+    fake = FakeBrevo()
+    monkeypatch.setattr(executor_module, "get_transport", lambda: fake)
+    return fake
+
+
+def messages(n):
+    return [{"lead": f"Person {i}", "email": f"p{i}@example.com", "subject": "Hello", "email_body": "Hi there"}
+            for i in range(n)]
+
+
+def test_resumed_batch_skips_delivered_messages(tmp_path, brevo):
+    agent = OutreachExecutorAgent(api_key="test", ledger_path=str(tmp_path / "ledger.sqlite3"))
+    brevo.failing = {"p1@example.com"}
+    first = agent.run(messages(3))
+    assert [s["status"] for s in first["sent_status"]] == ["sent", "failed", "sent"]
+    assert not agent.checkpointable(first)
+
+    brevo.failing = set()
+    resumed = agent.run(messages(3))
+    assert [s["status"] for s in resumed["sent_status"]] == ["skipped_duplicate", "sent", "skipped_duplicate"]
+    assert brevo.sent == ["p0@example.com", "p2@example.com", "p1@example.com"]
+    # The resumed batch keeps its original campaign, so replies are tracked together
+    assert resumed["campaign_id"] == first["campaign_id"]
+    assert agent.checkpointable(resumed)
+
+
+def test_later_campaign_sends_again(tmp_path, brevo):
+    agent = OutreachExecutorAgent(api_key="test", ledger_path=str(tmp_path / "ledger.sqlite3"))
+    agent.run(messages(2), campaign_id="spring")
+    later = agent.run(messages(2), campaign_id="summer")
+    assert [s["status"] for s in later["sent_status"]] == ["sent", "sent"]
+    assert {s["campaign_id"] for s in later["sent_status"]} == {"summer"}
+    assert len(brevo.sent) == 4
+
+
+def test_ledger_entries_expire(tmp_path, brevo):
+    agent = OutreachExecutorAgent(api_key="test", ledger_path=str(tmp_path / "ledger.sqlite3"),
+                                  ledger_ttl_seconds=-1)
+    agent.run(messages(1))
+    again = agent.run(messages(1))
+    assert again["sent_status"][0]["status"] == "sent"
@@ -0,0 +1,73 @@
+import pytest
+
+import agents.prospect_search_agent as search_module
+from agents.prospect_search_agent import ProspectSearchAgent
+
+# Request body the search sent before ICP x signal fan-out, for the default ICP
+BASELINE_PAYLOAD = {
+    "q_organization_industry": "SaaS",
+    "organization_locations": ["United States"],
+    "person_titles": ["Sales Manager", "Sales Executive", "VP of Sales", "Director of Sales", "Head of Growth"],
+    "per_page": 10,
+    "page": 1,
+    "q_organization_employee_count_range": "100-1000"
+}
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"contacts": [{"id": "c1", "first_name": "Jane", "last_name": "Doe", "email": "jane@example.com",
+                              "organization": {"name": "ExampleCorp"}}]}
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.payloads = []
+
+    def post(self, url, json=None, **kwargs):
+        self.payloads.append(json)
+        return FakeResponse()
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    fake = RecordingTransport()
+    monkeypatch.setattr(search_module, "get_transport", lambda: fake)
+    return fake
+
+
+def test_no_signals_sends_the_baseline_request(transport):
+    agent = ProspectSearchAgent(api_key="test", use_cache=False)
+    leads = agent.run()["leads"]
+    assert transport.payloads == [BASELINE_PAYLOAD]
+    assert leads[0]["matched_signals"] == []
+
+
+def test_requested_signals_add_their_filters(transport):
+    agent = ProspectSearchAgent(api_key="test", use_cache=False)
+    agent.run(signals=["recent_funding"], signal_filters={"recent_funding": {"funding_filter": ["series_a"]}})
+    assert len(transport.payloads) == 1
+    payload = dict(transport.payloads[0])
+    assert payload.pop("funding_filter") == ["series_a"]
+    assert payload == BASELINE_PAYLOAD
+
+
+def test_signal_without_filters_is_rejected(transport):
+    agent = ProspectSearchAgent(api_key="test", use_cache=False)
+    with pytest.raises(ValueError, match="hiring_for_sales"):
+        agent.run(icps=[{"name": "a", "industry": "SaaS", "signals": ["hiring_for_sales"]}])
+    assert transport.payloads == []
+
+
+def test_workflow_defaults_to_no_signals():
+    from langgraph_builder import LangGraphBuilder
+
+    inputs = LangGraphBuilder().get_plan().get_step("prospect_search").resolve_inputs({})
+    assert inputs["signals"] == []
+    assert inputs["signal_filters"] == {}
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+import requests
+
+from utils.rate_limiter import CircuitOpenError, RateLimiter
+
+
+def half_open_limiter():
+    """Limiter whose 'apollo' breaker is open and due for its half-open trial."""
+    limiter = RateLimiter()
+    limiter.configure("apollo", requests_per_second=1000, burst=1000, max_retries=0,
+                      failure_threshold=1, reset_timeout=0.05)
+    policy = limiter.policy("apollo")
+    policy.breaker.record_failure()
+    assert policy.breaker.state == "open"
+    time.sleep(0.06)
+    return limiter, policy
+
+
+def test_non_retryable_error_in_half_open_trial_reopens_breaker():
+    limiter, policy = half_open_limiter()
+
+    def broken_send():
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        limiter.send("apollo", "GET", broken_send)
+    assert policy.breaker.state == "open"
+
+    # Once the timeout elapses again, a new trial is let through
+    time.sleep(0.06)
+    response = requests.Response()
+    response.status_code = 200
+    assert limiter.send("apollo", "GET", lambda: response) is response
+    assert policy.breaker.state == "closed"
+
+
+def test_unexpected_exception_in_half_open_trial_reopens_breaker():
+    limiter, policy = half_open_limiter()
+
+    def broken_send():
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError):
+        limiter.send("apollo", "GET", broken_send)
+    assert policy.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        limiter.send("apollo", "GET", broken_send)
@@ -0,0 +1,45 @@
+import pytest
+
+from agents.scoring_agent import ScoringAgent
+
+WORKFLOW_WEIGHTS = {"employee_count": 0.3, "revenue": 0.4, "role_match": 0.3, "lookalike": 0.2}
+LOOKALIKE = {"enabled": True}
+
+
+def leads():
+    return [
+        {"contact_name": "Top", "role": "VP of Sales", "employee_count": 5000, "revenue": 900000000,
+         "engagement_score": 1.0},
+        {"contact_name": "Mid", "role": "Sales Manager", "employee_count": 400, "revenue": 80000000},
+        {"contact_name": "Low", "role": "Intern", "employee_count": 10, "revenue": 1000, "engagement_score": 0.0},
+    ]
+
+
+@pytest.fixture
+def similarity(monkeypatch):
+    scores = {"value": 1.0}
+    monkeypatch.setattr(ScoringAgent, "lookalike_scores",
+                        staticmethod(lambda batch, settings: [scores["value"]] * len(batch)))
+    return scores
+
+
+@pytest.mark.parametrize("value", [0.0, 0.5, 1.0])
+def test_scores_stay_within_unit_interval_with_lookalike(similarity, value):
+    similarity["value"] = value
+    ranked = ScoringAgent().run(leads(), scoring_criteria=WORKFLOW_WEIGHTS, lookalike=LOOKALIKE)["ranked_leads"]
+    for lead in ranked:
+        assert 0.0 <= lead["total_score"] <= 1.0
+        assert lead["total_score"] == pytest.approx(sum(lead["score_breakdown"].values()), abs=0.005)
+    assert ranked[0]["contact_name"] == "Top"
+    if value == 1.0:
+        assert ranked[0]["total_score"] == 1.0
+
+
+def test_scores_without_lookalike_are_unchanged():
+    ranked = ScoringAgent().run(leads(), scoring_criteria=WORKFLOW_WEIGHTS)["ranked_leads"]
+    # Without the lookalike criterion the other weights already sum to 1
+    top = ranked[0]
+    assert top["total_score"] == 1.0
+    assert "lookalike" not in top["score_breakdown"]
+    mid = next(lead for lead in ranked if lead["contact_name"] == "Mid")
+    assert mid["total_score"] == round(0.3 * 350 / 950 + 0.4 * 60000000 / 180000000 + 0.3 * 1.0, 3)
@@ -0,0 +1,25 @@
+import pytest
+
+from utils.step_output_store import StepOutputStore
+
+
+@pytest.fixture
+def spilled(tmp_path):
+    store = StepOutputStore(str(tmp_path), spill_threshold=5, chunk_size=3)
+    return store.put("search", {"leads": list(range(10))})["leads"]
+
+
+@pytest.mark.parametrize("index", [
+    slice(None), slice(2, 8), slice(1, None, 3), slice(-4, None),
+    slice(None, None, -1), slice(8, 2, -2), slice(None, None, -3), slice(2, 8, -1),
+])
+def test_slices_match_list(spilled, index):
+    assert spilled[index] == list(range(10))[index]
+
+
+def test_indexing(spilled):
+    assert spilled[0] == 0
+    assert spilled[-1] == 9
+    assert spilled[4] == 4
+    with pytest.raises(IndexError):
+        spilled[10]
@@ -2,7 +2,6 @@
 import sys
 import os
 import streamlit as st
-import logging
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,31 +10,20 @@ load_dotenv()
 # Fix import path for langgraph_builder
 # ----------------------
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from langgraph_builder import LangGraphBuilder
-from utils.chroma_store import ChromaStore
+from src.logger import get_logger
+from ui.resources import get_chroma_store, get_run_manager
+from utils.metrics import get_metrics
+from utils.step_output_store import StepOutputStore
 
-# ----------------------
-# Logger setup
-# ----------------------
-if not os.path.exists("logs"):
-    os.makedirs("logs")
-
-logging.basicConfig(
-    filename="logs/run.log",
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-)
-logger = logging.getLogger(__name__)
-
-# ----------------------
-# Initialize Chroma Store
-# ----------------------
-chroma_store = ChromaStore()
+# Project logging (workflow.json config.logging, applied when the workflow loads)
+logger = get_logger("ui.app")
 
 # ----------------------
 # Streamlit UI
 # ----------------------
 st.set_page_config(page_title="AutoReach Dashboard", layout="wide")
+chroma_store = get_chroma_store()
+run_manager = get_run_manager()
 st.title("AutoReach — B2B Lead Generation Workflow")
 
 st.markdown(
@@ -48,82 +36,18 @@ This dashboard allows you to:
 """
 )
 
-# ----------------------
-# Workflow Runner
-# ----------------------
-@st.cache_data(show_spinner=True)
-def run_workflow():
-    builder = LangGraphBuilder()
-    agents = builder.get_agents()
-    workflow = builder.get_workflow()
-    step_outputs = {}
-
-    for step in workflow.get("steps", []):
-        step_id = step["id"]
-        agent = agents.get(step_id)
-
-        if agent is None:
-            st.warning(f"Agent for step '{step_id}' not initialized. Skipping...")
-            continue
-
-        st.info(f"Running step: {step_id} ({step['agent']})")
-
-        # Prepare inputs
-        inputs = {}
-        for key, val in step.get("inputs", {}).items():
-            if isinstance(val, str) and val.startswith("{{") and val.endswith("}}"):
-                # Reference another step's output
-                ref = val[2:-2].strip().split(".")
-                ref_step = ref[0]
-                ref_key = ref[-1]
-                ref_output = step_outputs.get(ref_step, {}).get("output")
-                # If ref_output is list, pass it directly
-                if isinstance(ref_output, list):
-                    inputs[key] = ref_output
-                elif isinstance(ref_output, dict):
-                    inputs[key] = ref_output.get(ref_key)
-                else:
-                    inputs[key] = ref_output
-            else:
-                inputs[key] = val
-
-        # Run agent
-        try:
-            output = agent.run(**inputs)
-            step_outputs[step_id] = {"output": output}
-            st.success(f"Step '{step_id}' completed.")
-            logger.info(f"Step '{step_id}' output: {output}")
-            
-            # Store data in Chroma based on step
-            if step_id == "prospect_search" and isinstance(output, dict):
-                leads = output.get("leads", [])
-                if leads:
-                    chroma_store.store_leads(leads)
-            
-            elif step_id == "enrichment" and isinstance(output, dict):
-                enriched_leads = output.get("enriched_leads", [])
-                if enriched_leads:
-                    chroma_store.store_enriched_leads(enriched_leads)
-        
-        except Exception as e:
-            st.error(f"Error in step '{step_id}': {e}")
-            logger.error(f"Error in step '{step_id}': {e}")
-
-    return step_outputs
-
-
 # ----------------------
 # Sidebar for Chroma operations
 # ----------------------
 st.sidebar.header("📊 Data Management")
 
-if st.sidebar.button("View Stored Leads"):
-    stored_leads = chroma_store.get_all_leads("enriched")
-    if stored_leads:
-        st.sidebar.success(f"Found {len(stored_leads)} stored leads")
-        st.sidebar.json(stored_leads[:5])  # Show first 5
-    else:
-        st.sidebar.info("No stored leads yet")
+# Counting reads the sidecar index; browsing happens on the Lead Explorer page
+stored_count = chroma_store.lead_index.count()
+if stored_count:
+    st.sidebar.success(f"{stored_count} stored enriched leads")
+else:
+    st.sidebar.info("No stored leads yet")
+st.sidebar.page_link("pages/1_Lead_Explorer.py", label="Open Lead Explorer", icon="🔎")
 
 if st.sidebar.button("Clear Stored Data"):
     chroma_store.clear_collection("leads")
@@ -140,14 +64,95 @@ if search_query:
 # ----------------------
 st.header("🚀 Workflow Execution")
 
+# Runs started from this browser session (the manager holds every session's runs)
+if "run_ids" not in st.session_state:
+    st.session_state.run_ids = []
+
 if st.button("Run AutoReach Workflow"):
-    st.info("Workflow execution started...")
-    results = run_workflow()
+    run_id = run_manager.submit()
+    st.session_state.run_ids.append(run_id)
+    logger.info("Submitted workflow run %s", run_id)
 
+
+def show_results(run):
     st.header("Workflow Outputs")
-    for step, data in results.items():
+    for step, data in run.outputs.items():
         st.subheader(step)
-        st.write(data["output"])
-
-    st.success("Workflow execution completed.")
-    st.info("✅ Data automatically stored in Chroma for future reference")
\ No newline at end of file
+        st.caption(StepOutputStore.summarize(data["output"]))
+        st.write(StepOutputStore.preview(data["output"]))
+
+    # Step timings are this run's; endpoint / provider / cache metrics are process-wide
+    metrics_report = get_metrics().report()
+    st.header("📈 Run Metrics")
+    st.subheader("Steps")
+    st.dataframe([{"step": step_id, **stats} for step_id, stats in run.metrics.report()["steps"].items()])
+    st.subheader("External endpoints (all runs)")
+    st.dataframe([{"endpoint": endpoint, **{k: v for k, v in stats.items() if k != "buckets"}}
+                  for endpoint, stats in metrics_report["endpoints"].items()])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Retries / throttling")
+        st.json(metrics_report["providers"])
+    with col2:
+        st.subheader("Cache hit rates")
+        st.json(metrics_report["caches"])
+    st.download_button("Download Prometheus metrics", get_metrics().to_prometheus(), file_name="metrics.prom",
+                       key=f"metrics_{run.run_id}")
+
+
+def show_progress(run):
+    state = run.snapshot()
+    st.subheader(f"Run {state['run_id']} — {state['status']} ({state['elapsed_seconds']}s)")
+    for step_id, step in state["steps"].items():
+        total, done = step["items_total"], step["items_done"]
+        text = f"{step_id}: {step['status']}"
+        if step["status"] == "running" and total:
+            text += f" — {done}/{total} items"
+        elif done:
+            text += f" — {done} items"
+        if step.get("items_per_second"):
+            text += f", {step['items_per_second']}/s"
+        if step.get("eta_seconds") is not None:
+            text += f", ETA {step['eta_seconds']}s"
+        if step.get("error"):
+            text += f" ({step['error']})"
+        finished = step["status"] in ("completed", "failed", "skipped", "cancelled")
+        st.progress(1.0 if finished else min(1.0, done / total) if total else 0.0, text=text)
+    return state
+
+
+@st.fragment(run_every=1)
+def watch_run(run_id: str):
+    """Polls a background run once a second; only this fragment re-renders."""
+    run = run_manager.get(run_id)
+    if run is None or run.done:
+        # Render the final state and outputs once, outside the polling fragment
+        st.rerun()
+    state = show_progress(run)
+    if state["cancel_requested"]:
+        st.info("Cancelling after the current chunk...")
+    elif st.button("Cancel run", key=f"cancel_{run_id}"):
+        run_manager.cancel(run_id)
+
+
+def show_finished(run):
+    state = show_progress(run)
+    if state["status"] == "failed":
+        st.error(f"Workflow run failed: {state['error']}")
+    elif state["status"] == "cancelled":
+        st.warning("Workflow run cancelled; outputs of completed steps are shown below.")
+    else:
+        st.success("Workflow execution completed.")
+        st.info("✅ Data automatically stored in Chroma for future reference")
+    show_results(run)
+
+
+if st.session_state.run_ids:
+    selected = st.selectbox("Run", list(reversed(st.session_state.run_ids)))
+    run = run_manager.get(selected)
+    if run is None:
+        st.warning(f"Run {selected} is no longer available")
+    elif run.done:
+        show_finished(run)
+    else:
+        watch_run(selected)
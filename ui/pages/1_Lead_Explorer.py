@@ -0,0 +1,98 @@
+# ui/pages/1_Lead_Explorer.py
+import sys
+import os
+import math
+from datetime import timedelta
+import streamlit as st
+
+# ----------------------
+# Fix import path for project modules
+# ----------------------
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ui.resources import get_chroma_store
+from utils.lead_index import SORT_COLUMNS
+
+st.set_page_config(page_title="Lead Explorer — AutoReach", layout="wide")
+st.title("🔎 Lead Explorer")
+chroma_store = get_chroma_store()
+
+
+# ----------------------
+# Cached reads (recently viewed pages are served from memory)
+# ----------------------
+@st.cache_data(ttl=30, max_entries=200, show_spinner=False)
+def fetch_page(filters: dict, sort_by: str, descending: bool, page: int, page_size: int,
+               include_documents: bool):
+    return chroma_store.query_enriched_leads(filters, sort_by, descending, offset=page * page_size,
+                                             limit=page_size, include_documents=include_documents)
+
+
+@st.cache_data(ttl=30, max_entries=50, show_spinner=False)
+def count_leads(filters: dict) -> int:
+    return chroma_store.lead_index.count(filters)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def seniority_choices():
+    return chroma_store.lead_index.seniority_levels()
+
+
+# ----------------------
+# Filters
+# ----------------------
+st.sidebar.header("Filters")
+min_score, max_score = st.sidebar.slider("Score", 0.0, 1.0, (0.0, 1.0), step=0.01)
+seniority = st.sidebar.multiselect("Seniority", seniority_choices())
+company = st.sidebar.text_input("Company starts with")
+stored_range = st.sidebar.date_input("Stored between", value=())
+
+filters = {
+    "min_score": min_score if min_score > 0 else None,
+    "max_score": max_score if max_score < 1 else None,
+    "seniority_levels": seniority,
+    "company": company.strip()
+}
+if len(stored_range) == 2:
+    filters["stored_after"] = stored_range[0].isoformat()
+    filters["stored_before"] = (stored_range[1] + timedelta(days=1)).isoformat()
+
+col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+sort_by = col1.selectbox("Sort by", SORT_COLUMNS)
+descending = col2.toggle("Descending", value=True)
+page_size = col3.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+include_documents = col4.toggle("Show documents")
+
+if st.sidebar.button("Refresh"):
+    fetch_page.clear()
+    count_leads.clear()
+    seniority_choices.clear()
+
+# Filters or sorting changed: go back to the first page
+view_key = (tuple(sorted((k, str(v)) for k, v in filters.items())), sort_by, descending, page_size)
+if st.session_state.get("explorer_view") != view_key:
+    st.session_state.explorer_view = view_key
+    st.session_state.explorer_page = 1
+
+# ----------------------
+# Page
+# ----------------------
+total = count_leads(filters)
+pages = max(1, math.ceil(total / page_size))
+st.session_state.explorer_page = min(st.session_state.get("explorer_page", 1), pages)
+
+
+def step_page(delta: int):
+    st.session_state.explorer_page += delta
+
+
+nav1, nav2, nav3 = st.columns([1, 2, 1])
+nav1.button("◀ Previous", on_click=step_page, args=(-1,), disabled=st.session_state.explorer_page <= 1)
+nav3.button("Next ▶", on_click=step_page, args=(1,), disabled=st.session_state.explorer_page >= pages)
+page = nav2.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="explorer_page")
+
+rows = fetch_page(filters, sort_by, descending, page - 1, page_size, include_documents)
+st.caption(f"{total} matching leads · showing {len(rows)} from row {(page - 1) * page_size + 1}")
+if rows:
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+else:
+    st.info("No stored leads match these filters")
@@ -0,0 +1,23 @@
+# ui/resources.py
+import streamlit as st
+
+from langgraph_builder import LangGraphBuilder
+from src.run_manager import RunManager
+from utils.chroma_store import ChromaStore
+
+
+# ----------------------
+# Shared resources (one per server process, shared by every session and page)
+# ----------------------
+@st.cache_resource
+def get_chroma_store():
+    return ChromaStore()
+
+
+@st.cache_resource
+def get_run_manager():
+    builder = LangGraphBuilder()
+    settings = builder.get_workflow().get("config", {}).get("ui", {})
+    return RunManager(builder, get_chroma_store(),
+                      max_workers=settings.get("max_concurrent_runs", 4),
+                      chunk_size=settings.get("progress_chunk_size", 100))
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.metrics import get_metrics
+
+
+class PersistentCache:
+    """
+    Small persistent key/value cache backed by SQLite.
+    Values are JSON-serialized; entries expire after ttl_seconds and the
+    least recently used entries are evicted once max_entries is exceeded.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000,
+                 name: str = None):
+        """
+        Initialize PersistentCache.
+
+        Args:
+            path: SQLite file path (parent directory is created if needed)
+            ttl_seconds: Default time-to-live for new entries (None = never expire)
+            max_entries: Maximum number of entries kept before LRU eviction
+            name: Label for hit/miss metrics (default: file name without extension)
+        """
+        self.path = path
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Build a stable hash key from JSON-serializable parts."""
+        raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        now = time.time()
+        metrics = get_metrics()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                metrics.inc("cache_requests_total", cache=self.name, result="miss")
+                return default
+            if row[1] is not None and row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._count -= 1
+                metrics.inc("cache_requests_total", cache=self.name, result="miss")
+                return default
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        metrics.inc("cache_requests_total", cache=self.name, result="hit")
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl_seconds: float = None):
+        """Store value under key, evicting least recently used entries if over capacity."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            existed = self._conn.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now)
+            )
+            if not existed:
+                self._count += 1
+            if self.max_entries and self._count > self.max_entries:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used ones down to max_entries."""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        self._count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._count -= overflow
+
+    def delete(self, key: str):
+        """Remove a single entry."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._count -= cursor.rowcount
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self._count = 0
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from utils.step_output_store import SpilledList
+
+
+class CheckpointStore:
+    """
+    Content-addressed store for workflow step outputs.
+    A checkpoint key hashes the step id, the agent class and config, and the fully
+    resolved step inputs, so a step is only skipped when nothing it depends on
+    has changed. Agent config (API keys included) only enters the hash and is
+    never written to disk. Spilled lists are hashed by content fingerprint and
+    their chunk files are stored once per fingerprint under blobs/.
+    """
+
+    def __init__(self, root: str = "checkpoints"):
+        """Initialize CheckpointStore under the given directory."""
+        self.root = root
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, SpilledList):
+            return {"__fingerprint__": value.fingerprint}
+        return str(value)
+
+    @classmethod
+    def _canonical(cls, value) -> bytes:
+        return json.dumps(value, sort_keys=True, separators=(",", ":"), default=cls._default).encode("utf-8")
+
+    def _externalize(self, value):
+        """Replace SpilledList values by references to chunk copies in blobs/."""
+        if isinstance(value, SpilledList):
+            return value.copy_to(os.path.join(self.root, "blobs", value.fingerprint)).to_ref()
+        if isinstance(value, dict):
+            return {k: self._externalize(v) for k, v in value.items()}
+        return value
+
+    @staticmethod
+    def _internalize(value):
+        """Turn stored references back into SpilledList instances."""
+        if isinstance(value, dict):
+            if "__spilled__" in value:
+                return SpilledList.from_ref(value)
+            return {k: CheckpointStore._internalize(v) for k, v in value.items()}
+        return value
+
+    def step_key(self, step_id: str, agent_name: str, inputs: dict, agent_config: dict) -> str:
+        """
+        Compute the checkpoint key for one step execution.
+
+        Args:
+            step_id: Workflow step id
+            agent_name: Agent class name
+            inputs: Resolved keyword arguments passed to agent.run
+            agent_config: Constructor kwargs the agent was built with
+
+        Returns:
+            Hex sha256 key
+        """
+        digest = hashlib.sha256()
+        digest.update(self._canonical({"step": step_id, "agent": agent_name}))
+        digest.update(hashlib.sha256(self._canonical(agent_config or {})).digest())
+        digest.update(self._canonical(inputs))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], f"{key}.json")
+
+    def has(self, key: str) -> bool:
+        """True if a checkpoint exists for key."""
+        return os.path.exists(self._path(key))
+
+    def load(self, key: str):
+        """Return the stored step output for key, or None if missing / unreadable."""
+        try:
+            with open(self._path(key), "r") as f:
+                return self._internalize(json.load(f)["output"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, key: str, step_id: str, output):
+        """Persist a step output atomically under key."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "step_id": step_id,
+                "created_at": datetime.now().isoformat(),
+                "output": self._externalize(output)
+            }, f, default=str)
+        os.replace(tmp_path, path)
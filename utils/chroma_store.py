@@ -1,7 +1,19 @@
 import chromadb
+import hashlib
 import json
+import os
+import threading
 from datetime import datetime
 
+from src.logger import get_logger
+from utils.lead_index import LeadIndex
+from utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+# Lazily created default embedding function (see ChromaStore.embed_documents)
+_embedding_function = None
+
 class ChromaStore:
     """
     Persistent vector database for storing and retrieving lead data.
@@ -18,7 +30,29 @@ class ChromaStore:
             name="enriched_leads",
             metadata={"hnsw:space": "cosine"}
         )
-        print("[ChromaStore] Initialized with persistent storage")
+        # Sortable / filterable metadata of enriched leads for paginated browsing
+        self.lead_index = LeadIndex(os.path.join(persist_dir, "lead_index.sqlite3"))
+        self._backfill_index()
+        # Other collections (e.g. past repliers), opened on first use
+        self._collections = {}
+        # Lookalike similarities: (collection, size, version, document hash) -> similarity
+        self._similarities = {}
+        self._similarity_versions = {}
+        self._similarity_lock = threading.Lock()
+        logger.info("Initialized with persistent storage")
+
+    def _backfill_index(self, page_size: int = 5000):
+        """Index enriched leads stored before the sidecar index existed."""
+        if self.lead_index.count() or not self.enriched_collection.count():
+            return
+        offset = 0
+        while True:
+            page = self.enriched_collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            self.lead_index.add(page["ids"], page["metadatas"])
+            offset += len(page["ids"])
+        logger.info("Indexed %d stored enriched leads", offset)
 
     def store_leads(self, leads):
         """Store raw leads from prospect search."""
@@ -38,57 +72,220 @@ class ChromaStore:
             # Use company + contact as document text for embedding
             document_text = f"{lead.get('company')} {lead.get('contact_name')} {lead.get('email')}"
             
-            self.leads_collection.add(
-                ids=[lead_id],
-                documents=[document_text],
-                metadatas=[metadata]
-            )
+            with get_metrics().time_call("chroma", "add"):
+                self.leads_collection.add(
+                    ids=[lead_id],
+                    documents=[document_text],
+                    metadatas=[metadata]
+                )
         
-        print(f"[ChromaStore] Stored {len(leads)} leads")
+        logger.info("Stored %d leads", len(leads))
 
-    def store_enriched_leads(self, enriched_leads):
-        """Store enriched lead data."""
-        if not enriched_leads:
-            return
-        
+    @staticmethod
+    def enriched_records(enriched_leads) -> tuple:
+        """
+        Build (ids, documents, metadatas) for enriched leads.
+        Duplicate ids keep their first occurrence, matching one-by-one adds.
+        """
+        ids, documents, metadatas = [], [], []
+        seen = set()
         for idx, lead in enumerate(enriched_leads):
-            lead_id = f"enriched_{lead.get('company', idx)}_{lead.get('contact', idx)}"
-            metadata = {
+            contact = lead.get("contact") or lead.get("contact_name", "")
+            lead_id = f"enriched_{lead.get('company', idx)}_{contact or idx}"
+            if lead_id in seen:
+                continue
+            seen.add(lead_id)
+            ids.append(lead_id)
+            metadatas.append({
                 "company": lead.get("company", ""),
-                "contact": lead.get("contact", ""),
+                "contact": contact,
                 "role": lead.get("role", ""),
                 "seniority_level": lead.get("seniority_level", ""),
                 "technologies": ",".join(lead.get("technologies", [])),
                 "score": str(lead.get("total_score", 0)),
                 "stored_at": datetime.now().isoformat()
-            }
-            
+            })
             # Use all enriched info for embedding
-            document_text = f"{lead.get('company')} {lead.get('contact')} {lead.get('role')} {','.join(lead.get('technologies', []))}"
-            
+            documents.append(f"{lead.get('company')} {contact} {lead.get('role')} {','.join(lead.get('technologies', []))}")
+        return ids, documents, metadatas
+
+    @staticmethod
+    def embed_documents(documents: list) -> list:
+        """
+        Embed documents with Chroma's default embedding function without opening
+        the database, so worker processes can do the CPU-heavy part.
+        """
+        global _embedding_function
+        if _embedding_function is None:
+            from chromadb.utils import embedding_functions
+            _embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        with get_metrics().time_call("chroma", "embed"):
+            return [list(map(float, vector)) for vector in _embedding_function(documents)]
+
+    def store_enriched_leads(self, enriched_leads, embeddings: list = None):
+        """
+        Store enriched lead data.
+        Pass precomputed embeddings (aligned with enriched_records ids) to skip embedding here.
+        """
+        if not enriched_leads:
+            return
+
+        ids, documents, metadatas = self.enriched_records(enriched_leads)
+        added = self.add_enriched_records(ids, documents, metadatas, embeddings)
+
+        logger.info("Stored %d enriched leads (%d already stored)", added, len(ids) - added)
+
+    def add_enriched_records(self, ids: list, documents: list, metadatas: list, embeddings: list = None) -> int:
+        """
+        Add prepared records to the enriched collection, skipping ids already stored.
+        Returns the number of records actually added.
+        """
+        with get_metrics().time_call("chroma", "get"):
+            # Chroma rejects repeated ids in a lookup; repeats within ids are skipped below
+            seen = set(self.enriched_collection.get(ids=list(dict.fromkeys(ids)), include=[])["ids"]) if ids else set()
+        keep = []
+        for i, lead_id in enumerate(ids):
+            if lead_id not in seen:
+                seen.add(lead_id)
+                keep.append(i)
+        if not keep:
+            return 0
+        with get_metrics().time_call("chroma", "add"):
             self.enriched_collection.add(
-                ids=[lead_id],
-                documents=[document_text],
-                metadatas=[metadata]
+                ids=[ids[i] for i in keep],
+                documents=[documents[i] for i in keep],
+                metadatas=[metadatas[i] for i in keep],
+                embeddings=[embeddings[i] for i in keep] if embeddings is not None else None
             )
-        
-        print(f"[ChromaStore] Stored {len(enriched_leads)} enriched leads")
+        self.lead_index.add([ids[i] for i in keep], [metadatas[i] for i in keep])
+        return len(keep)
+
+    def update_scores(self, ranked_leads):
+        """Record scores of stored enriched leads (scoring runs after they are stored)."""
+        ids, _, metadatas = self.enriched_records(ranked_leads)
+        if not ids:
+            return
+        with get_metrics().time_call("chroma", "get"):
+            stored = set(self.enriched_collection.get(ids=ids, include=[])["ids"])
+        scores = {lead_id: metadata["score"] for lead_id, metadata in zip(ids, metadatas) if lead_id in stored}
+        if not scores:
+            return
+        with get_metrics().time_call("chroma", "update"):
+            self.enriched_collection.update(ids=list(scores), metadatas=[{"score": score} for score in scores.values()])
+        self.lead_index.update_scores(scores)
+
+    def query_enriched_leads(self, filters: dict = None, sort_by: str = "score", descending: bool = True,
+                             offset: int = 0, limit: int = 50, include_documents: bool = False) -> list:
+        """
+        One page of stored enriched leads, filtered and sorted in the sidecar index
+        (see LeadIndex.query; count matches with lead_index.count(filters)).
+        Only the page's ids are fetched from Chroma, and only for documents.
+        """
+        rows = self.lead_index.query(filters, sort_by, descending, offset, limit)
+        if include_documents and rows:
+            with get_metrics().time_call("chroma", "get"):
+                page = self.enriched_collection.get(ids=[row["id"] for row in rows], include=["documents"])
+            documents = dict(zip(page["ids"], page["documents"]))
+            for row in rows:
+                row["document"] = documents.get(row["id"])
+        return rows
+
+    def get_collection(self, name: str):
+        """Named cosine-space collection (created if missing)."""
+        if name not in self._collections:
+            self._collections[name] = self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+        return self._collections[name]
+
+    @staticmethod
+    def profile_document(lead: dict) -> str:
+        """Embedding text for lookalike matching: who the lead is, without names or company."""
+        technologies = lead.get("technologies") or []
+        if isinstance(technologies, str):
+            technologies = technologies.split(",")
+        return (f"{lead.get('role') or ''} {lead.get('seniority_level') or ''} {lead.get('industry') or ''} "
+                f"{lead.get('employee_count') or ''} employees {','.join(technologies)}")
+
+    def store_repliers(self, leads: list, collection_name: str = "repliers"):
+        """Upsert leads that replied into the repliers collection used by lookalike_scores."""
+        ids, documents, metadatas = [], [], []
+        seen = set()
+        for lead in leads:
+            contact = lead.get("contact") or lead.get("contact_name", "")
+            lead_id = f"replier_{(lead.get('email') or '').lower() or lead.get('company', '') + '_' + contact}"
+            if lead_id in seen:
+                continue
+            seen.add(lead_id)
+            ids.append(lead_id)
+            documents.append(self.profile_document(lead))
+            metadatas.append({
+                "company": lead.get("company", ""),
+                "contact": contact,
+                "role": lead.get("role", ""),
+                "seniority_level": lead.get("seniority_level", ""),
+                "stored_at": datetime.now().isoformat()
+            })
+        if not ids:
+            return
+        with get_metrics().time_call("chroma", "upsert"):
+            self.get_collection(collection_name).upsert(ids=ids, documents=documents, metadatas=metadatas,
+                                                        embeddings=self.embed_documents(documents))
+        with self._similarity_lock:
+            self._similarity_versions[collection_name] = self._similarity_versions.get(collection_name, 0) + 1
+        logger.info("Stored %d repliers in %s", len(ids), collection_name)
+
+    def lookalike_scores(self, leads: list, collection_name: str = "repliers", n_results: int = 5,
+                         max_cached: int = 100000) -> list:
+        """
+        Similarity (0-1) of each lead to its nearest past repliers: 1 minus the mean
+        cosine distance to the n_results closest. Distinct profiles not seen since
+        the collection last changed are embedded and queried in one batched call;
+        the rest come from a cache keyed by document hash.
+        """
+        collection = self.get_collection(collection_name)
+        size = collection.count()
+        if not size or not leads:
+            return [0.0] * len(leads)
+
+        documents = [self.profile_document(lead) for lead in leads]
+        with self._similarity_lock:
+            version = (collection_name, size, self._similarity_versions.get(collection_name, 0))
+        keys = {document: version + (hashlib.sha1(document.encode("utf-8")).hexdigest(),)
+                for document in documents}
+        with self._similarity_lock:
+            missing = [document for document, key in keys.items() if key not in self._similarities]
+
+        if missing:
+            embeddings = self.embed_documents(missing)
+            with get_metrics().time_call("chroma", "query"):
+                results = collection.query(query_embeddings=embeddings, n_results=min(n_results, size),
+                                           include=["distances"])
+            with self._similarity_lock:
+                for document, distances in zip(missing, results["distances"]):
+                    mean_distance = sum(distances) / len(distances) if distances else 1.0
+                    self._similarities[keys[document]] = max(0.0, min(1.0, 1.0 - mean_distance))
+                while len(self._similarities) > max_cached:
+                    del self._similarities[next(iter(self._similarities))]
+
+        with self._similarity_lock:
+            return [self._similarities.get(keys[document], 0.0) for document in documents]
 
     def get_similar_leads(self, query, collection_name="leads", n_results=5):
         """Search for similar leads by query."""
         collection = self.leads_collection if collection_name == "leads" else self.enriched_collection
         
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+        with get_metrics().time_call("chroma", "query"):
+            results = collection.query(
+                query_texts=[query],
+                n_results=n_results
+            )
         
         return results
 
     def get_all_leads(self, collection_name="enriched"):
         """Retrieve all stored leads."""
         collection = self.enriched_collection if collection_name == "enriched" else self.leads_collection
-        results = collection.get()
+        with get_metrics().time_call("chroma", "get"):
+            results = collection.get()
         
         leads = []
         for idx, metadata in enumerate(results.get("metadatas", [])):
@@ -100,4 +297,19 @@ class ChromaStore:
         """Clear a collection if needed."""
         collection = self.leads_collection if collection_name == "leads" else self.enriched_collection
         collection.delete(where={})
-        print(f"[ChromaStore] Cleared {collection_name} collection")
\ No newline at end of file
+        if collection is self.enriched_collection:
+            self.lead_index.clear()
+        logger.info("Cleared %s collection", collection_name)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_chroma_store(persist_dir: str = "./chroma_data") -> ChromaStore:
+    """Shared ChromaStore per persist directory (agents reuse its client and lookalike cache)."""
+    key = os.path.abspath(persist_dir)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ChromaStore(persist_dir)
+        return _stores[key]
@@ -0,0 +1,281 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+METRICS = ("opened", "clicked", "replied")
+RATE_NAMES = {"opened": "open", "clicked": "click", "replied": "reply"}
+
+# Segment dimensions derived from enriched / ranked lead attributes
+SEGMENT_DIMENSIONS = ("seniority_level", "role", "technology", "company_size", "score_bucket")
+
+DEFAULT_COMPANY_SIZE_BINS = [0, 50, 200, 1000, 5000, np.inf]
+DEFAULT_COMPANY_SIZE_LABELS = ["1-50", "51-200", "201-1000", "1001-5000", "5000+"]
+DEFAULT_SCORE_BINS = [-np.inf, 0.4, 0.6, 0.8, np.inf]
+DEFAULT_SCORE_LABELS = ["<0.4", "0.4-0.6", "0.6-0.8", "0.8+"]
+
+
+class EngagementAnalytics:
+    """
+    Vectorized engagement analytics over response events.
+    Joins responses from ResponseTrackerAgent with enriched / ranked lead attributes
+    and computes open, click and reply rates with Wilson confidence intervals
+    for every segment in a single grouped pass.
+    """
+
+    def __init__(self, confidence: float = 0.95, min_segment_size: int = 20,
+                 max_recommendations: int = 10):
+        """
+        Initialize EngagementAnalytics.
+
+        Args:
+            confidence: Confidence level for the per-segment intervals
+            min_segment_size: Minimum number of sends before a segment gets a recommendation
+            max_recommendations: Maximum number of segment recommendations to emit
+        """
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.min_segment_size = min_segment_size
+        self.max_recommendations = max_recommendations
+
+    # ----------------------
+    # Joining
+    # ----------------------
+    @staticmethod
+    def _frame(records) -> pd.DataFrame:
+        """Accept a DataFrame or any iterable of dicts."""
+        return records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(list(records))
+
+    @staticmethod
+    def _column(df: pd.DataFrame, *names) -> pd.Series:
+        """First present column among names (later names fill gaps), or an empty column."""
+        col = pd.Series(None, index=df.index, dtype=object)
+        for name in reversed(names):
+            if name in df.columns:
+                col = df[name].where(df[name].notna(), col)
+        return col
+
+    @staticmethod
+    def _normalized_codes(values: pd.Series, prefix: str = ""):
+        """
+        Factorize raw values and normalize only the distinct ones.
+        Returns (codes, normalized_uniques); code -1 means missing.
+        """
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        normalized = pd.Index(uniques).astype(str).str.strip().str.lower()
+        normalized = np.where(normalized == "", "", prefix + normalized.to_numpy(dtype=object))
+        return codes, normalized
+
+    def _lead_positions(self, events: pd.DataFrame, leads: pd.DataFrame) -> np.ndarray:
+        """
+        Position of each response's lead in the (deduplicated) leads frame, -1 if unmatched.
+        Joins on lower-cased email, falling back to the contact name.
+        """
+        lead_email_codes, lead_emails = self._normalized_codes(self._column(leads, "email"))
+        lead_name_codes, lead_names = self._normalized_codes(self._column(leads, "contact_name", "contact"), "name:")
+        lead_keys = np.where(lead_email_codes >= 0, np.append(lead_emails, "")[lead_email_codes], "")
+        lead_keys = np.where(lead_keys == "", np.append(lead_names, "")[lead_name_codes], lead_keys)
+        key_index = pd.Index(lead_keys)
+        first = ~key_index.duplicated(keep="first")
+        lookup = pd.Index(lead_keys[first])
+        first_positions = np.flatnonzero(first)
+
+        def positions(codes, uniques):
+            if len(uniques) == 0:
+                return np.full(len(codes), -1)
+            found = lookup.get_indexer(uniques)
+            found = np.where(found >= 0, first_positions[np.maximum(found, 0)], -1)
+            found[uniques == ""] = -1
+            return np.where(codes >= 0, np.append(found, -1)[codes], -1)
+
+        by_email = positions(*self._normalized_codes(self._column(events, "email")))
+        by_name = positions(*self._normalized_codes(self._column(events, "lead"), "name:"))
+        return np.where(by_email >= 0, by_email, by_name)
+
+    def replied_leads(self, responses, leads) -> list:
+        """Lead dicts (from leads) of every response that replied, each once."""
+        events = self._frame(responses)
+        if "replied" not in events.columns or len(events) == 0 or len(leads) == 0:
+            return []
+        lead_frame = self._frame(leads)
+        positions = self._lead_positions(events, lead_frame)
+        replied = events["replied"].fillna(False).astype(bool).to_numpy()
+        matched = np.unique(positions[replied & (positions >= 0)])
+        return [lead_frame.iloc[int(position)].dropna().to_dict() for position in matched]
+
+    # ----------------------
+    # Statistics
+    # ----------------------
+    def _wilson(self, successes: np.ndarray, n: np.ndarray):
+        """Vectorized Wilson score interval. Returns (rate, low, high) as fractions."""
+        n = n.astype(float)
+        safe_n = np.where(n > 0, n, 1.0)
+        p = successes / safe_n
+        z2 = self.z ** 2
+        denom = 1 + z2 / safe_n
+        center = (p + z2 / (2 * safe_n)) / denom
+        half = self.z * np.sqrt(p * (1 - p) / safe_n + z2 / (4 * safe_n ** 2)) / denom
+        empty = n == 0
+        return (np.where(empty, 0.0, p),
+                np.where(empty, 0.0, np.clip(center - half, 0, 1)),
+                np.where(empty, 0.0, np.clip(center + half, 0, 1)))
+
+    @staticmethod
+    def _lead_segments(leads: pd.DataFrame) -> dict:
+        """
+        Segment label per lead for every dimension, with a trailing "unknown" row
+        for responses that matched no lead. Technology maps to (lead positions, labels).
+        """
+        n = len(leads)
+        unknown = np.array(["unknown"], dtype=object)
+
+        def labels(series):
+            series = series.where(series.notna() & (series.astype(str) != ""), "unknown")
+            return np.concatenate([series.astype(str).to_numpy(dtype=object), unknown])
+
+        def bucket(series, bins, names, right):
+            cut = pd.cut(pd.to_numeric(series, errors="coerce"), bins, labels=names, right=right)
+            return np.concatenate([cut.astype(object).fillna("unknown").to_numpy(dtype=object), unknown])
+
+        techs = EngagementAnalytics._column(leads, "technologies").reset_index(drop=True)
+        techs = techs.where(techs.map(lambda t: isinstance(t, (list, tuple)) and len(t) > 0), None)
+        exploded = techs.explode()
+        tech_positions = np.append(exploded.index.to_numpy(), n)
+        tech_labels = np.append(exploded.fillna("unknown").astype(str).to_numpy(dtype=object), "unknown")
+
+        return {
+            "seniority_level": labels(EngagementAnalytics._column(leads, "seniority_level")),
+            "role": labels(EngagementAnalytics._column(leads, "role")),
+            "technology": (tech_positions, tech_labels),
+            "company_size": bucket(EngagementAnalytics._column(leads, "employee_count"),
+                                   DEFAULT_COMPANY_SIZE_BINS, DEFAULT_COMPANY_SIZE_LABELS, True),
+            "score_bucket": bucket(EngagementAnalytics._column(leads, "total_score", "score"),
+                                   DEFAULT_SCORE_BINS, DEFAULT_SCORE_LABELS, False),
+        }
+
+    def _segment_table(self, per_lead: np.ndarray, segments: dict) -> pd.DataFrame:
+        """
+        Aggregate per-lead counts into every segment of every dimension at once:
+        each (dimension, segment) pair gets a global id and one bincount per metric
+        sums over the stacked ids.
+        """
+        ids, rows, dims, names = [], [], [], []
+        offset = 0
+        for dim in SEGMENT_DIMENSIONS:
+            value = segments[dim]
+            positions, seg_labels = value if isinstance(value, tuple) else (np.arange(len(value)), value)
+            codes, uniques = pd.factorize(seg_labels)
+            ids.append(codes + offset)
+            rows.append(positions)
+            dims.extend([dim] * len(uniques))
+            names.extend(uniques)
+            offset += len(uniques)
+
+        ids = np.concatenate(ids)
+        rows = np.concatenate(rows)
+        table = pd.DataFrame({"dimension": dims, "segment": names})
+        table["sent"] = np.bincount(ids, weights=per_lead[rows, 0], minlength=offset).astype(np.int64)
+        for col, metric in enumerate(METRICS, start=1):
+            table[metric] = np.bincount(ids, weights=per_lead[rows, col], minlength=offset).astype(np.int64)
+
+        table = table[table["sent"] > 0].copy()
+        for metric in METRICS:
+            rate, low, high = self._wilson(table[metric].to_numpy(float), table["sent"].to_numpy())
+            name = RATE_NAMES[metric]
+            table[f"{name}_rate"] = np.round(rate * 100, 2)
+            table[f"{name}_ci_low"] = np.round(low * 100, 2)
+            table[f"{name}_ci_high"] = np.round(high * 100, 2)
+        return table.sort_values(["dimension", "sent"], ascending=[True, False], ignore_index=True)
+
+    # ----------------------
+    # Recommendations
+    # ----------------------
+    def _recommend(self, table: pd.DataFrame, overall: dict) -> list:
+        """Flag segments whose interval lies fully above or below the overall rate."""
+        candidates = table[(table["sent"] >= self.min_segment_size) & (table["segment"] != "unknown")]
+        if candidates.empty:
+            return []
+
+        reply_overall = overall["reply_rate"]
+        open_overall = overall["open_rate"]
+        reply_up = candidates["reply_ci_low"] > reply_overall
+        reply_down = candidates["reply_ci_high"] < reply_overall
+        open_down = candidates["open_ci_high"] < open_overall
+
+        flagged = candidates[reply_up | reply_down | open_down].copy()
+        if flagged.empty:
+            return []
+        flagged["effect"] = np.maximum((flagged["reply_rate"] - reply_overall).abs(),
+                                       (flagged["open_rate"] - open_overall).abs())
+        flagged = flagged.nlargest(self.max_recommendations, "effect")
+
+        recommendations = []
+        for row in flagged.itertuples(index=False):
+            label = f"{row.dimension}={row.segment} (n={row.sent})"
+            if row.reply_ci_low > reply_overall:
+                recommendations.append(
+                    f"{label} replies at {row.reply_rate:.1f}% [{row.reply_ci_low:.1f}-{row.reply_ci_high:.1f}%] "
+                    f"vs {reply_overall:.1f}% overall. Prioritize and expand targeting of similar leads."
+                )
+            elif row.reply_ci_high < reply_overall:
+                recommendations.append(
+                    f"{label} replies at {row.reply_rate:.1f}% [{row.reply_ci_low:.1f}-{row.reply_ci_high:.1f}%] "
+                    f"vs {reply_overall:.1f}% overall. Rework messaging for this segment or deprioritize it."
+                )
+            else:
+                recommendations.append(
+                    f"{label} opens at {row.open_rate:.1f}% [{row.open_ci_low:.1f}-{row.open_ci_high:.1f}%] "
+                    f"vs {open_overall:.1f}% overall. Test segment-specific subject lines and send times."
+                )
+        return recommendations
+
+    # ----------------------
+    # Entry point
+    # ----------------------
+    def analyze(self, responses, leads=None) -> dict:
+        """
+        Compute overall and per-segment engagement metrics.
+
+        Args:
+            responses: List of response dicts (or a DataFrame) from ResponseTrackerAgent
+            leads: Optional list of enriched / ranked lead dicts (or a DataFrame) to join on
+
+        Returns:
+            dict with "overall", "segments" (list of per-segment rows) and "recommendations"
+        """
+        events = self._frame(responses)
+        total = len(events)
+        flags = np.zeros((total, len(METRICS)), dtype=bool)
+        for col, metric in enumerate(METRICS):
+            if metric in events.columns:
+                flags[:, col] = events[metric].fillna(False).astype(bool).to_numpy()
+        counts = dict(zip(METRICS, (int(c) for c in flags.sum(axis=0))))
+        overall = {
+            "total_sent": total,
+            "opened_count": counts["opened"],
+            "clicked_count": counts["clicked"],
+            "replied_count": counts["replied"],
+            "open_rate": counts["opened"] / total * 100 if total else 0,
+            "click_rate": counts["clicked"] / total * 100 if total else 0,
+            "reply_rate": counts["replied"] / total * 100 if total else 0,
+        }
+
+        if leads is None or total == 0 or len(leads) == 0:
+            return {"overall": overall, "segments": [], "recommendations": []}
+
+        # Collapse events to per-lead counts first; unmatched responses land in the last row
+        lead_frame = self._frame(leads)
+        positions = self._lead_positions(events, lead_frame)
+        positions = np.where(positions >= 0, positions, len(lead_frame))
+        per_lead = np.empty((len(lead_frame) + 1, len(METRICS) + 1))
+        per_lead[:, 0] = np.bincount(positions, minlength=len(lead_frame) + 1)
+        for col in range(len(METRICS)):
+            per_lead[:, col + 1] = np.bincount(positions, weights=flags[:, col], minlength=len(lead_frame) + 1)
+
+        table = self._segment_table(per_lead, self._lead_segments(lead_frame))
+        return {
+            "overall": overall,
+            "segments": table.to_dict(orient="records"),
+            "recommendations": self._recommend(table, overall),
+        }
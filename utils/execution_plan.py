@@ -0,0 +1,165 @@
+from collections.abc import Mapping, Sequence
+
+# output_schema type names -> accepted Python types (SpilledList is a Sequence)
+SCHEMA_TYPES = {
+    "string": (str,),
+    "array": (list, tuple, Sequence),
+    "object": (dict, Mapping),
+    "number": (int, float),
+    "boolean": (bool,)
+}
+
+
+def _is_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith("{{") and value.endswith("}}")
+
+
+def _schema_matches(value, schema) -> bool:
+    """Top-level type check of one output value against its output_schema entry."""
+    if value is None:
+        return True
+    if isinstance(schema, list):
+        return isinstance(value, SCHEMA_TYPES["array"]) and not isinstance(value, str)
+    if isinstance(schema, dict):
+        return isinstance(value, SCHEMA_TYPES["object"])
+    types = SCHEMA_TYPES.get(schema)
+    if types is None:
+        return True
+    if schema == "array" and isinstance(value, str):
+        return False
+    return isinstance(value, types)
+
+
+def _constant(value):
+    return lambda step_outputs: value
+
+
+def _step_accessor(ref_step: str, path: tuple):
+    """Accessor for {{step.output.key...}}: walks dict keys; a non-dict output is passed as is."""
+    def access(step_outputs: dict):
+        value = step_outputs.get(ref_step, {}).get("output")
+        for key in path:
+            if not isinstance(value, dict):
+                break
+            value = value.get(key)
+        return value
+    return access
+
+
+class PlannedStep:
+    """One compiled workflow step: pre-resolved input accessors and its output schema."""
+
+    def __init__(self, step: dict, inputs: dict, static_inputs: dict, dependencies: list):
+        self.id = step["id"]
+        self.agent_name = step["agent"]
+        self.step = step
+        self.inputs = inputs
+        self.static_inputs = static_inputs
+        self.dependencies = dependencies
+        self.output_schema = step.get("output_schema") or {}
+
+    def resolve_inputs(self, step_outputs: dict) -> dict:
+        """Inputs for agent.run given the outputs of the steps run so far ({step_id: {"output": ...}})."""
+        return {name: accessor(step_outputs) for name, accessor in self.inputs.items()}
+
+    def check_output(self, output) -> list:
+        """Mismatches between an agent's output and the step's output_schema (top-level keys and types)."""
+        if not self.output_schema:
+            return []
+        if not isinstance(output, dict):
+            return [f"expected an object with {sorted(self.output_schema)}, got {type(output).__name__}"]
+        problems = []
+        for key, schema in self.output_schema.items():
+            if key not in output:
+                problems.append(f"missing '{key}'")
+            elif not _schema_matches(output[key], schema):
+                problems.append(f"'{key}' is {type(output[key]).__name__}, expected "
+                                f"{schema if isinstance(schema, str) else type(schema).__name__}")
+        return problems
+
+
+class ExecutionPlan:
+    """
+    workflow.json compiled once: step order, input references parsed into
+    accessor functions, {{config.*}} references resolved to their values and
+    every reference validated, so a bad workflow fails when it is loaded
+    instead of silently passing None to an agent.
+    """
+
+    def __init__(self, workflow: dict):
+        """
+        Compile a workflow.
+
+        Args:
+            workflow: Parsed workflow.json
+
+        Raises:
+            ValueError: duplicate step ids, missing agents, unknown or forward
+                step references, references to keys absent from the producing
+                step's output_schema, or missing config entries
+        """
+        self.workflow = workflow
+        self.config = workflow.get("config", {})
+        self.steps = []
+        self.by_id = {}
+        errors = []
+        for step in workflow.get("steps", []):
+            if not step.get("id") or not step.get("agent"):
+                raise ValueError(f"Step missing 'agent' or 'id': {step}")
+            if step["id"] in self.by_id:
+                errors.append(f"duplicate step id '{step['id']}'")
+                continue
+            planned = self._compile_step(step, errors)
+            self.steps.append(planned)
+            self.by_id[planned.id] = planned
+        if errors:
+            raise ValueError("Invalid workflow: " + "; ".join(errors))
+
+    @property
+    def step_ids(self) -> list:
+        return [step.id for step in self.steps]
+
+    def _resolve_config(self, path: list, where: str, errors: list):
+        value = self.config
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                errors.append(f"{where}: config.{'.'.join(path)} is not defined")
+                return None
+            value = value[key]
+        return value
+
+    def _compile_step(self, step: dict, errors: list) -> PlannedStep:
+        inputs, static_inputs, dependencies = {}, {}, []
+        for name, value in step.get("inputs", {}).items():
+            where = f"step '{step['id']}' input '{name}'"
+            if not _is_ref(value):
+                inputs[name] = _constant(value)
+                static_inputs[name] = value
+                continue
+
+            ref = value[2:-2].strip().split(".")
+            if ref[0] == "config":
+                resolved = self._resolve_config(ref[1:], where, errors)
+                inputs[name] = _constant(resolved)
+                static_inputs[name] = resolved
+                continue
+
+            # Example: "{{prospect_search.output.leads}}"
+            producer = self.by_id.get(ref[0])
+            if producer is None:
+                errors.append(f"{where}: '{value}' does not reference an earlier step")
+                continue
+            path = tuple(ref[2:] if len(ref) > 1 and ref[1] == "output" else ref[1:])
+            if path and producer.output_schema and path[0] not in producer.output_schema:
+                errors.append(f"{where}: '{path[0]}' is not in the output_schema of step '{producer.id}' "
+                              f"({sorted(producer.output_schema)})")
+                continue
+            inputs[name] = _step_accessor(producer.id, path)
+            dependencies.append(producer.id)
+        return PlannedStep(step, inputs, static_inputs, dependencies)
+
+    def get_step(self, step_id: str) -> PlannedStep:
+        step = self.by_id.get(step_id)
+        if step is None:
+            raise ValueError(f"Unknown step '{step_id}'. Available steps: {self.step_ids}")
+        return step
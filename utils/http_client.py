@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.logger import get_logger
+from utils.metrics import get_metrics
+from utils.rate_limiter import get_rate_limiter
+
+logger = get_logger(__name__)
+
+# Optional: async interface with HTTP/2 via httpx (falls back to a worker thread)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_HTTP_CONFIG = {
+    "connect_timeout": 5,
+    "read_timeout": 30,
+    "pool_connections": 10,
+    "pool_maxsize": 20,
+    "http2": True,
+    # Optional {host: base_url} overrides, e.g. {"api.apollo.io": "http://127.0.0.1:8801"}
+    # to point providers at local stand-ins (benchmarks/); rate limits and
+    # metrics still apply under the original provider
+    "base_urls": {}
+}
+
+
+class HttpTransport:
+    """
+    Shared HTTP transport for agents and apis modules.
+    One requests.Session holds a keep-alive connection pool per host, every call
+    gets the same connect/read timeouts, and connection reuse is tracked per host.
+    Calls to known providers go through the shared RateLimiter (token bucket,
+    retries with backoff / Retry-After, circuit breaker).
+    An async interface is available through httpx (HTTP/2 when h2 is installed).
+    """
+
+    def __init__(self, **config):
+        """
+        Initialize HttpTransport.
+        Accepts connect_timeout, read_timeout, pool_connections, pool_maxsize, http2
+        and base_urls (see DEFAULT_HTTP_CONFIG).
+        """
+        settings = {**DEFAULT_HTTP_CONFIG, **config}
+        self.connect_timeout = float(settings["connect_timeout"])
+        self.read_timeout = float(settings["read_timeout"])
+        self.pool_connections = int(settings["pool_connections"])
+        self.pool_maxsize = int(settings["pool_maxsize"])
+        self.http2 = bool(settings["http2"]) and HTTP2_AVAILABLE
+        self.base_urls = {host.lower(): urlsplit(base) for host, base in (settings["base_urls"] or {}).items()}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._async_clients = {}
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._http_versions = defaultdict(lambda: defaultdict(int))
+
+    # ----------------------
+    # Sync interface
+    # ----------------------
+    def _timeout(self, timeout):
+        """Normalize a per-call override: a number overrides the read timeout only."""
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, (int, float)):
+            return (self.connect_timeout, float(timeout))
+        return timeout
+
+    def _rewrite(self, url: str) -> str:
+        """Apply base_urls overrides: swap scheme/host and prefix the override's path."""
+        if not self.base_urls:
+            return url
+        parts = urlsplit(url)
+        base = self.base_urls.get((parts.hostname or "").lower())
+        if base is None:
+            return url
+        return urlunsplit((base.scheme, base.netloc, base.path.rstrip("/") + parts.path, parts.query, parts.fragment))
+
+    def _count(self, url: str, http_version: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._requests[host] += 1
+            self._http_versions[host][http_version] += 1
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        """
+        Send a request over the pooled session.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            timeout: Optional read timeout override (seconds) or (connect, read) tuple
+            **kwargs: Passed through to requests (json, params, headers, stream, ...)
+
+        Returns:
+            requests.Response (raises requests exceptions like requests.request)
+        """
+        timeout = self._timeout(timeout)
+        limiter = get_rate_limiter()
+        provider = limiter.provider_for(url)
+        metrics = get_metrics()
+        endpoint = provider or urlsplit(url).netloc
+
+        target = self._rewrite(url)
+
+        def attempt():
+            # One timed HTTP attempt; retries show up as separate observations
+            with metrics.time_call(endpoint, method.upper()):
+                return self.session.request(method, target, timeout=timeout, **kwargs)
+
+        response = attempt() if provider is None else limiter.send(provider, method, attempt)
+        self._count(target, "HTTP/1.1")
+        # High-volume event: keep it cheap when DEBUG is off (sampled via logging.debug_sample_rates)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s %s -> %s in %.3fs", method.upper(), endpoint, response.status_code,
+                         response.elapsed.total_seconds(), extra={"endpoint": endpoint})
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    # ----------------------
+    # Async interface
+    # ----------------------
+    def _async_client(self):
+        """One httpx.AsyncClient per running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(id(loop))
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_connections * self.pool_maxsize,
+                                    max_keepalive_connections=self.pool_maxsize)
+            )
+            self._async_clients[id(loop)] = client
+        return client
+
+    async def arequest(self, method: str, url: str, timeout=None, **kwargs):
+        """
+        Async variant of request().
+        Uses httpx when installed (returns httpx.Response), otherwise runs the
+        pooled sync request in a worker thread (returns requests.Response).
+        """
+        if httpx is None:
+            return await asyncio.to_thread(self.request, method, url, timeout=timeout, **kwargs)
+
+        if timeout is not None:
+            connect, read = self._timeout(timeout)
+            kwargs["timeout"] = httpx.Timeout(read, connect=connect)
+        client = self._async_client()
+        limiter = get_rate_limiter()
+        provider = limiter.provider_for(url)
+        metrics = get_metrics()
+        endpoint = provider or urlsplit(url).netloc
+
+        target = self._rewrite(url)
+
+        async def attempt():
+            with metrics.time_call(endpoint, method.upper()):
+                return await client.request(method, target, **kwargs)
+
+        if provider is None:
+            response = await attempt()
+        else:
+            response = await limiter.asend(provider, method, attempt, retry_errors=(httpx.TransportError,))
+        self._count(target, response.http_version)
+        return response
+
+    async def aget(self, url: str, **kwargs):
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs):
+        return await self.arequest("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close the async client bound to the current event loop."""
+        client = self._async_clients.pop(id(asyncio.get_running_loop()), None)
+        if client is not None:
+            await client.aclose()
+
+    # ----------------------
+    # Stats / lifecycle
+    # ----------------------
+    def stats(self) -> dict:
+        """
+        Per-host connection reuse stats.
+        Returns { host: {"requests", "connections_opened", "reused", "reuse_ratio", "http_versions"} }
+        """
+        opened = defaultdict(int)
+        pooled_requests = defaultdict(int)
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                opened[host] += pool.num_connections
+                pooled_requests[host] += pool.num_requests
+
+        report = {}
+        with self._lock:
+            for host, count in self._requests.items():
+                connections = opened.get(host, 0)
+                sync_requests = pooled_requests.get(host, 0)
+                reused = max(0, sync_requests - connections)
+                report[host] = {
+                    "requests": count,
+                    "connections_opened": connections,
+                    "reused": reused,
+                    "reuse_ratio": round(reused / sync_requests, 3) if sync_requests else None,
+                    "http_versions": dict(self._http_versions[host])
+                }
+        return report
+
+    def close(self):
+        """Close pooled sync connections."""
+        self.session.close()
+
+
+# ----------------------
+# Shared instance
+# ----------------------
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def configure_transport(**config) -> HttpTransport:
+    """
+    (Re)create the shared transport with the given settings (e.g. workflow.json config.http).
+    The previous transport is swapped out, not closed: requests in flight on it
+    finish normally and its pools close when it is garbage collected.
+    """
+    global _transport
+    with _transport_lock:
+        _transport = HttpTransport(**config)
+    return _transport
+
+
+def get_transport() -> HttpTransport:
+    """Return the shared transport, creating it with defaults on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
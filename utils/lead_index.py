@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+
+# Columns the explorer can sort on (each backed by an index)
+SORT_COLUMNS = ("score", "stored_at", "company", "seniority_level")
+
+COLUMNS = ("id", "company", "contact", "role", "seniority_level", "technologies", "score", "stored_at")
+
+
+class LeadIndex:
+    """
+    SQLite sidecar of the enriched Chroma collection: one row of metadata per
+    stored lead, indexed on the columns the lead explorer sorts and filters on.
+    Chroma has no server-side ordering or offset-by-sort, so paging through
+    hundreds of thousands of leads goes through this table and only the ids
+    on the visible page ever touch Chroma.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize LeadIndex.
+
+        Args:
+            path: SQLite file path (parent directory is created if needed)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS enriched_leads ("
+            " id TEXT PRIMARY KEY, company TEXT COLLATE NOCASE, contact TEXT, role TEXT, seniority_level TEXT,"
+            " technologies TEXT, score REAL NOT NULL DEFAULT 0, stored_at TEXT)"
+        )
+        for column in SORT_COLUMNS:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_enriched_{column} ON enriched_leads({column}, id)")
+        self._conn.commit()
+
+    @staticmethod
+    def _row(lead_id: str, metadata: dict) -> tuple:
+        try:
+            score = float(metadata.get("score") or 0)
+        except (TypeError, ValueError):
+            score = 0.0
+        return (lead_id, metadata.get("company", ""), metadata.get("contact", ""), metadata.get("role", ""),
+                metadata.get("seniority_level", ""), metadata.get("technologies", ""), score,
+                metadata.get("stored_at", ""))
+
+    def add(self, ids: list, metadatas: list):
+        """Index newly stored leads (ids already indexed are left unchanged)."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO enriched_leads ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [self._row(lead_id, metadata) for lead_id, metadata in zip(ids, metadatas)]
+            )
+
+    def update_scores(self, scores: dict):
+        """Set scores of indexed leads: { id: score }."""
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE enriched_leads SET score = ? WHERE id = ?",
+                                   [(float(score), lead_id) for lead_id, score in scores.items()])
+
+    def count(self, filters: dict = None) -> int:
+        """Number of indexed leads matching filters (see query)."""
+        where, params = self._where(filters or {})
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM enriched_leads{where}", params).fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM enriched_leads")
+
+    @staticmethod
+    def _where(filters: dict) -> tuple:
+        """Build a WHERE clause from explorer filters."""
+        clauses, params = [], []
+        if filters.get("min_score") is not None:
+            clauses.append("score >= ?")
+            params.append(filters["min_score"])
+        if filters.get("max_score") is not None:
+            clauses.append("score <= ?")
+            params.append(filters["max_score"])
+        if filters.get("seniority_levels"):
+            clauses.append(f"seniority_level IN ({', '.join('?' * len(filters['seniority_levels']))})")
+            params.extend(filters["seniority_levels"])
+        if filters.get("company"):
+            # Case-insensitive prefix match on a NOCASE column can use the company index
+            clauses.append("company LIKE ? ESCAPE '\\'")
+            prefix = filters["company"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(prefix + "%")
+        if filters.get("stored_after"):
+            clauses.append("stored_at >= ?")
+            params.append(filters["stored_after"])
+        if filters.get("stored_before"):
+            clauses.append("stored_at < ?")
+            params.append(filters["stored_before"])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, filters: dict = None, sort_by: str = "score", descending: bool = True,
+              offset: int = 0, limit: int = 50) -> list:
+        """
+        One page of indexed leads.
+
+        Args:
+            filters: min_score, max_score, seniority_levels (list), company (prefix),
+                stored_after / stored_before (ISO timestamps)
+            sort_by: One of SORT_COLUMNS
+            descending: Sort direction
+            offset: Rows to skip
+            limit: Page size
+
+        Returns:
+            list: row dicts of the page
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'. Available: {list(SORT_COLUMNS)}")
+        where, params = self._where(filters or {})
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM enriched_leads{where}"
+                f" ORDER BY {sort_by} {direction}, id {direction} LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)]
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def seniority_levels(self) -> list:
+        """Distinct seniority levels, for filter choices."""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT seniority_level FROM enriched_leads"
+                                      " WHERE seniority_level != '' ORDER BY seniority_level").fetchall()
+        return [row[0] for row in rows]
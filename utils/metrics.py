@@ -0,0 +1,320 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Step executions run for minutes to hours (e.g. rate-limited LLM generation)
+STEP_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0,
+                         7200.0, 14400.0)
+# Histograms with their own bucket bounds; every other histogram uses LATENCY_BUCKETS
+HISTOGRAM_BUCKETS = {"step_duration_seconds": STEP_DURATION_BUCKETS}
+
+
+def buckets_for(name: str) -> tuple:
+    """Bucket upper bounds (seconds) of a histogram."""
+    return HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS)
+
+
+def count_items(output) -> int:
+    """Number of items a step produced: length of its first list value (or of the list itself)."""
+    values = output.values() if isinstance(output, dict) else [output]
+    for value in values:
+        # lists, tuples and spilled lists
+        if hasattr(value, "__len__") and not isinstance(value, (str, bytes, dict)):
+            return len(value)
+    return 0
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process metrics: counters and latency histograms keyed by
+    name + labels, plus per-step timings. Exported as a JSON run report and in
+    the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._steps = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    # ----------------------
+    # Recording
+    # ----------------------
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increase a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation (seconds) in a latency histogram."""
+        key = self._key(name, labels)
+        bounds = buckets_for(name)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"buckets": [0] * len(bounds), "count": 0, "sum": 0.0}
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+                    break
+            hist["count"] += 1
+            hist["sum"] += value
+
+    @contextmanager
+    def time_call(self, endpoint: str, operation: str = "request"):
+        """Time an external call into external_call_duration_seconds; exceptions count as errors."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("external_call_errors_total", endpoint=endpoint, operation=operation)
+            raise
+        finally:
+            self.observe("external_call_duration_seconds", time.perf_counter() - started,
+                         endpoint=endpoint, operation=operation)
+
+    def record_step(self, step_id: str, wall: float, cpu: float, items: int = 0, agent: str = ""):
+        """Accumulate wall / CPU seconds and items produced for a step; each execution is one latency sample."""
+        self.observe("step_duration_seconds", wall, step=step_id)
+        with self._lock:
+            step = self._steps.setdefault(step_id, {"agent": agent, "runs": 0, "wall_seconds": 0.0,
+                                                    "cpu_seconds": 0.0, "items": 0})
+            step["runs"] += 1
+            step["wall_seconds"] += wall
+            step["cpu_seconds"] += cpu
+            step["items"] += items
+
+    @contextmanager
+    def step_timer(self, step_id: str, agent: str = "", per_thread: bool = False):
+        """
+        Time a step. Yields a dict; set "items" in it to record throughput.
+        per_thread measures CPU of the calling thread only (for steps running
+        concurrently in a thread pool); otherwise process CPU time is used.
+        """
+        cpu_clock = time.thread_time if per_thread else time.process_time
+        tracker = {"items": 0}
+        wall_start, cpu_start = time.perf_counter(), cpu_clock()
+        try:
+            yield tracker
+        finally:
+            self.record_step(step_id, time.perf_counter() - wall_start, cpu_clock() - cpu_start,
+                             tracker["items"], agent)
+
+    # ----------------------
+    # Snapshots (multi-process merge)
+    # ----------------------
+    def snapshot(self) -> dict:
+        """Picklable copy of every metric, for merging results from worker processes."""
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), dict(hist, buckets=list(hist["buckets"]))]
+                               for (name, labels), hist in self._histograms.items()],
+                "steps": {step_id: dict(step) for step_id, step in self._steps.items()}
+            }
+
+    def merge(self, snapshot: dict):
+        """Add a snapshot() from another registry into this one."""
+        with self._lock:
+            for name, labels, value in snapshot.get("counters", []):
+                key = (name, tuple(tuple(label) for label in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, other in snapshot.get("histograms", []):
+                key = (name, tuple(tuple(label) for label in labels))
+                hist = self._histograms.setdefault(key, {"buckets": [0] * len(buckets_for(name)), "count": 0,
+                                                         "sum": 0.0})
+                hist["buckets"] = [a + b for a, b in zip(hist["buckets"], other["buckets"])]
+                hist["count"] += other["count"]
+                hist["sum"] += other["sum"]
+        for step_id, step in snapshot.get("steps", {}).items():
+            with self._lock:
+                current = self._steps.setdefault(step_id, {"agent": step.get("agent", ""), "runs": 0,
+                                                           "wall_seconds": 0.0, "cpu_seconds": 0.0, "items": 0})
+                for field in ("runs", "wall_seconds", "cpu_seconds", "items"):
+                    current[field] += step[field]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._steps.clear()
+
+    # ----------------------
+    # Export
+    # ----------------------
+    @staticmethod
+    def _quantile(hist: dict, q: float, bounds: tuple = LATENCY_BUCKETS):
+        """
+        Approximate quantile from bucket counts (upper bound of the bucket reaching q).
+        None when there are no observations or the quantile lies beyond the last bucket.
+        """
+        if not hist["count"]:
+            return None
+        target = q * hist["count"]
+        seen = 0
+        for bound, count in zip(bounds, hist["buckets"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def report(self) -> dict:
+        """
+        JSON run report:
+        { "steps": {step: {wall_seconds, cpu_seconds, items, items_per_second, p50/p95/p99_seconds, ...}},
+          "endpoints": {endpoint: {calls, errors, mean_seconds, p50/p95/p99_seconds}},
+          "providers": {provider: {retries, rate_limited, short_circuited}},
+          "caches": {cache: {hits, misses, hit_rate}} }
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: dict(hist) for key, hist in self._histograms.items()}
+            steps = {step_id: dict(step) for step_id, step in self._steps.items()}
+
+        for step in steps.values():
+            step["wall_seconds"] = round(step["wall_seconds"], 4)
+            step["cpu_seconds"] = round(step["cpu_seconds"], 4)
+            step["items_per_second"] = round(step["items"] / step["wall_seconds"], 2) if step["wall_seconds"] else None
+        # Per-execution latency distribution (one sample per step run or bulk chunk)
+        for (name, labels), hist in histograms.items():
+            step = steps.get(dict(labels).get("step")) if name == "step_duration_seconds" else None
+            if step is not None:
+                for q in (0.5, 0.95, 0.99):
+                    step[f"p{int(q * 100)}_seconds"] = self._quantile(hist, q, STEP_DURATION_BUCKETS)
+
+        endpoints = {}
+        for (name, labels), hist in histograms.items():
+            if name != "external_call_duration_seconds":
+                continue
+            label_map = dict(labels)
+            endpoint = label_map.get("endpoint", "unknown")
+            entry = endpoints.setdefault(endpoint, {"calls": 0, "errors": 0, "total_seconds": 0.0,
+                                                    "buckets": [0] * len(LATENCY_BUCKETS)})
+            entry["calls"] += hist["count"]
+            entry["total_seconds"] += hist["sum"]
+            entry["buckets"] = [a + b for a, b in zip(entry["buckets"], hist["buckets"])]
+        for (name, labels), value in counters.items():
+            if name == "external_call_errors_total":
+                endpoint = dict(labels).get("endpoint", "unknown")
+                endpoints.setdefault(endpoint, {"calls": 0, "errors": 0, "total_seconds": 0.0,
+                                                "buckets": [0] * len(LATENCY_BUCKETS)})["errors"] += value
+        for entry in endpoints.values():
+            hist = {"buckets": entry["buckets"], "count": entry["calls"]}
+            entry["mean_seconds"] = round(entry["total_seconds"] / entry["calls"], 4) if entry["calls"] else None
+            for q in (0.5, 0.95, 0.99):
+                entry[f"p{int(q * 100)}_seconds"] = self._quantile(hist, q)
+            entry["total_seconds"] = round(entry["total_seconds"], 4)
+            entry["buckets"] = dict(zip([str(b) for b in LATENCY_BUCKETS], entry["buckets"]))
+
+        providers = {}
+        caches = {}
+        for (name, labels), value in counters.items():
+            label_map = dict(labels)
+            if name.startswith("provider_") and name.endswith("_total"):
+                providers.setdefault(label_map.get("provider", "unknown"), {})[name[9:-6]] = value
+            elif name == "cache_requests_total":
+                cache = caches.setdefault(label_map.get("cache", "default"), {"hits": 0, "misses": 0})
+                cache["hits" if label_map.get("result") == "hit" else "misses"] += value
+        for cache in caches.values():
+            total = cache["hits"] + cache["misses"]
+            cache["hit_rate"] = round(cache["hits"] / total, 4) if total else None
+
+        return {"steps": steps, "endpoints": endpoints, "providers": providers, "caches": caches}
+
+    @staticmethod
+    def _labels(labels) -> str:
+        if not labels:
+            return ""
+        def escape(value) -> str:
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (prefix autoreach_)."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            steps = sorted(self._steps.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"autoreach_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{self._labels(labels)} {value}")
+
+        for (name, labels), hist in histograms:
+            metric = f"autoreach_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(buckets_for(name), hist["buckets"]):
+                cumulative += count
+                lines.append(f"{metric}_bucket{self._labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{metric}_bucket{self._labels(labels + (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{metric}_sum{self._labels(labels)} {hist['sum']}")
+            lines.append(f"{metric}_count{self._labels(labels)} {hist['count']}")
+
+        for field, kind in (("wall_seconds", "counter"), ("cpu_seconds", "counter"), ("items", "counter")):
+            metric = f"autoreach_step_{field}_total"
+            lines.append(f"# TYPE {metric} {kind}")
+            for step_id, step in steps:
+                lines.append(f"{metric}{self._labels((('agent', step['agent']), ('step', step_id)))} {step[field]}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str) -> dict:
+        """Write metrics.json and metrics.prom into directory. Returns the report."""
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+        with open(os.path.join(directory, "metrics.json"), "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        with open(os.path.join(directory, "metrics.prom"), "w") as f:
+            f.write(self.to_prometheus())
+        return report
+
+    def serve(self, port: int = 9464, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Expose /metrics (Prometheus text format) from a background thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# ----------------------
+# Shared instance
+# ----------------------
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _metrics
@@ -0,0 +1,166 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_MODES = ("cprofile", "tracemalloc", "sampling")
+
+
+class StepProfiler:
+    """
+    Opt-in per-step profiling. Wraps selected workflow steps in cProfile,
+    tracemalloc snapshots and/or a sampling profiler and writes artifacts to
+    <run_dir>/profiles/:
+        <step>.pstats / <step>.cprofile.txt   cProfile stats + top-N by cumulative time
+        <step>.tracemalloc.txt                top-N allocation diff and peak traced memory
+        <step>.collapsed                      sampled stacks, one "a;b;c count" line per stack
+                                              (flamegraph.pl / speedscope input)
+    Callers only build a profiler when profiling is enabled (see from_config),
+    so a run without it pays nothing.
+    """
+
+    def __init__(self, run_dir: str, modes: list, steps: list = None, top_n: int = 25,
+                 sample_interval_ms: float = 5):
+        """
+        Initialize StepProfiler.
+
+        Args:
+            run_dir: Run directory; artifacts go to <run_dir>/profiles
+            modes: Any of "cprofile", "tracemalloc", "sampling"
+            steps: Step ids to profile (None = every step)
+            top_n: Entries in the text summaries
+            sample_interval_ms: Sampling profiler interval
+        """
+        unknown = set(modes) - set(PROFILE_MODES)
+        if unknown:
+            raise ValueError(f"Unknown profile mode(s) {sorted(unknown)}. Available: {list(PROFILE_MODES)}")
+        self.directory = os.path.join(run_dir, "profiles")
+        self.modes = list(modes)
+        self.steps = set(steps) if steps else None
+        self.top_n = top_n
+        self.sample_interval = sample_interval_ms / 1000.0
+
+    @classmethod
+    def from_config(cls, run_dir: str, config: dict = None, modes: list = None, steps: list = None):
+        """
+        Build a profiler from workflow.json config.profiling, with CLI modes/steps
+        taking precedence. Returns None when profiling is off.
+        """
+        config = dict(config or {})
+        if modes:
+            config["enabled"] = True
+            config["modes"] = modes
+        if steps:
+            config["steps"] = steps
+        if not config.get("enabled") or not config.get("modes"):
+            return None
+        return cls(run_dir, config["modes"], config.get("steps"), config.get("top_n", 25),
+                   config.get("sample_interval_ms", 5))
+
+    def wants(self, step_id: str) -> bool:
+        return self.steps is None or step_id in self.steps
+
+    @contextmanager
+    def profile(self, step_id: str):
+        """Profile the enclosed block as step_id (no-op for steps not selected)."""
+        if not self.wants(step_id):
+            yield
+            return
+        # Start every collector, stop them all, then write artifacts, so no
+        # collector measures another one's bookkeeping
+        collectors = [getattr(self, f"_{mode}")(step_id) for mode in PROFILE_MODES if mode in self.modes]
+        for collector in collectors:
+            next(collector)
+        try:
+            yield
+        finally:
+            for collector in reversed(collectors):
+                next(collector, None)
+            os.makedirs(self.directory, exist_ok=True)
+            for collector in collectors:
+                next(collector, None)
+
+    def _path(self, step_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{step_id}{suffix}")
+
+    # Each collector is a generator: start / yield / stop / yield / write artifacts
+
+    def _cprofile(self, step_id: str):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        yield
+        profiler.disable()
+        yield
+        profiler.dump_stats(self._path(step_id, ".pstats"))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(self.top_n)
+        with open(self._path(step_id, ".cprofile.txt"), "w") as f:
+            f.write(text.getvalue())
+
+    def _tracemalloc(self, step_id: str):
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(25)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        yield
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_here:
+            tracemalloc.stop()
+        yield
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        with open(self._path(step_id, ".tracemalloc.txt"), "w") as f:
+            f.write(f"step: {step_id}\ntraced now: {current / 1024 / 1024:.2f} MiB, "
+                    f"peak during step: {peak / 1024 / 1024:.2f} MiB\n\n"
+                    f"Top {self.top_n} allocation differences by line:\n")
+            for stat in diff[:self.top_n]:
+                f.write(f"{stat}\n")
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _sampling(self, step_id: str):
+        samples = Counter()
+        stop = threading.Event()
+
+        def sample():
+            me = threading.get_ident()
+            names = {}
+            while not stop.wait(self.sample_interval):
+                for thread in threading.enumerate():
+                    names[thread.ident] = thread.name
+                for ident, frame in sys._current_frames().items():
+                    if ident != me:
+                        samples[f"{names.get(ident, ident)};{self._collapse(frame)}"] += 1
+
+        sampler = threading.Thread(target=sample, name="step-profiler", daemon=True)
+        started = time.perf_counter()
+        sampler.start()
+        yield
+        stop.set()
+        sampler.join()
+        elapsed = time.perf_counter() - started
+        yield
+        with open(self._path(step_id, ".collapsed"), "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("%s: %d samples over %.2fs -> %s", step_id, sum(samples.values()), elapsed,
+                    self._path(step_id, ".collapsed"))
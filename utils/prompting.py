@@ -0,0 +1,59 @@
+# Prompt building and token estimation shared by OutreachContentAgent and
+# BudgetGateAgent, so the budget is sized on exactly the prompts that are sent.
+
+SYSTEM_PROMPT = "You are an SDR writing concise, personalized outreach emails. Keep emails under 150 words. Be friendly, professional, and specific."
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + (
+    " You will receive several leads, each with an id. Reply with JSON only, no prose or code fences, "
+    'in the form {"emails": [{"id": "<lead id>", "body": "<email text>"}]} with exactly one entry per lead.'
+)
+
+# Placeholders the LLM writes into cluster templates; filled in locally per lead
+NAME_PLACEHOLDER = "[[CONTACT_NAME]]"
+COMPANY_PLACEHOLDER = "[[COMPANY]]"
+
+
+def lead_fields(lead: dict) -> tuple:
+    """Extract (contact_name, company_name, role, technologies) used in prompts."""
+    contact_name = lead.get("contact", lead.get("contact_name", "there"))
+    company_name = lead.get("company", "your company")
+    role = lead.get("role", "decision maker")
+    technologies = ", ".join(lead.get("technologies", []))
+    return contact_name, company_name, role, technologies
+
+
+def build_prompt(contact_name: str, company_name: str, role: str, technologies: str,
+                 persona: str, tone: str) -> str:
+    """Build the email generation prompt for one lead (or one template)."""
+    return (
+        f"Write a short {tone} outreach email to {contact_name} at {company_name}. "
+        f"They are a {role} and their company uses: {technologies}. "
+        f"Mention one specific way we can help their team. "
+        f"Sign off professionally as {persona}. "
+        f"Keep it under 120 words. No subject line needed."
+    )
+
+
+def build_lead_prompt(lead: dict, persona: str, tone: str) -> str:
+    """Prompt for one lead's personalized email."""
+    return build_prompt(*lead_fields(lead), persona, tone)
+
+
+def build_template_prompt(lead: dict, persona: str, tone: str) -> str:
+    """Prompt for one parameterized email shared by a cluster of leads."""
+    _, _, role, technologies = lead_fields(lead)
+    return build_prompt(NAME_PLACEHOLDER, COMPANY_PLACEHOLDER, role, technologies, persona, tone) + (
+        f" Use the literal placeholders {NAME_PLACEHOLDER} for the recipient's name and "
+        f"{COMPANY_PLACEHOLDER} for their company; do not invent real names."
+    )
+
+
+def cluster_key(lead: dict) -> tuple:
+    """Prompt-relevant attributes (role + technologies) that leads sharing a template have in common."""
+    _, _, role, _ = lead_fields(lead)
+    return role.strip().lower(), tuple(sorted(t.strip().lower() for t in lead.get("technologies", [])))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
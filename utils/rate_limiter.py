@@ -0,0 +1,370 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+from utils.metrics import get_metrics
+
+
+# Hosts of the providers we call, mapped to their rate-limit policy name
+PROVIDER_HOSTS = {
+    "api.apollo.io": "apollo",
+    "api.hunter.io": "hunter",
+    "openrouter.ai": "openrouter",
+    "api.brevo.com": "brevo",
+    "sheets.googleapis.com": "sheets"
+}
+
+# Conservative defaults; override per tool with "rate_limit" in workflow.json
+DEFAULT_POLICIES = {
+    "apollo": {"requests_per_second": 1.0, "burst": 5, "retry_post": True},
+    "hunter": {"requests_per_second": 10.0, "burst": 10, "retry_post": True},
+    "openrouter": {"requests_per_second": 0.33, "burst": 2, "retry_post": True},
+    "brevo": {"requests_per_second": 10.0, "burst": 10, "retry_post": False},
+    "sheets": {"requests_per_second": 1.0, "burst": 5, "retry_post": False}
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses where the request was certainly not processed, so even a
+# non-idempotent POST can be retried safely
+SAFE_POST_RETRY_STATUSES = {429, 503}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a provider's circuit breaker is open and calls are short-circuited."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at `rate` tokens per second up to `capacity`.
+    acquire() blocks until a token is available, so concurrent workers share one budget.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens, sleeping as needed. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = max(self.blocked_until - now, (tokens - self.tokens) / self.rate if self.rate > 0 else 1.0)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Block all acquirers for `seconds` (used for Retry-After) and drain the bucket."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class ProviderPolicy:
+    """Token bucket + retry settings + circuit breaker for one provider."""
+
+    def __init__(self, name: str, requests_per_second: float = 1.0, burst: float = 1, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, retry_post: bool = False,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, **_):
+        self.name = name
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = int(max_retries)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.retry_post = bool(retry_post)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class RateLimiter:
+    """
+    Registry of per-provider policies shared by every agent and thread.
+    Providers are resolved from the request host (PROVIDER_HOSTS).
+    """
+
+    def __init__(self):
+        self._policies = {}
+        self._settings = {}
+        self._share = 1.0
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: defaultdict(float))
+
+    def _build_policy(self, provider: str, settings: dict) -> ProviderPolicy:
+        """Policy with the token bucket scaled to this process's share of the budget."""
+        scaled = dict(settings)
+        scaled["requests_per_second"] = scaled.get("requests_per_second", 1.0) * self._share
+        scaled["burst"] = max(1, scaled.get("burst", 1) * self._share)
+        return ProviderPolicy(provider, **scaled)
+
+    def configure(self, provider: str, **config):
+        """
+        Create or replace the policy for a provider (merged over DEFAULT_POLICIES).
+        Unchanged settings keep the existing policy, so a workflow reload does not
+        refill token buckets or close open circuits.
+        """
+        settings = {**DEFAULT_POLICIES.get(provider, {}), **config}
+        with self._lock:
+            if self._settings.get(provider) == settings and provider in self._policies:
+                return
+            self._settings[provider] = settings
+            self._policies[provider] = self._build_policy(provider, settings)
+
+    def set_share(self, share: float):
+        """
+        Limit this process to a fraction of every provider's budget, so N worker
+        processes together stay within the configured rate (share = 1 / N).
+        """
+        with self._lock:
+            self._share = float(share)
+            for provider in list(self._policies):
+                settings = self._settings.get(provider, DEFAULT_POLICIES.get(provider, {}))
+                self._policies[provider] = self._build_policy(provider, settings)
+
+    def policy(self, provider: str) -> ProviderPolicy:
+        with self._lock:
+            if provider not in self._policies:
+                self._policies[provider] = self._build_policy(provider, DEFAULT_POLICIES.get(provider, {}))
+            return self._policies[provider]
+
+    @staticmethod
+    def provider_for(url: str) -> str:
+        """Provider name for a URL, or None if it is not a rate-limited provider."""
+        host = urlsplit(url).hostname or ""
+        for suffix, provider in PROVIDER_HOSTS.items():
+            if host == suffix or host.endswith("." + suffix):
+                return provider
+        return None
+
+    @staticmethod
+    def retry_after(response) -> float:
+        """Parse a Retry-After header (seconds or HTTP date); None if absent."""
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _record(self, provider: str, key: str, amount: float = 1):
+        with self._lock:
+            self._stats[provider][key] += amount
+        if key != "requests":
+            get_metrics().inc(f"provider_{key}_total", amount, provider=provider)
+
+    def _before_attempt(self, provider: str, policy: ProviderPolicy):
+        """Circuit check + request accounting shared by send() and asend()."""
+        if not policy.breaker.allow():
+            self._record(provider, "short_circuited")
+            raise CircuitOpenError(f"Circuit open for provider '{provider}'")
+        self._record(provider, "requests")
+
+    def _after_attempt(self, provider: str, policy: ProviderPolicy, idempotent: bool, attempt: int,
+                       response=None, error: Exception = None):
+        """
+        Decide what to do after one attempt.
+        Returns None to hand the response back to the caller, or the delay to
+        sleep before retrying. Re-raises the error when it must not be retried.
+        """
+        last_attempt = attempt == policy.max_retries
+
+        if error is not None:
+            policy.breaker.record_failure()
+            # A read timeout on a non-idempotent POST may already have been processed
+            unsafe = not idempotent and not isinstance(error, requests.exceptions.ConnectTimeout)
+            if last_attempt or unsafe:
+                raise error
+            self._record(provider, "retries")
+            return policy.backoff(attempt)
+
+        status = response.status_code
+        retryable = status in (RETRY_STATUSES if idempotent else SAFE_POST_RETRY_STATUSES)
+        if not retryable:
+            if status < 500:
+                policy.breaker.record_success()
+            else:
+                policy.breaker.record_failure()
+            return None
+
+        delay = self.retry_after(response)
+        if status == 429:
+            self._record(provider, "rate_limited")
+            # Throttle every worker for this provider, not just this call
+            policy.bucket.pause(delay if delay is not None else policy.backoff(attempt))
+            # The provider is up, so a half-open trial ends here instead of holding its slot
+            policy.breaker.record_success()
+        else:
+            policy.breaker.record_failure()
+
+        if last_attempt:
+            return None
+        self._record(provider, "retries")
+        return delay if delay is not None else policy.backoff(attempt)
+
+    def send(self, provider: str, method: str, send):
+        """
+        Run `send()` (one HTTP attempt returning a requests.Response) under the
+        provider's policy: wait for a token, retry transient failures with jittered
+        exponential backoff or Retry-After, and trip the circuit breaker on
+        repeated failures. The final response is returned even if it is an error
+        status, so callers keep using raise_for_status().
+        """
+        policy = self.policy(provider)
+        idempotent = method.upper() != "POST" or policy.retry_post
+
+        for attempt in range(policy.max_retries + 1):
+            self._before_attempt(provider, policy)
+            self._record(provider, "throttled_seconds", policy.bucket.acquire())
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                time.sleep(self._after_attempt(provider, policy, idempotent, attempt, error=e))
+                continue
+            except BaseException:
+                # Any other failure still counts, so a half-open trial never keeps its slot
+                policy.breaker.record_failure()
+                raise
+
+            delay = self._after_attempt(provider, policy, idempotent, attempt, response=response)
+            if delay is None:
+                return response
+            response.close()
+            time.sleep(delay)
+
+    async def asend(self, provider: str, method: str, send, retry_errors: tuple = ()):
+        """
+        Async variant of send(): `send` is a coroutine function returning a response
+        with .status_code / .headers (e.g. httpx). retry_errors lists the client's
+        transient exception types.
+        """
+        policy = self.policy(provider)
+        idempotent = method.upper() != "POST" or policy.retry_post
+
+        for attempt in range(policy.max_retries + 1):
+            self._before_attempt(provider, policy)
+            self._record(provider, "throttled_seconds", await asyncio.to_thread(policy.bucket.acquire))
+            try:
+                response = await send()
+            except retry_errors as e:
+                await asyncio.sleep(self._after_attempt(provider, policy, idempotent, attempt, error=e))
+                continue
+            except BaseException:
+                # Includes cancellation: a half-open trial must always be resolved
+                policy.breaker.record_failure()
+                raise
+
+            delay = self._after_attempt(provider, policy, idempotent, attempt, response=response)
+            if delay is None:
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    def call(self, provider: str, fn, *args, **kwargs):
+        """
+        Run a non-HTTP client call (e.g. gspread) under the provider's policy.
+        Exceptions carrying a retryable `.response.status_code` are retried.
+        """
+        policy = self.policy(provider)
+        for attempt in range(policy.max_retries + 1):
+            if not policy.breaker.allow():
+                self._record(provider, "short_circuited")
+                raise CircuitOpenError(f"Circuit open for provider '{provider}'")
+            self._record(provider, "throttled_seconds", policy.bucket.acquire())
+            self._record(provider, "requests")
+            try:
+                with get_metrics().time_call(provider, getattr(fn, "__name__", "call")):
+                    result = fn(*args, **kwargs)
+                policy.breaker.record_success()
+                return result
+            except Exception as e:
+                response = getattr(e, "response", None)
+                status = getattr(response, "status_code", None)
+                if status not in RETRY_STATUSES or attempt == policy.max_retries:
+                    # Client errors mean the provider answered; anything else counts against it
+                    if status is not None and status < 500 and status not in RETRY_STATUSES:
+                        policy.breaker.record_success()
+                    else:
+                        policy.breaker.record_failure()
+                    raise
+                policy.breaker.record_failure()
+                self._record(provider, "retries")
+                delay = self.retry_after(response)
+                if status == 429:
+                    self._record(provider, "rate_limited")
+                    policy.bucket.pause(delay if delay is not None else policy.backoff(attempt))
+                time.sleep(delay if delay is not None else policy.backoff(attempt))
+
+    def stats(self) -> dict:
+        """Per-provider counters: requests, retries, rate_limited, short_circuited, throttled_seconds, circuit."""
+        with self._lock:
+            report = {provider: dict(counters) for provider, counters in self._stats.items()}
+            for provider, policy in self._policies.items():
+                report.setdefault(provider, {})["circuit"] = policy.breaker.state
+        return report
+
+
+# ----------------------
+# Shared instance
+# ----------------------
+_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    return _limiter
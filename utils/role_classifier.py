@@ -0,0 +1,115 @@
+import json
+import re
+import threading
+from functools import lru_cache
+
+# Default tables (override with workflow.json config.role_classifier).
+# Rows are in precedence order: the first row with a matching keyword wins.
+DEFAULT_TABLES = {
+    # Role guessed from a contact's email / name when no title is known
+    "roles": [
+        {"role": "VP of Sales", "keywords": ["vp", "vice president"]},
+        {"role": "Director of Sales", "keywords": ["director"]},
+        {"role": "Sales Manager", "keywords": ["manager"]}
+    ],
+    "default_role": "Sales Executive",
+    # Seniority from a title
+    "seniority": [
+        {"level": "executive", "keywords": ["vp", "vice president", "chief", "head", "cro", "cso"]},
+        {"level": "senior", "keywords": ["director"]}
+    ],
+    "default_seniority": "mid",
+    # Titles that count as a role match in scoring
+    "target_roles": ["sales manager", "sales executive", "director of sales", "sales director",
+                     "vp of sales", "vp sales", "vice president of sales", "head of sales"]
+}
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and turn punctuation into spaces, so 'jane.vp@x.com' and 'VP, Sales' split into words."""
+    return f" {_NON_WORD.sub(' ', (text or '').lower()).strip()} "
+
+
+def _compile(rows: list) -> re.Pattern:
+    """
+    One alternation for a whole table: group i matches any keyword of row i.
+    Keywords are matched as whole (normalized) words.
+    """
+    groups = []
+    for i, keywords in enumerate(rows):
+        words = sorted((_normalize(k).strip() for k in keywords if k), key=len, reverse=True)
+        groups.append(f"(?P<r{i}>{'|'.join(re.escape(w) for w in words) or '(?!)'})")
+    return re.compile(r"(?<= )(?:" + "|".join(groups) + r")(?= )")
+
+
+def _first_row(pattern: re.Pattern, text: str):
+    """Index of the highest-precedence row with a keyword in text (None if no match)."""
+    best = None
+    # Lookarounds leave the separating spaces unconsumed, so overlapping words are all found
+    for match in pattern.finditer(text):
+        row = int(match.lastgroup[1:])
+        if best is None or row < best:
+            best = row
+            if row == 0:
+                break
+    return best
+
+
+class RoleClassifier:
+    """
+    Table-driven role / seniority classifier shared by DataEnrichmentAgent and
+    ScoringAgent. Each keyword table is compiled into one combined regex and
+    results are memoized per distinct title, so classifying a batch costs one
+    regex scan per distinct title rather than one substring check per
+    keyword per lead.
+    """
+
+    def __init__(self, tables: dict = None, cache_size: int = 65536):
+        """
+        Initialize RoleClassifier.
+
+        Args:
+            tables: Overrides for DEFAULT_TABLES (roles, default_role, seniority,
+                default_seniority, target_roles)
+            cache_size: Distinct titles memoized per lookup
+        """
+        self.tables = {**DEFAULT_TABLES, **(tables or {})}
+        self._roles = [row["role"] for row in self.tables["roles"]]
+        self._levels = [row["level"] for row in self.tables["seniority"]]
+        self._role_pattern = _compile([row["keywords"] for row in self.tables["roles"]])
+        self._seniority_pattern = _compile([row["keywords"] for row in self.tables["seniority"]])
+        self._target_pattern = _compile([self.tables["target_roles"]])
+        self.infer_role = lru_cache(maxsize=cache_size)(self._infer_role)
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _infer_role(self, text: str) -> str:
+        """Role implied by free text such as an email address or name (default_role if none)."""
+        row = _first_row(self._role_pattern, _normalize(text))
+        return self.tables["default_role"] if row is None else self._roles[row]
+
+    def _classify(self, title: str) -> tuple:
+        """(seniority, role_match) for a title."""
+        text = _normalize(title)
+        row = _first_row(self._seniority_pattern, text)
+        seniority = self.tables["default_seniority"] if row is None else self._levels[row]
+        return seniority, self._target_pattern.search(text) is not None
+
+    def classify_many(self, titles) -> list:
+        """Classify a batch: each distinct title is classified once."""
+        results = {title: self.classify(title) for title in set(titles)}
+        return [results[title] for title in titles]
+
+
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_role_classifier(tables: dict = None) -> RoleClassifier:
+    """Shared classifier per table configuration, so its memo survives across agent calls."""
+    key = json.dumps(tables or {}, sort_keys=True)
+    with _classifiers_lock:
+        if key not in _classifiers:
+            _classifiers[key] = RoleClassifier(tables)
+        return _classifiers[key]
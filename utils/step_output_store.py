@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import shutil
+from itertools import islice
+
+
+class SpilledList:
+    """
+    Read-only, lazily loaded list stored as chunked JSONL files.
+    Iteration streams one line at a time and pickles as its file references
+    only. Most agents still list() their input, so a spilled output is loaded
+    in full while the consuming step runs: spilling bounds memory between
+    steps (completed outputs, run records, checkpoints), not within a step.
+    """
+
+    def __init__(self, paths: list, length: int, chunk_size: int, fingerprint: str):
+        self.paths = list(paths)
+        self.length = length
+        self.chunk_size = chunk_size
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __iter__(self):
+        for path in self.paths:
+            with open(path, "r") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.length))
+            if indices.step > 0:
+                return list(islice(iter(self), indices.start, indices.stop, indices.step))
+            if not indices:
+                return []
+            # islice only walks forward: read the same positions in ascending order, then reverse
+            return list(islice(iter(self), indices[-1], indices[0] + 1, -indices.step))[::-1]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("SpilledList index out of range")
+        chunk, offset = divmod(index, self.chunk_size)
+        with open(self.paths[chunk], "r") as f:
+            return json.loads(next(islice(f, offset, None)))
+
+    def head(self, n: int = 5) -> list:
+        """First n items, for previews."""
+        return list(islice(iter(self), n))
+
+    def __repr__(self):
+        return f"SpilledList({self.length} items in {len(self.paths)} chunks)"
+
+    def to_ref(self) -> dict:
+        """JSON-serializable reference to the chunk files."""
+        return {"__spilled__": self.paths, "length": self.length,
+                "chunk_size": self.chunk_size, "fingerprint": self.fingerprint}
+
+    @classmethod
+    def from_ref(cls, ref: dict) -> "SpilledList":
+        return cls(ref["__spilled__"], ref["length"], ref["chunk_size"], ref["fingerprint"])
+
+    def copy_to(self, directory: str) -> "SpilledList":
+        """Copy the chunk files into directory (no-op if already there)."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for path in self.paths:
+            target = os.path.join(directory, os.path.basename(path))
+            if not os.path.exists(target):
+                shutil.copyfile(path, target)
+            paths.append(target)
+        return SpilledList(paths, self.length, self.chunk_size, self.fingerprint)
+
+
+class StepOutputStore:
+    """
+    Keeps small step outputs in memory and spills large lists (leads, messages,
+    responses) to chunked JSONL files under run_dir. Downstream steps receive a
+    SpilledList in place of the list. Agents that list() their input load it
+    back in full for the duration of their step.
+    """
+
+    def __init__(self, run_dir: str, spill_threshold: int = 1000, chunk_size: int = 500):
+        """
+        Initialize StepOutputStore.
+
+        Args:
+            run_dir: Directory for spilled chunks (one sub-folder per step/key)
+            spill_threshold: Lists with at least this many items are spilled
+            chunk_size: Items per JSONL chunk file
+        """
+        self.run_dir = run_dir
+        self.spill_threshold = spill_threshold
+        self.chunk_size = chunk_size
+
+    def _spill(self, directory: str, items) -> SpilledList:
+        """Stream items into chunk files, hashing content along the way."""
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        paths = []
+        length = 0
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                break
+            path = os.path.join(directory, f"part-{len(paths):05d}.jsonl")
+            with open(path, "w") as f:
+                for item in chunk:
+                    line = json.dumps(item, default=str) + "\n"
+                    digest.update(line.encode("utf-8"))
+                    f.write(line)
+            paths.append(path)
+            length += len(chunk)
+        return SpilledList(paths, length, self.chunk_size, digest.hexdigest())
+
+    def _should_spill(self, value) -> bool:
+        if isinstance(value, SpilledList):
+            return False
+        if isinstance(value, (list, tuple)):
+            return len(value) >= self.spill_threshold
+        # Generators / iterators are always streamed to disk
+        return hasattr(value, "__next__")
+
+    def put(self, step_id: str, output):
+        """
+        Store a step output, spilling large list values.
+        Returns the output to keep in memory (large lists replaced by SpilledList).
+        """
+        if isinstance(output, dict):
+            stored = {}
+            for key, value in output.items():
+                if self._should_spill(value):
+                    stored[key] = self._spill(os.path.join(self.run_dir, step_id, key), value)
+                else:
+                    stored[key] = value
+            return stored
+        if self._should_spill(output):
+            return self._spill(os.path.join(self.run_dir, step_id, "output"), output)
+        return output
+
+    @staticmethod
+    def summarize(output) -> str:
+        """Compact description of a step output for logs (never the full payload)."""
+        def describe(value):
+            if isinstance(value, SpilledList):
+                return f"{len(value)} items (spilled)"
+            if isinstance(value, (list, tuple)):
+                return f"{len(value)} items"
+            if isinstance(value, dict):
+                return f"{{{len(value)} keys}}"
+            text = repr(value)
+            return text if len(text) <= 80 else text[:77] + "..."
+
+        if isinstance(output, dict):
+            return "{" + ", ".join(f"{k}: {describe(v)}" for k, v in output.items()) + "}"
+        return describe(output)
+
+    @staticmethod
+    def preview(output, n: int = 20):
+        """Copy of output with every list truncated to n items, for display."""
+        def cut(value):
+            if isinstance(value, SpilledList):
+                return value.head(n)
+            if isinstance(value, (list, tuple)):
+                return list(value[:n])
+            return value
+
+        if isinstance(output, dict):
+            return {k: cut(v) for k, v in output.items()}
+        return cut(output)
@@ -0,0 +1,239 @@
+import abc
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class QueueBackend(abc.ABC):
+    """
+    Interface of a durable task queue with leases.
+    A claimed task is invisible to other workers until its lease expires; the
+    owner extends the lease with heartbeat() and finishes it with ack() or
+    nack(). Tasks whose lease expires (crashed worker) are redelivered until
+    max_attempts is reached, after which they are marked failed.
+    """
+
+    @abc.abstractmethod
+    def publish(self, campaign: str, step_id: str, payloads: list, max_attempts: int = 5) -> int:
+        """Enqueue one task per payload; duplicates (same campaign/step/payload) are ignored. Returns count added."""
+
+    @abc.abstractmethod
+    def claim(self, worker_id: str, campaign: str, step_ids: list = None, limit: int = 1,
+              lease_seconds: float = 60) -> list:
+        """Lease up to limit tasks. Returns [{"id", "campaign", "step_id", "payload", "attempts"}]."""
+
+    @abc.abstractmethod
+    def heartbeat(self, worker_id: str, task_ids: list, lease_seconds: float = 60) -> list:
+        """Extend leases still owned by worker_id. Returns the task ids that were extended."""
+
+    @abc.abstractmethod
+    def ack(self, worker_id: str, task_id: int, result=None, follow_up: list = None) -> bool:
+        """
+        Complete a task and atomically publish follow-up tasks [(step_id, payload), ...].
+        Returns False if the lease was lost (the task may be redelivered elsewhere).
+        """
+
+    @abc.abstractmethod
+    def nack(self, worker_id: str, task_id: int, error: str = "", retry_delay: float = 0) -> bool:
+        """Give a task back (or fail it once attempts are exhausted). Returns False if the lease was lost."""
+
+    @abc.abstractmethod
+    def results(self, campaign: str, step_id: str):
+        """Iterate results of completed tasks of a step, in publish order."""
+
+    @abc.abstractmethod
+    def stats(self, campaign: str) -> dict:
+        """Task counts per step and status: { step_id: { status: count } }."""
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """
+    Queue backend on a local SQLite file (WAL mode).
+    Several worker processes on one machine can share it; claims run in an
+    IMMEDIATE transaction so a task is leased to exactly one worker.
+    """
+
+    def __init__(self, path: str = "queue/autoreach.sqlite3"):
+        """
+        Initialize SQLiteQueueBackend.
+
+        Args:
+            path: SQLite file path (parent directory is created if needed)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, campaign TEXT NOT NULL, step_id TEXT NOT NULL,"
+            " dedupe_key TEXT NOT NULL UNIQUE, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL DEFAULT 5,"
+            " lease_owner TEXT, lease_expires REAL, available_at REAL NOT NULL,"
+            " result TEXT, error TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks(campaign, status, available_at)")
+
+    @staticmethod
+    def _dedupe_key(campaign: str, step_id: str, payload) -> str:
+        raw = json.dumps([campaign, step_id, payload], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _insert(self, campaign: str, step_id: str, payloads, max_attempts: int, now: float) -> int:
+        added = 0
+        for payload in payloads:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO tasks (campaign, step_id, dedupe_key, payload, max_attempts, available_at,"
+                " updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (campaign, step_id, self._dedupe_key(campaign, step_id, payload),
+                 json.dumps(payload, default=str), max_attempts, now, now)
+            )
+            added += cursor.rowcount
+        return added
+
+    def publish(self, campaign: str, step_id: str, payloads: list, max_attempts: int = 5) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._insert(campaign, step_id, payloads, max_attempts, time.time())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(self, worker_id: str, campaign: str, step_ids: list = None, limit: int = 1,
+              lease_seconds: float = 60) -> list:
+        now = time.time()
+        step_filter = ""
+        params = [campaign, now, now]
+        if step_ids:
+            step_filter = f" AND step_id IN ({','.join('?' * len(step_ids))})"
+            params.extend(step_ids)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases whose attempts are used up go to the dead-letter state
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = 'lease expired', lease_owner = NULL, updated_at = ?"
+                    " WHERE campaign = ? AND status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                    (now, campaign, now)
+                )
+                rows = self._conn.execute(
+                    "SELECT id, step_id, payload, attempts FROM tasks"
+                    " WHERE campaign = ? AND ((status = 'pending' AND available_at <= ?)"
+                    " OR (status = 'leased' AND lease_expires < ?))" + step_filter +
+                    " ORDER BY id LIMIT ?",
+                    params + [limit]
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?,"
+                    " attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(worker_id, now + lease_seconds, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return [{"id": row[0], "campaign": campaign, "step_id": row[1], "payload": json.loads(row[2]),
+                 "attempts": row[3] + 1} for row in rows]
+
+    def heartbeat(self, worker_id: str, task_ids: list, lease_seconds: float = 60) -> list:
+        now = time.time()
+        extended = []
+        with self._lock:
+            for task_id in task_ids:
+                cursor = self._conn.execute(
+                    "UPDATE tasks SET lease_expires = ?, updated_at = ?"
+                    " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                    (now + lease_seconds, now, task_id, worker_id)
+                )
+                if cursor.rowcount:
+                    extended.append(task_id)
+        return extended
+
+    def ack(self, worker_id: str, task_id: int, result=None, follow_up: list = None) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT campaign, max_attempts FROM tasks"
+                                         " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                                         (task_id, worker_id)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'done', result = ?, lease_owner = NULL, updated_at = ? WHERE id = ?",
+                    (json.dumps(result, default=str), now, task_id)
+                )
+                for step_id, payload in follow_up or []:
+                    self._insert(row[0], step_id, [payload], row[1], now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def nack(self, worker_id: str, task_id: int, error: str = "", retry_delay: float = 0) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,"
+                " error = ?, lease_owner = NULL, available_at = ?, updated_at = ?"
+                " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (error, now + retry_delay, now, task_id, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def results(self, campaign: str, step_id: str):
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, result FROM tasks WHERE campaign = ? AND step_id = ? AND status = 'done' AND id > ?"
+                    " ORDER BY id LIMIT 500", (campaign, step_id, last_id)
+                ).fetchall()
+            if not rows:
+                return
+            for task_id, result in rows:
+                yield json.loads(result)
+            last_id = rows[-1][0]
+
+    def stats(self, campaign: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT step_id, status, COUNT(*) FROM tasks WHERE campaign = ? GROUP BY step_id, status", (campaign,)
+            ).fetchall()
+        report = {}
+        for step_id, status, count in rows:
+            report.setdefault(step_id, {})[status] = count
+        return report
+
+
+# Backends by URL scheme; register others (e.g. Redis) here
+QUEUE_BACKENDS = {
+    "sqlite": SQLiteQueueBackend
+}
+
+
+def open_queue(url: str = "sqlite:///queue/autoreach.sqlite3") -> QueueBackend:
+    """
+    Open a queue backend from a URL such as "sqlite:///queue/autoreach.sqlite3"
+    (relative path) or "sqlite:////var/lib/autoreach/queue.sqlite3" (absolute).
+    """
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        scheme, location = "sqlite", url
+    backend = QUEUE_BACKENDS.get(scheme)
+    if backend is None:
+        raise ValueError(f"Unknown queue backend '{scheme}'. Available: {sorted(QUEUE_BACKENDS)}")
+    return backend(location[1:] if location.startswith("/") else location)